@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Einheitlicher, indizierter Serverkatalog über alle Anbieter.
+
+Die Einzelskripte halten die Server jeweils anders (NordVPN: Tab-Zeilen mit
+id/name/station/hostname/status, CyberGhost: {Stadt: [Instanz]} ohne die Spalte
+Load, ExpressVPN: Dicts aus Code/Land/Location). Hier liegen die Server aller
+Anbieter spaltenweise in einem Katalog:
+  - kategorische Felder (provider, country, city, station, status) als Codes in
+    array("I") mit je einer Wertetabelle
+  - Load als array("h") (-1: unbekannt), zusätzlich sortiert für Bereichsabfragen
+  - Indizes Wert -> Zeilen für alle kategorischen Felder und für die Servergruppen
+    (NordVPN: "Standard VPN servers", "P2P", ...)
+
+select() schneidet die Indizes (kleinster zuerst) und liefert z. B. "online
+UK-Server unter 50 % Load, je Station einer" ohne die Liste durchzugehen:
+  select(catalogue, provider="nordvpn", country="gb", status="online", max_load=50, one_per="station")
+
+Der Katalog wird aus providers.fetch_servers() oder aus gespeicherten Serverlisten
+(results/*/serverlist, Format der Einzelskripte oder von sweep.py) aufgebaut.
+
+Beispiele:
+  ./catalogue.py --provider nordvpn --country gb --status online --max-load 50 --one-per station
+  ./catalogue.py --list ../../results/NordVPN/BBCiPlayer/serverlist/NordVPN_UK_20250302.txt --provider nordvpn \\
+      --country gb --status online --one-per station
+  ./catalogue.py --provider nordvpn --country gb --group P2P
+
+Servergruppen liefert nur die NordVPN-API (ohne --list), Load außerdem die
+Serverlisten von sweep.py. Die älteren Listen unter results/ haben beide Spalten
+nicht, --group und --max-load wählen dort nichts aus.
+"""
+import argparse
+import array
+import bisect
+import re
+
+import providers
+
+CATEGORIES = ("provider", "country", "city", "station", "status")
+TEXT_FIELDS = ("name", "target", "hostname")
+NO_LOAD = -1
+
+
+def new_catalogue():
+    """Leerer Katalog."""
+    catalogue = {
+        "size": 0,
+        "codes": {field: array.array("I") for field in CATEGORIES},
+        "values": {field: [] for field in CATEGORIES},
+        "lookup": {field: {} for field in CATEGORIES},
+        "text": {field: [] for field in TEXT_FIELDS},
+        "load": array.array("h"),
+        "groups": [],
+        "extra": [],
+        # Indizes: Feld -> Wert -> Zeilen; "group" -> Gruppe -> Zeilen
+        "index": {field: {} for field in CATEGORIES + ("group",)},
+        # (Load, Zeile), wird erst bei Bedarf sortiert
+        "by_load": [],
+        "by_load_sorted": True,
+    }
+    return catalogue
+
+
+def encode(catalogue, field, value):
+    """Code eines kategorischen Werts (neue Werte werden angehängt)."""
+    lookup = catalogue["lookup"][field]
+    code = lookup.get(value)
+    if code is None:
+        code = lookup[value] = len(catalogue["values"][field])
+        catalogue["values"][field].append(value)
+    return code
+
+
+def add(catalogue, server):
+    """Nimmt einen Server (providers.new_server()) auf; liefert seine Zeile."""
+    row = catalogue["size"]
+    for field in CATEGORIES:
+        value = server.get(field) or ""
+        catalogue["codes"][field].append(encode(catalogue, field, value))
+        catalogue["index"][field].setdefault(value, array.array("I")).append(row)
+    for field in TEXT_FIELDS:
+        catalogue["text"][field].append(server.get(field) or "")
+    load = server.get("load")
+    catalogue["load"].append(NO_LOAD if load is None else load)
+    if load is not None:
+        catalogue["by_load"].append((load, row))
+        catalogue["by_load_sorted"] = False
+    groups = tuple(server.get("groups") or ())
+    catalogue["groups"].append(groups)
+    for group in groups:
+        catalogue["index"]["group"].setdefault(group, array.array("I")).append(row)
+    known = set(CATEGORIES + TEXT_FIELDS + ("load", "groups"))
+    catalogue["extra"].append({key: value for key, value in server.items() if key not in known} or None)
+    catalogue["size"] += 1
+    return row
+
+
+def from_servers(servers, catalogue=None):
+    """Katalog aus einer Liste von Servern (ggf. an einen bestehenden angehängt)."""
+    catalogue = catalogue or new_catalogue()
+    for server in servers:
+        add(catalogue, server)
+    return catalogue
+
+
+def server(catalogue, row):
+    """Server der Zeile row als Dict wie von providers.new_server()."""
+    fields = {field: catalogue["values"][field][catalogue["codes"][field][row]] for field in CATEGORIES}
+    for field in TEXT_FIELDS:
+        fields[field] = catalogue["text"][field][row]
+    load = catalogue["load"][row]
+    fields["load"] = None if load == NO_LOAD else load
+    fields["groups"] = list(catalogue["groups"][row])
+    fields.update(catalogue["extra"][row] or {})
+    return providers.new_server(fields.pop("provider"), fields.pop("name"), fields.pop("target"),
+                                fields.pop("country"), **fields)
+
+
+def select(catalogue, max_load=None, one_per=None, limit=None, **criteria):
+    """
+    Zeilen, die allen Kriterien entsprechen (Feld=Wert für provider, country, city,
+    station, status bzw. group=Gruppe). max_load lässt nur Server mit bekanntem Load
+    bis einschließlich max_load zu; one_per behält je Wert dieses Felds nur den
+    Server mit dem geringsten Load. Ergebnis aufsteigend nach Load (unbekannt zuletzt).
+    """
+    candidates = []
+    for field, value in criteria.items():
+        if value is None:
+            continue
+        if field not in catalogue["index"]:
+            raise ValueError(f"Kein Index für {field}")
+        candidates.append(catalogue["index"][field].get(value, ()))
+    if max_load is not None:
+        if not catalogue["by_load_sorted"]:
+            catalogue["by_load"].sort()
+            catalogue["by_load_sorted"] = True
+        end = bisect.bisect_right(catalogue["by_load"], (max_load, catalogue["size"]))
+        candidates.append([row for _, row in catalogue["by_load"][:end]])
+    if candidates:
+        candidates.sort(key=len)
+        rows = set(candidates[0])
+        for other in candidates[1:]:
+            rows.intersection_update(other)
+            if not rows:
+                break
+    else:
+        rows = range(catalogue["size"])
+    loads = catalogue["load"]
+    ordered = sorted(rows, key=lambda row: (loads[row] == NO_LOAD, loads[row], row))
+    if one_per:
+        codes, seen, unique = catalogue["codes"][one_per], set(), []
+        for row in ordered:
+            if codes[row] not in seen:
+                seen.add(codes[row])
+                unique.append(row)
+        ordered = unique
+    return ordered[:limit] if limit else ordered
+
+
+def servers(catalogue, rows):
+    return [server(catalogue, row) for row in rows]
+
+
+def pick(servers_list, status=None, group=None, max_load=None, one_per=None):
+    """
+    Auswahl für den Sweep: Liefert (ausgewählte Server, übersprungene), wobei
+    übersprungene wie bei latency_scan.rank_servers() (Server, Grund) sind.
+    Die Reihenfolge der ausgewählten Server bleibt erhalten.
+    """
+    catalogue = from_servers(servers_list)
+    chosen = set(select(catalogue, max_load, one_per, status=status, group=group))
+    selected, skipped = [], []
+    for row, entry in enumerate(servers_list):
+        if row in chosen:
+            selected.append(entry)
+        elif status and entry["status"] != status:
+            skipped.append((entry, f"Status {entry['status'] or 'unknown'}"))
+        elif group and group not in (entry.get("groups") or ()):
+            skipped.append((entry, f"Not in group {group}"))
+        elif max_load is not None and (entry["load"] is None or entry["load"] > max_load):
+            load = "unknown" if entry["load"] is None else f"{entry['load']} %"
+            skipped.append((entry, f"Load {load} > {max_load} %"))
+        else:
+            skipped.append((entry, f"Another server of {one_per} {entry.get(one_per) or '-'} selected"))
+    return selected, skipped
+
+
+def count(catalogue, field):
+    """Anzahl Server je Wert von field."""
+    return {value: len(rows) for value, rows in catalogue["index"][field].items()}
+
+
+def parse_server_list(filename, provider, country):
+    """
+    Liest eine gespeicherte Serverliste ein. Erkannt werden die Formate von sweep.py,
+    NordVPN (id, name, station, hostname, status), ExpressVPN (code, Land, Location)
+    und CyberGhost ("Stadt:" gefolgt von eingerückten Instanzen bzw. nur Instanzen).
+    """
+    result, city = [], ""
+    with open(filename, "r") as f:
+        lines = [line.rstrip("\n") for line in f if line.strip()]
+    sweep_format = bool(lines) and lines[0].startswith("Server\tZiel")
+    for line in lines[1:] if sweep_format else lines:
+        parts = line.split("\t")
+        if sweep_format:
+            load = int(parts[5]) if len(parts) > 5 and parts[5].isdigit() else None
+            result.append(providers.new_server(provider, parts[0], parts[1], country, city=parts[2],
+                                               station=parts[3], status=parts[4], load=load))
+        elif provider == "nordvpn" and len(parts) >= 5:
+            name = parts[3].replace(".nordvpn.com", "")
+            result.append(providers.new_server(provider, name, name, country, hostname=parts[3],
+                                               station=parts[2], status=parts[4], id=parts[0]))
+        elif provider == "expressvpn" and len(parts) >= 3:
+            prefix = providers.EXPRESSVPN_PREFIXES.get(country, country.upper() + " -")
+            city_name = parts[2][len(prefix):].strip() if parts[2].startswith(prefix) else parts[2]
+            result.append(providers.new_server(provider, parts[0], parts[2], country, city=city_name))
+        elif provider == "cyberghostvpn" and line.endswith(":"):
+            city = line[:-1].strip()
+        elif provider == "cyberghostvpn":
+            instance = line.strip()
+            city_name = city or re.sub(r"-s\d+-i\d+$", "", instance).capitalize()
+            result.append(providers.new_server(provider, instance, f"{country}/{city_name}/{instance}", country,
+                                               city=city_name, station=instance.rsplit("-", 1)[0]))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Server aus dem Katalog auswählen.")
+    parser.add_argument("--provider", required=True, choices=sorted(providers.DISPLAY_NAMES))
+    parser.add_argument("--country", required=True, help="Ländercode, z. B. gb oder us")
+    parser.add_argument("--list", action="append", help="Gespeicherte Serverliste statt Abruf (mehrfach)")
+    parser.add_argument("--configs", help="ProtonVPN: Verzeichnis mit Konfigurationsdateien")
+    parser.add_argument("--city")
+    parser.add_argument("--status", help="z. B. online")
+    parser.add_argument("--group", help="Servergruppe, z. B. P2P (nur ohne --list, aus der API)")
+    parser.add_argument("--max-load", type=int, help="Höchster Load in Prozent")
+    parser.add_argument("--one-per", choices=CATEGORIES, help="Je Wert dieses Felds nur einen Server")
+    parser.add_argument("--limit", type=int)
+    args = parser.parse_args()
+
+    if args.list:
+        found = []
+        for filename in args.list:
+            found += parse_server_list(filename, args.provider, args.country)
+    else:
+        session = providers.open_session(args.provider, configs=args.configs)
+        found = providers.fetch_servers(session, args.country)
+    catalogue = from_servers(found)
+    rows = select(catalogue, args.max_load, args.one_per, args.limit, provider=args.provider,
+                  country=args.country, city=args.city, status=args.status, group=args.group)
+    for entry in servers(catalogue, rows):
+        load = "-" if entry["load"] is None else f"{entry['load']} %"
+        print(f"{entry['name']}\t{entry['city'] or entry['station']}\t{entry['status']}\t{load}")
+    print(f"{len(rows)} von {catalogue['size']} Servern ausgewählt.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Verteilter Sweep: Serverliste in Leases aufteilen und von mehreren Rechnern abarbeiten.
+
+Ein Rechner hält nur begrenzt viele Tunnel, und die Anbieter begrenzen die Sitzungen
+je Konto. Der Koordinator teilt daher die Serverliste eines Anbieters für einen
+Dienst in Leases (Pakete von Servern) auf, die Worker einzeln abholen, mit der
+gemeinsamen Sweep-Schleife (sweep.py) prüfen und zurückmelden.
+
+Die Warteschlange ist eine SQLite-Datenbank. Worker auf demselben Rechner (oder mit
+gemeinsamem Dateisystem) greifen direkt darauf zu (--db), entfernte Worker über
+einen kleinen HTTP-Dienst ("serve", --coordinator http://host:port).
+
+Leases:
+  - Ein abgeholter Lease gilt lease_seconds lang; der Worker verlängert ihn
+    regelmäßig, solange er arbeitet.
+  - Meldet sich ein Worker nicht mehr (Absturz, Netz weg), läuft der Lease ab und
+    wird dem nächsten Worker zugeteilt, höchstens MAX_ATTEMPTS-mal.
+  - Zurückgemeldet werden kann nur ein Lease, der dem Worker noch gehört.
+"merge" schreibt alle Ergebnisse in eine Ergebnisdatei im Schema von results/.
+
+Beispiel:
+  ./coordinator.py plan --db run.sqlite --provider nordvpn --service peacock --lease-size 25
+  ./coordinator.py serve --db run.sqlite --port 8740
+  ./coordinator.py work --coordinator http://10.0.0.5:8740 --worker-id host2 --wait
+  ./coordinator.py merge --db run.sqlite --output Peacock_Results_NordVPN_US.txt
+Lokaler Test mit mehreren Worker-Prozessen (ohne VPN, einer wird abgebrochen):
+  ./coordinator.py selftest --workers 4
+"""
+import argparse
+import http.server
+import json
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+import probes
+import providers
+import sweep
+
+DEFAULT_LEASE_SIZE = 25
+DEFAULT_LEASE_SECONDS = 600
+DEFAULT_PORT = 8740
+MAX_ATTEMPTS = 3
+POLL_SECONDS = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS leases (
+    id INTEGER PRIMARY KEY,
+    provider TEXT, service TEXT, country TEXT, backend TEXT,
+    servers TEXT,
+    state TEXT DEFAULT 'pending',
+    worker TEXT,
+    expires REAL DEFAULT 0,
+    attempts INTEGER DEFAULT 0,
+    records TEXT
+)
+"""
+
+
+def connect(db):
+    """Öffnet die Datenbank; Transaktionen werden explizit gesteuert."""
+    conn = sqlite3.connect(db, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(SCHEMA)
+    return conn
+
+
+def plan(db, provider, service, country, backend, servers, lease_size=DEFAULT_LEASE_SIZE):
+    """Teilt servers in Leases zu je lease_size Servern auf; liefert deren Anzahl."""
+    conn = connect(db)
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        for start in range(0, len(servers), lease_size):
+            conn.execute(
+                "INSERT INTO leases (provider, service, country, backend, servers) VALUES (?, ?, ?, ?, ?)",
+                (provider, service, country, backend, json.dumps(servers[start:start + lease_size]))
+            )
+    conn.close()
+    return (len(servers) + lease_size - 1) // lease_size
+
+
+def claim(db, worker, lease_seconds=DEFAULT_LEASE_SECONDS):
+    """
+    Teilt worker den nächsten offenen oder abgelaufenen Lease zu.
+    Liefert ein Dict mit id, provider, service, country, backend, servers oder None.
+    """
+    conn = connect(db)
+    now = time.time()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute(
+            "SELECT * FROM leases WHERE attempts < ? AND (state = 'pending' OR (state = 'leased' AND expires < ?)) "
+            "ORDER BY id LIMIT 1", (MAX_ATTEMPTS, now)
+        ).fetchone()
+        if row is None:
+            conn.execute("COMMIT")
+            return None
+        conn.execute(
+            "UPDATE leases SET state = 'leased', worker = ?, expires = ?, attempts = attempts + 1 WHERE id = ?",
+            (worker, now + lease_seconds, row["id"])
+        )
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+    lease = {key: row[key] for key in ("id", "provider", "service", "country", "backend")}
+    lease["servers"] = json.loads(row["servers"])
+    return lease
+
+
+def renew(db, lease_id, worker, lease_seconds=DEFAULT_LEASE_SECONDS):
+    """Verlängert einen Lease; False, wenn er dem Worker nicht mehr gehört."""
+    conn = connect(db)
+    cursor = conn.execute(
+        "UPDATE leases SET expires = ? WHERE id = ? AND worker = ? AND state = 'leased'",
+        (time.time() + lease_seconds, lease_id, worker)
+    )
+    conn.close()
+    return cursor.rowcount > 0
+
+
+def complete(db, lease_id, worker, records):
+    """Speichert die Ergebnisse eines Leases; False, wenn er inzwischen neu vergeben wurde."""
+    conn = connect(db)
+    cursor = conn.execute(
+        "UPDATE leases SET state = 'done', records = ? WHERE id = ? AND worker = ? AND state = 'leased'",
+        (json.dumps(records), lease_id, worker)
+    )
+    conn.close()
+    return cursor.rowcount > 0
+
+
+def status(db):
+    """Anzahl der Leases je Zustand (abgelaufene und aufgegebene getrennt gezählt)."""
+    conn = connect(db)
+    now = time.time()
+    counts = {"pending": 0, "leased": 0, "expired": 0, "failed": 0, "done": 0}
+    for row in conn.execute("SELECT state, expires, attempts FROM leases"):
+        state = row["state"]
+        if state != "done" and row["attempts"] >= MAX_ATTEMPTS and (state == "pending" or row["expires"] < now):
+            state = "failed"
+        elif state == "leased" and row["expires"] < now:
+            state = "expired"
+        counts[state] += 1
+    conn.close()
+    return counts
+
+
+def merge(db, output_file):
+    """
+    Schreibt alle Ergebnisse in Lease-Reihenfolge in output_file. Server aus nicht
+    abgeschlossenen Leases werden als "Skipped (Lease nicht abgeschlossen)" eingetragen.
+    """
+    conn = connect(db)
+    records = []
+    for row in conn.execute("SELECT servers, state, records FROM leases ORDER BY id"):
+        if row["state"] == "done":
+            records.extend(json.loads(row["records"]))
+        else:
+            records.extend({"server": s["name"], "ip": "n/a", "result": "Skipped (Lease nicht abgeschlossen)"}
+                           for s in json.loads(row["servers"]))
+    conn.close()
+    columns = []
+    for record in records:
+        columns += [column for column in record.get("extra", {}) if column not in columns]
+    sweep.rewrite_results(output_file, records, columns)
+    return records
+
+
+# Aktionen, die ein Worker ausführen kann (lokal auf der Datenbank oder per HTTP)
+ACTIONS = {"claim": claim, "renew": renew, "complete": complete, "status": status}
+
+
+def call(target, action, **payload):
+    """Ruft eine Aktion auf: target ist der Pfad der Datenbank oder die URL des Koordinators."""
+    if not target.startswith("http"):
+        return ACTIONS[action](target, **payload)
+    request = urllib.request.Request(
+        f"{target.rstrip('/')}/{action}", data=json.dumps(payload).encode(),
+        headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return json.loads(response.read())["result"]
+
+
+def serve(db, address="0.0.0.0", port=DEFAULT_PORT):
+    """HTTP-Dienst für entfernte Worker: POST /claim, /renew, /complete, /status mit JSON."""
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_POST(self):
+            action = ACTIONS.get(self.path.strip("/"))
+            if action is None:
+                self.send_error(404)
+                return
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            body = json.dumps({"result": action(db, **payload)}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            print(f"{self.client_address[0]} {format % args}")
+
+    server = http.server.ThreadingHTTPServer((address, port), Handler)
+    print(f"Koordinator für '{db}' auf {address}:{port} ...")
+    server.serve_forever()
+
+
+def keep_alive(target, lease, worker, lease_seconds, stop_event):
+    """Verlängert den Lease regelmäßig, bis stop_event gesetzt ist."""
+    while not stop_event.wait(lease_seconds / 3):
+        if not call(target, "renew", lease_id=lease["id"], worker=worker, lease_seconds=lease_seconds):
+            print(f"Lease {lease['id']} wurde inzwischen neu vergeben.")
+            return
+
+
+def run_lease(lease, options, simulate=None):
+    """Prüft die Server eines Leases mit der Sweep-Schleife und liefert die Einträge."""
+    if simulate is not None:
+        records = []
+        for server in lease["servers"]:
+            time.sleep(simulate)
+            records.append({"server": server["name"], "ip": "n/a", "result": "Simulated"})
+        return records
+    session = providers.open_session(lease["provider"], lease["backend"], **options)
+    output_fd, output_file = tempfile.mkstemp(prefix=f"lease-{lease['id']}-", suffix=".txt")
+    os.close(output_fd)
+    try:
+        return sweep.run_sweep(session, lease["servers"], probes.SERVICES[lease["service"]]["check"], output_file)
+    finally:
+        os.unlink(output_file)
+
+
+def unfinished(counts):
+    """Anzahl der Leases, die noch abgeschlossen werden können."""
+    return counts["pending"] + counts["leased"] + counts["expired"]
+
+
+def work(target, worker, options, lease_seconds=DEFAULT_LEASE_SECONDS, simulate=None, wait=False):
+    """
+    Holt Leases ab und arbeitet sie ab, bis keine mehr offen sind. Mit wait wird
+    gewartet, bis auch die Leases anderer Worker abgeschlossen sind, und abgelaufene
+    Leases (z. B. eines abgestürzten Workers) werden übernommen.
+    """
+    done = 0
+    while True:
+        lease = call(target, "claim", worker=worker, lease_seconds=lease_seconds)
+        if lease is None:
+            if not wait or not unfinished(call(target, "status")):
+                break
+            time.sleep(min(POLL_SECONDS, lease_seconds))
+            continue
+        print(f"[{worker}] Lease {lease['id']}: {len(lease['servers'])} Server")
+        stop_event = threading.Event()
+        renewer = threading.Thread(target=keep_alive, args=(target, lease, worker, lease_seconds, stop_event),
+                                   daemon=True)
+        renewer.start()
+        try:
+            records = run_lease(lease, options, simulate)
+        finally:
+            stop_event.set()
+        if call(target, "complete", lease_id=lease["id"], worker=worker, records=records):
+            done += 1
+        else:
+            print(f"[{worker}] Ergebnis von Lease {lease['id']} verworfen (neu vergeben).")
+    print(f"[{worker}] {done} Leases abgeschlossen.")
+    return done
+
+
+def selftest(workers=4, servers=40, lease_size=5, delay=0.05, lease_seconds=2.0):
+    """
+    Plant synthetische Server, startet mehrere Worker-Prozesse mit simulierten
+    Prüfungen und bricht einen davon ab. Prüft, dass jeder Server genau einmal im
+    zusammengeführten Ergebnis steht.
+    """
+    directory = tempfile.mkdtemp(prefix="coordinator-")
+    db = os.path.join(directory, "run.sqlite")
+    names = [f"test{i}" for i in range(servers)]
+    plan(db, "nordvpn", "peacock", "us", "cli",
+         [providers.new_server("nordvpn", name, name, "us") for name in names], lease_size)
+    command = [sys.executable, os.path.abspath(__file__), "work", "--db", db, "--simulate", str(delay),
+               "--lease-seconds", str(lease_seconds), "--wait"]
+    processes = [subprocess.Popen(command + ["--worker-id", f"w{i}"]) for i in range(workers)]
+    time.sleep(delay * lease_size / 2)
+    processes[0].kill()
+    print("Worker w0 abgebrochen.")
+    for process in processes[1:]:
+        process.wait()
+    records = merge(db, os.path.join(directory, "merged.txt"))
+    merged = [record["server"] for record in records if record["result"] == "Simulated"]
+    ok = sorted(merged) == sorted(names)
+    print(f"Status: {status(db)}")
+    print(f"{len(merged)} von {servers} Servern zusammengeführt: {'OK' if ok else 'FEHLER'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verteilter Sweep über mehrere Worker.")
+    parser.add_argument("command", choices=["plan", "serve", "work", "status", "merge", "selftest"])
+    parser.add_argument("--db", help="SQLite-Datenbank der Warteschlange")
+    parser.add_argument("--coordinator", help="work: URL des Koordinators statt --db")
+    parser.add_argument("--provider", choices=sorted(providers.DISPLAY_NAMES))
+    parser.add_argument("--service", choices=sorted(probes.SERVICES))
+    parser.add_argument("--country", help="Ländercode der Server (Standard: Land des Dienstes)")
+    parser.add_argument("--backend", default="cli", choices=["cli", "wireguard", "openvpn"])
+    parser.add_argument("--configs", help="ProtonVPN: Verzeichnis mit Konfigurationsdateien")
+    parser.add_argument("--auth-file", help="ProtonVPN/OpenVPN: Zugangsdaten")
+    parser.add_argument("--catalogue", help="WireGuard: Katalogdatei")
+    parser.add_argument("--private-key-file", help="WireGuard: privater Schlüssel")
+    parser.add_argument("--lease-size", type=int, default=DEFAULT_LEASE_SIZE)
+    parser.add_argument("--lease-seconds", type=float, default=DEFAULT_LEASE_SECONDS)
+    parser.add_argument("--worker-id", default=socket.gethostname())
+    parser.add_argument("--wait", action="store_true",
+                        help="work: warten, bis alle Leases abgeschlossen sind, und abgelaufene übernehmen")
+    parser.add_argument("--simulate", type=float, help="work: keine Verbindungen, je Server diese Dauer (s)")
+    parser.add_argument("--address", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--output", help="merge: Ergebnisdatei")
+    parser.add_argument("--workers", type=int, default=4, help="selftest: Anzahl der Worker-Prozesse")
+    args = parser.parse_args()
+
+    if args.command == "selftest":
+        sys.exit(0 if selftest(args.workers) else 1)
+    target = args.coordinator if args.command == "work" and args.coordinator else args.db
+    if not target:
+        parser.error("--db (bzw. für work --coordinator) wird benötigt")
+    options = {"configs": args.configs, "auth_file": args.auth_file,
+               "catalogue": args.catalogue, "private_key_file": args.private_key_file}
+
+    if args.command == "plan":
+        if not (args.provider and args.service):
+            parser.error("plan benötigt --provider und --service")
+        country = args.country or probes.SERVICES[args.service]["country"]
+        session = providers.open_session(args.provider, args.backend, **options)
+        servers = providers.fetch_servers(session, country)
+        count = plan(args.db, args.provider, args.service, country, args.backend, servers, args.lease_size)
+        print(f"{len(servers)} Server in {count} Leases eingeplant.")
+    elif args.command == "serve":
+        serve(args.db, args.address, args.port)
+    elif args.command == "work":
+        work(target, args.worker_id, options, args.lease_seconds, args.simulate, args.wait)
+    elif args.command == "status":
+        for state, count in status(args.db).items():
+            print(f"{state}\t{count}")
+    elif args.command == "merge":
+        if not args.output:
+            parser.error("merge benötigt --output")
+        records = merge(args.db, args.output)
+        print(f"{len(records)} Einträge wurden in '{args.output}' gespeichert.")
+
+
+if __name__ == "__main__":
+    main()
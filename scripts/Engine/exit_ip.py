@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Externe IP über mehrere Echo-Dienste gleichzeitig, Land und ASN offline.
+
+check_external_ip() fragt nur ip.me ab: Ist der Dienst langsam oder gestört, wartet
+jeder Server im Sweep darauf. Hier werden mehrere Endpunkte parallel abgefragt
+(optional gestaffelt um hedge_delay Sekunden); die erste gültige IP gewinnt, die
+übrigen curl-Prozesse werden abgebrochen.
+
+Land und ASN kommen aus lokalen Datenbanken statt aus einem Webdienst:
+  - MMDB (z. B. GeoLite2-Country.mmdb, GeoLite2-ASN.mmdb), benötigt das Paket maxminddb
+  - CSV mit IP-Bereichen "Start,Ende,Land" bzw. "Start,Ende,ASN,Organisation"
+    (z. B. DB-IP Lite) oder mit Netz in der ersten Spalte ("1.2.3.0/24,Land")
+Ergebnisse werden je IP in einem LRU-Cache gehalten, sodass auch der
+Killswitch-Monitor bei 20 Abfragen/s keine zusätzlichen Anfragen stellt.
+
+Beispiel:
+  ./exit_ip.py --country-db dbip-country-lite.csv --asn-db GeoLite2-ASN.mmdb
+"""
+import argparse
+import asyncio
+import bisect
+import csv
+import functools
+import ipaddress
+import time
+
+DEFAULT_ENDPOINTS = [
+    "ip.me",
+    "https://api.ipify.org",
+    "https://icanhazip.com",
+    "https://checkip.amazonaws.com",
+]
+DEFAULT_TIMEOUT = 5.0
+# 0: alle Endpunkte sofort; sonst startet jeder weitere Endpunkt um diese Zeit später
+DEFAULT_HEDGE_DELAY = 0.0
+CACHE_SIZE = 4096
+
+COLUMNS = ["Land", "ASN"]
+
+# Geladene Datenbanken je Pfad
+_databases = {}
+
+
+def is_ip_address(text):
+    """Prüft, ob text eine gültige IPv4- oder IPv6-Adresse ist."""
+    try:
+        ipaddress.ip_address(text)
+        return True
+    except ValueError:
+        return False
+
+
+async def query(url, timeout):
+    """Fragt einen Echo-Dienst ab; beim Abbruch wird der curl-Prozess beendet."""
+    proc = await asyncio.create_subprocess_exec(
+        "curl", "-s", "--max-time", str(timeout), url,
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL
+    )
+    try:
+        stdout, _ = await proc.communicate()
+    except asyncio.CancelledError:
+        proc.kill()
+        # Restliche Ausgabe lesen, sonst wartet wait() auf die volle Pipe
+        await proc.stdout.read()
+        await proc.wait()
+        raise
+    output = stdout.decode(errors="replace").strip()
+    return output if is_ip_address(output) else None
+
+
+async def race(endpoints, timeout=DEFAULT_TIMEOUT, hedge_delay=DEFAULT_HEDGE_DELAY):
+    """Liefert (IP, Endpunkt) der ersten gültigen Antwort oder (None, None)."""
+    async def delayed(index, url):
+        await asyncio.sleep(index * hedge_delay)
+        return url, await query(url, timeout)
+
+    tasks = [asyncio.ensure_future(delayed(i, url)) for i, url in enumerate(endpoints)]
+    try:
+        for future in asyncio.as_completed(tasks):
+            url, ip = await future
+            if ip:
+                return ip, url
+        return None, None
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def lookup_exit_ip(endpoints=DEFAULT_ENDPOINTS, timeout=DEFAULT_TIMEOUT, hedge_delay=DEFAULT_HEDGE_DELAY):
+    """Synchrone Variante von race() für den Sweep."""
+    return asyncio.run(race(endpoints, timeout, hedge_delay))
+
+
+def load_csv(path):
+    """Liest eine Bereichs-CSV in sortierte Listen je IP-Version."""
+    ranges = {4: [], 6: []}
+    with open(path, newline="") as f:
+        for row in csv.reader(f):
+            if not row or row[0].startswith("#"):
+                continue
+            try:
+                if "/" in row[0]:
+                    network = ipaddress.ip_network(row[0], strict=False)
+                    first, last, values = network[0], network[-1], row[1:]
+                else:
+                    first, last, values = ipaddress.ip_address(row[0]), ipaddress.ip_address(row[1]), row[2:]
+            except ValueError:
+                # Kopfzeile
+                continue
+            ranges[first.version].append((int(first), int(last), values))
+    database = {"kind": "csv"}
+    for version, entries in ranges.items():
+        entries.sort()
+        database[version] = {
+            "starts": [e[0] for e in entries],
+            "ends": [e[1] for e in entries],
+            "values": [e[2] for e in entries],
+        }
+    return database
+
+
+def load_database(path):
+    """Öffnet eine MMDB- oder CSV-Datenbank (einmal je Pfad)."""
+    database = _databases.get(path)
+    if database is None:
+        if path.endswith(".mmdb"):
+            import maxminddb
+            database = {"kind": "mmdb", "reader": maxminddb.open_database(path)}
+        else:
+            database = load_csv(path)
+        _databases[path] = database
+    return database
+
+
+def find(database, ip):
+    """Datensatz zu ip: bei MMDB das Dict des Readers, bei CSV die Werte-Spalten."""
+    if database["kind"] == "mmdb":
+        return database["reader"].get(ip)
+    address = ipaddress.ip_address(ip)
+    table = database[address.version]
+    index = bisect.bisect_right(table["starts"], int(address)) - 1
+    if index >= 0 and int(address) <= table["ends"][index]:
+        return table["values"][index]
+    return None
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def geolocate(ip, country_db=None, asn_db=None):
+    """
+    Land und ASN zu ip aus den lokalen Datenbanken. Liefert ein Dict mit country
+    (ISO-Code), country_name (englischer Name, bei CSV der Code), asn und org.
+    Das Dict wird zwischengespeichert und darf nicht verändert werden.
+    """
+    info = {"country": None, "country_name": None, "asn": None, "org": None}
+    if country_db:
+        record = find(load_database(country_db), ip)
+        if isinstance(record, dict):
+            country = record.get("country") or record.get("registered_country") or {}
+            info["country"] = country.get("iso_code")
+            info["country_name"] = country.get("names", {}).get("en", info["country"])
+        elif record:
+            info["country"] = info["country_name"] = record[0]
+    if asn_db:
+        record = find(load_database(asn_db), ip)
+        if isinstance(record, dict):
+            info["asn"] = record.get("autonomous_system_number")
+            info["org"] = record.get("autonomous_system_organization")
+        elif record:
+            info["asn"] = record[0].upper().lstrip("AS") or None
+            info["org"] = record[1] if len(record) > 1 else None
+    return info
+
+
+def resolve(endpoints=DEFAULT_ENDPOINTS, timeout=DEFAULT_TIMEOUT, hedge_delay=DEFAULT_HEDGE_DELAY,
+            country_db=None, asn_db=None):
+    """Externe IP samt Land/ASN; liefert (IP oder "", Zusatzspalten aus COLUMNS)."""
+    ip, _ = lookup_exit_ip(endpoints, timeout, hedge_delay)
+    if not ip:
+        return "", {column: "" for column in COLUMNS}
+    info = geolocate(ip, country_db, asn_db)
+    asn = f"AS{info['asn']} {info['org'] or ''}".strip() if info["asn"] else ""
+    return ip, {"Land": info["country_name"] or "", "ASN": asn}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Externe IP über mehrere Endpunkte, Land und ASN offline.")
+    parser.add_argument("--endpoint", action="append", help="Echo-Dienst (mehrfach, Standard: eingebaute Liste)")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT)
+    parser.add_argument("--hedge-delay", type=float, default=DEFAULT_HEDGE_DELAY,
+                        help="Verzögerung zwischen den Starts der Endpunkte (s)")
+    parser.add_argument("--country-db", help="Länder-Datenbank (.mmdb oder .csv)")
+    parser.add_argument("--asn-db", help="ASN-Datenbank (.mmdb oder .csv)")
+    parser.add_argument("--ip", help="Nur diese IP nachschlagen (ohne Abfrage)")
+    args = parser.parse_args()
+
+    ip, endpoint = args.ip, "-"
+    if not ip:
+        started = time.monotonic()
+        ip, endpoint = lookup_exit_ip(args.endpoint or DEFAULT_ENDPOINTS, args.timeout, args.hedge_delay)
+        print(f"Antwort nach {(time.monotonic() - started) * 1000:.0f} ms von {endpoint or '-'}")
+    if not ip:
+        print("Fehler: Keine gültige IP erhalten.")
+        return
+    info = geolocate(ip, args.country_db, args.asn_db)
+    print(f"IP: {ip}")
+    print(f"Land: {info['country_name'] or '-'}")
+    print(f"ASN: {info['asn'] or '-'} {info['org'] or ''}".rstrip())
+
+
+if __name__ == "__main__":
+    main()
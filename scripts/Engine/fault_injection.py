@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Fehlerszenarien für Killswitch-Tests (benötigt root und iproute2).
+
+Die Logs unter KillSwitchTests/ decken nur Serverwechsel von Hand ab. Hier wird
+während des hochfrequenten IP-Samplers aus killswitch_monitor.py gezielt ein Fehler
+ausgelöst und nach hold Sekunden wieder behoben:
+  daemon-kill         VPN-Dienst per SIGKILL beenden (danach neu starten wie systemd)
+  interface-drop      Tunnel-Interface (tun/wg) löschen, der Client muss es neu anlegen
+  endpoint-blackhole  Route zum VPN-Server auf blackhole setzen
+  uplink-flap         physisches Interface kurz abschalten
+
+Je Anbieter und Szenario wird gemessen:
+  Bis Blockade  Zeit vom Fehler bis zur ersten Abfrage ohne Verbindung
+  Leak          Dauer, in der die eigene IP sichtbar war (obere Schranke wie in
+                killswitch_monitor.compute_leak_windows())
+  Erholung      Zeit vom Fehler bis die VPN-IP wieder dauerhaft sichtbar ist
+Die Zeitleiste jedes Szenarios hat das Format der Logs unter KillSwitchTests/.
+
+Ohne Abo lässt sich die Matrix im Labor ausführen ("lab"): netns_lab.py liefert die
+Namespaces, dazu kommen ein Fake-VPN (Tunnel über UDP mit Client-"Daemon" im Labor
+und Gegenstelle in vpnlab-srv) und ein Echo-Dienst, der die Absenderadresse
+zurückgibt. Über den Tunnel erscheint 10.201.0.2 als "VPN-IP", ohne Tunnel die
+eigene Adresse 10.200.0.2. Mit --killswitch sperrt eine blackhole-Default-Route den
+Rückfall auf das physische Interface.
+
+Beispiele:
+  sudo ./fault_injection.py lab
+  sudo ./fault_injection.py lab --killswitch --faults daemon-kill interface-drop
+  sudo ./fault_injection.py run --provider nordvpn --server uk2242 --home-ip 203.0.113.7 \\
+      --endpoint 185.1.2.3 --uplink eth0
+"""
+import argparse
+import asyncio
+import fcntl
+import http.server
+import os
+import select
+import signal
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import time
+
+import killswitch_monitor
+import netns_lab
+import providers
+
+FAULTS = ["daemon-kill", "interface-drop", "endpoint-blackhole", "uplink-flap"]
+
+# Prozessname und systemd-Unit des VPN-Dienstes bzw. übliches Tunnel-Interface
+PROVIDER_DAEMONS = {
+    "nordvpn": ("nordvpnd", "nordvpnd"),
+    "expressvpn": ("expressvpnd", "expressvpn"),
+    "cyberghostvpn": ("openvpn", None),
+}
+PROVIDER_INTERFACES = {"nordvpn": "nordlynx", "expressvpn": "tun0", "cyberghostvpn": "tun0"}
+
+DEFAULT_RATE = 20.0
+DEFAULT_TIMEOUT = 1.0
+DEFAULT_BEFORE = 3.0
+DEFAULT_HOLD = 3.0
+DEFAULT_AFTER = 8.0
+RESULTS_HEADER = "Anbieter\tSzenario\tBis Blockade (ms)\tLeak (ms)\tErholung (ms)\tSamples\n"
+
+# Labor: Fake-VPN und Echo-Dienst
+LAB_PORT = 51820
+LAB_SERVER_TUN = "vl-stun"
+LAB_SERVER_TUN_ADDR = "10.201.0.1"
+LAB_ECHO_URL = f"http://{netns_lab.INTERNET_ADDR}/"
+LAB_PID_FILE = "/tmp/vpnlab_daemon.pid"
+LAB_RECONNECT = 1.0
+TUNSETIFF = 0x400454ca
+IFF_TUN = 0x0001
+IFF_NO_PI = 0x1000
+SCRIPT = os.path.abspath(__file__)
+
+
+def run(command, check=False):
+    """Führt einen Befehl aus; liefert den Rückgabewert."""
+    result = subprocess.run(command, capture_output=True, text=True)
+    if check and result.returncode != 0:
+        raise RuntimeError(f"{' '.join(command)}: {result.stderr.strip()}")
+    return result.returncode
+
+
+def new_target(provider, server=None, interface=None, endpoint=None, uplink=None, gateway=None, home_ip=None):
+    """Beschreibt das getestete System für die Fehlerfunktionen."""
+    process, unit = PROVIDER_DAEMONS.get(provider, (None, None))
+    return {
+        "provider": provider,
+        "label": provider,
+        "server": server,
+        "interface": interface or PROVIDER_INTERFACES.get(provider),
+        "endpoint": endpoint,
+        "uplink": uplink,
+        "gateway": gateway,
+        "home_ip": home_ip,
+        "daemon": process,
+        "unit": unit,
+    }
+
+
+def reconnect(target):
+    """Verbindet erneut mit dem Testserver (Aufräumen nach einem Szenario)."""
+    if target["provider"] == "lab":
+        return
+    if target["provider"] in providers.SWITCH_NEEDS_DISCONNECT:
+        run(providers.disconnect_command(target["provider"]))
+    run(providers.connect_command(target["provider"], target["server"]))
+
+
+def kill_daemon(target):
+    if target["provider"] == "lab":
+        with open(LAB_PID_FILE) as f:
+            os.kill(int(f.read()), signal.SIGKILL)
+    else:
+        run(["pkill", "-KILL", "-x", target["daemon"]])
+
+
+def restart_daemon(target):
+    if target["provider"] == "lab":
+        start_lab_daemon()
+        return
+    if target["unit"]:
+        run(["systemctl", "restart", target["unit"]])
+    reconnect(target)
+
+
+def drop_interface(target):
+    run(["ip", "link", "del", "dev", target["interface"]])
+
+
+def blackhole_endpoint(target):
+    run(["ip", "route", "add", "blackhole", f"{target['endpoint']}/32"])
+
+
+def restore_endpoint(target):
+    run(["ip", "route", "del", "blackhole", f"{target['endpoint']}/32"])
+
+
+def uplink_down(target):
+    run(["ip", "link", "set", target["uplink"], "down"])
+
+
+def uplink_up(target):
+    run(["ip", "link", "set", target["uplink"], "up"])
+    if target["gateway"]:
+        # Beim Abschalten entfernt der Kernel die Routen des Interfaces
+        run(["ip", "route", "replace", "default", "via", target["gateway"], "dev", target["uplink"],
+             "metric", "1000"])
+
+
+# Szenario -> (auslösen, beheben oder None, benötigtes Feld in target)
+SCENARIOS = {
+    "daemon-kill": (kill_daemon, restart_daemon, "daemon"),
+    "interface-drop": (drop_interface, None, "interface"),
+    "endpoint-blackhole": (blackhole_endpoint, restore_endpoint, "endpoint"),
+    "uplink-flap": (uplink_down, uplink_up, "uplink"),
+}
+
+
+async def run_scenario(target, fault, ip_url, rate, timeout, before, hold, after):
+    """Sampler starten, Fehler auslösen und beheben; liefert (Samples, Zeitpunkt des Fehlers)."""
+    inject, restore, _ = SCENARIOS[fault]
+    loop = asyncio.get_running_loop()
+    samples = []
+    stats = {"missed": 0, "dropped": 0, "max_lag": 0.0}
+    stop_event = asyncio.Event()
+    sampler = asyncio.ensure_future(killswitch_monitor.run_sampler(
+        samples, stats, stop_event, ip_url, None, rate, timeout, int(timeout * rate) + 1))
+    await asyncio.sleep(before)
+    injected = time.time()
+    await loop.run_in_executor(None, inject, target)
+    await asyncio.sleep(hold)
+    if restore:
+        await loop.run_in_executor(None, restore, target)
+    await asyncio.sleep(after)
+    stop_event.set()
+    await sampler
+    return samples, injected
+
+
+def analyze(samples, injected, home_ip):
+    """Kennzahlen eines Szenarios in Millisekunden (None: nicht eingetreten bzw. nicht erholt)."""
+    after = [sample for sample in samples if sample["wall"] >= injected]
+    blocked = next((s for s in after if s["ip"] is None), None)
+    windows = killswitch_monitor.compute_leak_windows(after, set(), home_ip)
+    leak = sum(window["end"] - window["start"] for window in windows)
+    disrupted = [index for index, s in enumerate(after) if s["ip"] is None or s["ip"] == home_ip]
+    if not disrupted:
+        recovery = 0.0
+    else:
+        recovered = after[disrupted[-1] + 1:]
+        recovery = recovered[0]["wall"] - injected if recovered else None
+    to_ms = lambda value: None if value is None else value * 1000
+    return {
+        "time_to_block": to_ms(blocked["wall"] - injected if blocked else None),
+        "leak": to_ms(leak),
+        "recovery": to_ms(recovery),
+        "samples": len(samples),
+    }
+
+
+def format_ms(value):
+    return "-" if value is None else f"{value:.0f}"
+
+
+def run_matrix(target, faults, output_dir, ip_url, rate, timeout, before, hold, after):
+    """Alle Szenarien nacheinander; schreibt Zeitleisten und die Matrix, liefert die Zeilen."""
+    os.makedirs(output_dir, exist_ok=True)
+    rows = []
+    for fault in faults:
+        field = SCENARIOS[fault][2]
+        if not target[field]:
+            print(f"{fault}: übersprungen (keine Angabe für {field}).")
+            continue
+        print(f"{target['label']}: {fault} ...")
+        samples, injected = asyncio.run(run_scenario(target, fault, ip_url, rate, timeout, before, hold, after))
+        result = analyze(samples, injected, target["home_ip"])
+        killswitch_monitor.mark_ip_changes(samples)
+        leak_suffix = "(Leak)" if result["leak"] else ""
+        killswitch_monitor.write_timeline(
+            samples, os.path.join(output_dir, f"{target['label']}-{fault}{leak_suffix}.txt"))
+        rows.append((target["label"], fault, result))
+        print(f"  Bis Blockade {format_ms(result['time_to_block'])} ms, Leak {format_ms(result['leak'])} ms, "
+              f"Erholung {format_ms(result['recovery'])} ms")
+        if result["recovery"] is None:
+            reconnect(target)
+    with open(os.path.join(output_dir, "matrix.txt"), "a") as f:
+        if f.tell() == 0:
+            f.write(RESULTS_HEADER)
+        for provider, fault, result in rows:
+            f.write(f"{provider}\t{fault}\t{format_ms(result['time_to_block'])}\t{format_ms(result['leak'])}\t"
+                    f"{format_ms(result['recovery'])}\t{result['samples']}\n")
+    return rows
+
+
+def open_tun(name):
+    """Öffnet ein (nicht persistentes) tun-Interface; es verschwindet mit dem Prozess."""
+    fd = os.open("/dev/net/tun", os.O_RDWR)
+    fcntl.ioctl(fd, TUNSETIFF, struct.pack("16sH", name.encode(), IFF_TUN | IFF_NO_PI))
+    return fd
+
+
+def forward(fd, sock, peer=None):
+    """
+    Leitet Pakete zwischen tun und UDP weiter, bis das Interface verschwindet.
+    peer ist die Gegenstelle; ohne Angabe wird sie aus dem ersten Paket gelernt.
+    """
+    while True:
+        readable, _, _ = select.select([fd, sock], [], [], 1.0)
+        if fd in readable:
+            packet = os.read(fd, 65535)
+            if peer:
+                try:
+                    sock.sendto(packet, peer)
+                except OSError:
+                    pass  # z. B. blackhole-Route zum Endpunkt
+        if sock in readable:
+            packet, peer = sock.recvfrom(65535)
+            os.write(fd, packet)
+
+
+def lab_daemon():
+    """Fake-VPN-Client im Labor: legt vl-tun an und verbindet neu, wenn es verschwindet."""
+    with open(LAB_PID_FILE, "w") as f:
+        f.write(str(os.getpid()))
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    while True:
+        try:
+            fd = open_tun(netns_lab.TUN_IF)
+            run(["ip", "addr", "replace", f"{netns_lab.TUN_ADDR}/24", "dev", netns_lab.TUN_IF], check=True)
+            run(["ip", "link", "set", netns_lab.TUN_IF, "up"], check=True)
+            run(["ip", "route", "replace", "default", "dev", netns_lab.TUN_IF, "metric", "10"], check=True)
+            forward(fd, sock, (netns_lab.HOST_ADDR, LAB_PORT))
+        except (OSError, RuntimeError):
+            pass
+        time.sleep(LAB_RECONNECT)
+
+
+class EchoHandler(http.server.BaseHTTPRequestHandler):
+    """Antwortet mit der Absenderadresse (wie ip.me)."""
+
+    def do_GET(self):
+        body = (self.client_address[0] + "\n").encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def lab_server():
+    """Gegenstelle des Fake-VPN und Echo-Dienst in vpnlab-srv."""
+    run(["ip", "addr", "add", f"{netns_lab.INTERNET_ADDR}/32", "dev", "lo"])
+    echo = http.server.ThreadingHTTPServer((netns_lab.INTERNET_ADDR, 80), EchoHandler)
+    threading.Thread(target=echo.serve_forever, daemon=True).start()
+    fd = open_tun(LAB_SERVER_TUN)
+    run(["ip", "addr", "add", f"{LAB_SERVER_TUN_ADDR}/24", "dev", LAB_SERVER_TUN], check=True)
+    run(["ip", "link", "set", LAB_SERVER_TUN, "up"], check=True)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind((netns_lab.HOST_ADDR, LAB_PORT))
+    forward(fd, sock)
+
+
+def start_lab_daemon():
+    subprocess.Popen(netns_lab.ns([sys.executable, SCRIPT, "lab-daemon"]),
+                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_for_exit_ip(ip_url, expected, timeout=10.0):
+    """Wartet, bis der Echo-Dienst die erwartete Adresse liefert."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = subprocess.run(netns_lab.ns(["curl", "-s", "--max-time", "1", ip_url]),
+                                capture_output=True, text=True)
+        if result.stdout.strip() == expected:
+            return True
+        time.sleep(0.2)
+    return False
+
+
+def lab(faults, killswitch, output_dir, rate, timeout, before, hold, after):
+    """Baut das Labor mit Fake-VPN auf und führt die Matrix darin aus."""
+    netns_lab.setup()
+    netns_lab.tunnel_down()
+    if killswitch:
+        run(netns_lab.ns(["ip", "route", "add", "blackhole", "default", "metric", "500"]), check=True)
+    server = subprocess.Popen(netns_lab.ns([sys.executable, SCRIPT, "lab-server"], netns_lab.SERVER_NS),
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        time.sleep(0.5)
+        start_lab_daemon()
+        if not wait_for_exit_ip(LAB_ECHO_URL, netns_lab.TUN_ADDR):
+            print("Fehler: Das Fake-VPN im Labor antwortet nicht.")
+            return 1
+        name = "lab-killswitch" if killswitch else "lab"
+        command = [sys.executable, SCRIPT, "run", "--provider", "lab", "--label", name,
+                   "--home-ip", netns_lab.PHYS_ADDR, "--ip-url", LAB_ECHO_URL,
+                   "--interface", netns_lab.TUN_IF, "--endpoint", netns_lab.HOST_ADDR,
+                   "--uplink", netns_lab.PHYS_IF, "--gateway", netns_lab.HOST_ADDR,
+                   "--output-dir", output_dir, "--rate", str(rate), "--timeout", str(timeout),
+                   "--before", str(before), "--hold", str(hold), "--after", str(after), "--faults"] + faults
+        return subprocess.run(netns_lab.ns(command)).returncode
+    finally:
+        if os.path.exists(LAB_PID_FILE):
+            with open(LAB_PID_FILE) as f:
+                run(["kill", f.read().strip()])
+            os.unlink(LAB_PID_FILE)
+        server.kill()
+        netns_lab.destroy()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fehlerszenarien für Killswitch-Tests.")
+    parser.add_argument("command", choices=["run", "lab", "lab-daemon", "lab-server"])
+    parser.add_argument("--provider", choices=sorted(PROVIDER_DAEMONS) + ["lab"])
+    parser.add_argument("--label", help="Name des Anbieters in Matrix und Dateinamen")
+    parser.add_argument("--server", help="Testserver (wie für die Anbieter-CLI)")
+    parser.add_argument("--home-ip", help="Eigene IP ohne VPN (Leak-Erkennung)")
+    parser.add_argument("--interface", help="Tunnel-Interface (Standard je Anbieter)")
+    parser.add_argument("--endpoint", help="IP des VPN-Servers für endpoint-blackhole")
+    parser.add_argument("--uplink", help="Physisches Interface für uplink-flap")
+    parser.add_argument("--gateway", help="Mit --uplink: Default-Gateway, das danach wieder eingetragen wird")
+    parser.add_argument("--faults", nargs="+", choices=FAULTS, default=FAULTS)
+    parser.add_argument("--killswitch", action="store_true", help="lab: Killswitch per blackhole-Route")
+    parser.add_argument("--ip-url", default=killswitch_monitor.DEFAULT_IP_URL)
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="Abfragen pro Sekunde")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="Timeout pro Abfrage (s)")
+    parser.add_argument("--before", type=float, default=DEFAULT_BEFORE, help="Mitschnitt vor dem Fehler (s)")
+    parser.add_argument("--hold", type=float, default=DEFAULT_HOLD, help="Dauer des Fehlers (s)")
+    parser.add_argument("--after", type=float, default=DEFAULT_AFTER, help="Mitschnitt nach der Behebung (s)")
+    parser.add_argument("--output-dir", default="fault_matrix", help="Verzeichnis für Zeitleisten und Matrix")
+    args = parser.parse_args()
+
+    if os.geteuid() != 0:
+        print("Fehler: Die Fehlerszenarien benötigen root-Rechte.")
+        sys.exit(1)
+    if args.command == "lab-daemon":
+        lab_daemon()
+    elif args.command == "lab-server":
+        lab_server()
+    elif args.command == "lab":
+        sys.exit(lab(args.faults, args.killswitch, args.output_dir, args.rate, args.timeout,
+                     args.before, args.hold, args.after))
+    else:
+        if not args.provider or (args.provider != "lab" and not (args.server and args.home_ip)):
+            parser.error("run benötigt --provider, --server und --home-ip")
+        target = new_target(args.provider, args.server, args.interface, args.endpoint, args.uplink,
+                            args.gateway, args.home_ip)
+        target["label"] = args.label or args.provider
+        if args.provider == "lab":
+            target["daemon"] = "lab"
+        else:
+            reconnect(target)
+            time.sleep(providers.SETTLE_SECONDS[args.provider])
+        rows = run_matrix(target, args.faults, args.output_dir,
+                          args.ip_url, args.rate, args.timeout, args.before, args.hold, args.after)
+        print("\n" + RESULTS_HEADER.strip())
+        for provider, fault, result in rows:
+            print(f"{provider}\t{fault}\t{format_ms(result['time_to_block'])}\t{format_ms(result['leak'])}\t"
+                  f"{format_ms(result['recovery'])}\t{result['samples']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Exit-IP-Pools je Location durch schnelle, wiederholte Verbindungen.
+
+Bei ExpressVPN liefert dieselbe Location bei jedem Lauf eine andere externe IP
+(UK - Tottenham: 185.92.25.101, dann 31.171.130.34, dann 31.171.130.149). Eine
+Prüfung je Location sagt daher wenig darüber, wie viele ihrer IPs gesperrt sind.
+Hier wird jede Location rounds-mal neu verbunden, die externen IPs werden gesammelt
+und jede neue IP wird genau einmal geprüft. Die Ergebnisse stehen je IP in einer
+Cache-Datei und werden auch in späteren Läufen (bis max_age) wiederverwendet.
+
+Schneller Verbindungsweg: Statt der festen Wartezeit nach dem Verbinden (8 s bei
+ExpressVPN) wird die externe IP sofort in kurzen Abständen abgefragt (siehe
+exit_ip.py); sobald eine Antwort kommt, geht es weiter. Eine Location gilt als
+ausgeschöpft, wenn saturation Verbindungen hintereinander keine neue IP bringen.
+
+Je Location werden Verbindungen, gesehene IPs, geschätzte Poolgröße (Chao1 aus den
+einmal bzw. zweimal gesehenen IPs) und der Anteil gesperrter IPs ausgegeben.
+
+Beispiele:
+  ./ip_pool.py --provider expressvpn --service bbciplayer --rounds 30
+  ./ip_pool.py --provider expressvpn --service peacock --location "USA - New Jersey - 1" --rounds 50
+"""
+import argparse
+import collections
+import os
+import time
+
+import exit_ip
+import probes
+import providers
+import rate_limit
+
+CACHE_HEADER = "IP\tDienst\tErgebnis\tZeit\n"
+DEFAULT_CACHE = "ip_pool_cache.txt"
+DEFAULT_ROUNDS = 20
+DEFAULT_SATURATION = 8
+DEFAULT_MAX_AGE = 24 * 3600
+IP_POLL_INTERVAL = 0.3
+IP_POLL_TIMEOUT = 1.5
+REPORT_HEADER = "Location\tVerbindungen\tIPs\tGeschätzte Poolgröße\tGeprüft\tBlocked\tAnteil Blocked\n"
+
+
+def load_cache(filename, max_age):
+    """Ergebnisse je (IP, Dienst) jünger als max_age Sekunden."""
+    cache = {}
+    if not filename or not os.path.exists(filename):
+        return cache
+    now = time.time()
+    with open(filename, "r") as f:
+        for line in f.readlines()[1:]:
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) < 4 or now - float(parts[3]) > max_age:
+                continue
+            cache[(parts[0], parts[1])] = {"result": parts[2], "time": float(parts[3])}
+    return cache
+
+
+def save_cache(filename, cache):
+    with open(filename, "w") as f:
+        f.write(CACHE_HEADER)
+        for (ip, service), entry in sorted(cache.items()):
+            f.write(f"{ip}\t{service}\t{entry['result']}\t{entry['time']:.0f}\n")
+
+
+def wait_for_exit_ip(max_wait, endpoints=exit_ip.DEFAULT_ENDPOINTS):
+    """Fragt die externe IP ab, bis eine Antwort kommt (höchstens max_wait Sekunden)."""
+    deadline = time.monotonic() + max_wait
+    while True:
+        ip, _ = exit_ip.lookup_exit_ip(endpoints, timeout=IP_POLL_TIMEOUT)
+        if ip or time.monotonic() >= deadline:
+            return ip
+        time.sleep(IP_POLL_INTERVAL)
+
+
+def estimate_pool(counts):
+    """Chao1-Schätzung der Poolgröße aus den Häufigkeiten je IP."""
+    observed = len(counts)
+    singletons = sum(1 for n in counts.values() if n == 1)
+    doubletons = sum(1 for n in counts.values() if n == 2)
+    if doubletons:
+        return observed + singletons * singletons / (2 * doubletons)
+    return observed + singletons * (singletons - 1) / 2
+
+
+def map_location(session, server, service, rounds, saturation, cache, max_wait, throttle=None):
+    """
+    Verbindet bis zu rounds-mal mit server, prüft jede neue IP (sofern nicht im Cache)
+    und liefert die Zusammenfassung der Location.
+    """
+    limiter, account = (throttle["limiter"], throttle["account"]) if throttle else (None, None)
+    check = probes.SERVICES[service]["check"]
+    counts = collections.Counter()
+    connections, since_new = 0, 0
+    for round_number in range(rounds):
+        if since_new >= saturation:
+            break
+        rate_limit.acquire(limiter, account)
+        status = providers.connect_server(session, server)
+        rate_limit.report(limiter, account, "failed" if status == "failed" else "ok")
+        if status != "connected":
+            providers.disconnect_server(session)
+            continue
+        connections += 1
+        ip = wait_for_exit_ip(max_wait)
+        if ip:
+            since_new = since_new + 1 if ip in counts else 0
+            counts[ip] += 1
+            if (ip, service) not in cache:
+                result = check()
+                result = result[0] if isinstance(result, tuple) else result
+                if not probes.is_inconclusive(result):
+                    cache[(ip, service)] = {"result": result, "time": time.time()}
+                print(f"{server['name']}\t{round_number + 1}\t{ip}\t{result}")
+            else:
+                print(f"{server['name']}\t{round_number + 1}\t{ip}\t{cache[(ip, service)]['result']} (Cache)")
+        providers.disconnect_server(session)
+    results = [cache[(ip, service)]["result"] for ip in counts if (ip, service) in cache]
+    blocked = sum(1 for result in results if result == "Blocked")
+    return {
+        "location": server["target"],
+        "connections": connections,
+        "ips": len(counts),
+        "estimate": estimate_pool(counts),
+        "probed": len(results),
+        "blocked": blocked,
+        "fraction": blocked / len(results) if results else None,
+        "counts": counts,
+    }
+
+
+def write_report(filename, summaries):
+    with open(filename, "w") as f:
+        f.write(REPORT_HEADER)
+        for entry in summaries:
+            fraction = "-" if entry["fraction"] is None else f"{entry['fraction'] * 100:.0f} %"
+            f.write(f"{entry['location']}\t{entry['connections']}\t{entry['ips']}\t{entry['estimate']:.1f}\t"
+                    f"{entry['probed']}\t{entry['blocked']}\t{fraction}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exit-IP-Pools je Location ermitteln.")
+    parser.add_argument("--provider", default="expressvpn", choices=sorted(providers.SETTLE_SECONDS))
+    parser.add_argument("--service", required=True, choices=sorted(probes.SERVICES))
+    parser.add_argument("--country", help="Ländercode der Locations (Standard: Land des Dienstes)")
+    parser.add_argument("--location", action="append", help="Nur diese Location(s) (Ziel bzw. Name)")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS, help="Höchstzahl der Verbindungen je Location")
+    parser.add_argument("--saturation", type=int, default=DEFAULT_SATURATION,
+                        help="Abbruch nach so vielen Verbindungen ohne neue IP")
+    parser.add_argument("--max-wait", type=float, help="Höchste Wartezeit auf die externe IP nach dem Verbinden "
+                                                       "(Standard: Wartezeit des Anbieters)")
+    parser.add_argument("--cache", default=DEFAULT_CACHE, help="Cache-Datei der Ergebnisse je IP")
+    parser.add_argument("--max-age", type=float, default=DEFAULT_MAX_AGE, help="Gültigkeit der Cache-Einträge (s)")
+    parser.add_argument("--output", default="ip_pools.txt", help="Zusammenfassung je Location")
+    parser.add_argument("--throttle", action="store_true", help="Verbindungen je Konto begrenzen (siehe rate_limit.py)")
+    args = parser.parse_args()
+
+    country = args.country or probes.SERVICES[args.service]["country"]
+    session = providers.open_session(args.provider)
+    servers = providers.fetch_servers(session, country)
+    if args.location:
+        servers = [s for s in servers if s["target"] in args.location or s["name"] in args.location]
+    if not servers:
+        print("Fehler: Es konnten keine Locations gefunden werden.")
+        return
+    throttle = None
+    if args.throttle:
+        throttle = {"limiter": rate_limit.new_limiter(), "account": f"{args.provider}:default"}
+    max_wait = args.max_wait if args.max_wait is not None else session["settle"]
+    cache = load_cache(args.cache, args.max_age)
+    summaries = []
+    try:
+        for server in servers:
+            print(f"\nLocation {server['target']} ...")
+            summaries.append(map_location(session, server, args.service, args.rounds, args.saturation,
+                                          cache, max_wait, throttle))
+            save_cache(args.cache, cache)
+            write_report(args.output, summaries)
+    finally:
+        providers.close_session(session)
+    for entry in summaries:
+        fraction = "-" if entry["fraction"] is None else f"{entry['fraction'] * 100:.0f} %"
+        print(f"{entry['location']}: {entry['ips']} IPs (geschätzt {entry['estimate']:.0f}), Blocked {fraction}")
+    print(f"\nZusammenfassung in '{args.output}', Ergebnisse je IP in '{args.cache}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Auswertung der Killswitch-Zeitleisten (KillSwitchTests/<Anbieter>/*.txt).
+
+Jede Datei wird in NumPy-Arrays überführt (Zeit, Verbindung ja/nein, Land, IP) und
+vektorisiert ausgewertet:
+  - Ausfallfenster:  aufeinanderfolgende Samples ohne Verbindung
+  - Leak-Fenster:    Samples mit bekanntem Land, das keinem der beiden Endpunkte entspricht
+  - Reconnect-Zeit:  letztes Sample im Startland bis zum ersten Sample im Zielland
+  - Abtastlücken:    Median, 95. Perzentil und Maximum der Abstände zwischen Samples
+
+Die Endpunkte werden aus dem Dateinamen gelesen ("USA-UK(Leak).txt",
+"Windows-Deutschland-Slowakei.txt"); unbekannte Teile wie "Windows" oder "OpenVPN"
+werden ignoriert. Fehlen sie, gelten das erste und das letzte beobachtete Land.
+
+Beispiel:
+  ./killswitch_analyzer.py KillSwitchTests --output KillSwitch_Vergleich.txt
+"""
+import argparse
+import os
+import re
+import time
+
+import numpy as np
+
+NO_CONNECTION = "No connection detected"
+DATA_LINE = re.compile(r"^[\d:]+\t\d{1,2}:\d{2}:\d{2}")
+
+# Namen bzw. Kürzel im Dateinamen -> Ländername wie in den Logs
+COUNTRY_ALIASES = {
+    "usa": "United States", "us": "United States",
+    "uk": "United Kingdom", "gb": "United Kingdom",
+    "deutschland": "Germany", "de": "Germany",
+    "schweden": "Sweden", "se": "Sweden",
+    "nl": "Netherlands", "niederlande": "Netherlands",
+    "ch": "Switzerland", "schweiz": "Switzerland",
+    "italien": "Italy", "it": "Italy",
+    "dänemark": "Denmark", "dk": "Denmark",
+    "spanien": "Spain", "es": "Spain",
+    "slowenien": "Slovenia", "si": "Slovenia",
+    "slowakei": "Slovakia", "sk": "Slovakia",
+    "österreich": "Austria", "at": "Austria",
+    "frankreich": "France", "fr": "France",
+}
+
+TABLE_COLUMNS = [
+    ("Anbieter", "{}"), ("Datei", "{}"), ("Samples", "{}"), ("Dauer (s)", "{:.1f}"),
+    ("Ausfälle", "{}"), ("Ausfall max (s)", "{:.2f}"), ("Ausfall ges. (s)", "{:.2f}"),
+    ("Leaks", "{}"), ("Leak max (s)", "{:.2f}"), ("Leak ges. (s)", "{:.2f}"),
+    ("Reconnect (s)", "{:.2f}"), ("Lücke Median (ms)", "{:.0f}"),
+    ("Lücke p95 (ms)", "{:.0f}"), ("Lücke max (ms)", "{:.0f}"),
+]
+
+
+def endpoints_from_filename(filename):
+    """Liest die Endpunkt-Länder aus dem Dateinamen."""
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    stem = re.sub(r"\(.*?\)", "", stem)
+    countries = []
+    for token in re.split(r"[-_ ]+", stem):
+        country = COUNTRY_ALIASES.get(token.lower())
+        if country and country not in countries:
+            countries.append(country)
+    return countries
+
+
+def parse_sequence(field):
+    """Laufende Nummer; Varianten wie "32:324" werden über die letzte Zahl gelesen."""
+    numbers = re.findall(r"\d+", field)
+    return int(numbers[-1]) if numbers else -1
+
+
+def parse_seconds(timestamp):
+    """HH:MM:SS.fff (beliebig viele Nachkommastellen) -> Sekunden seit Mitternacht."""
+    hours, minutes, seconds = timestamp.split(":")
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def load_timeline(filename):
+    """
+    Liest eine Zeitleiste ein und liefert ein Dict mit NumPy-Arrays in zeitlicher
+    Reihenfolge, oder None, wenn die Datei keine Zeitleiste ist.
+    Die Kopfzeile ist optional (z. B. fehlt sie in ProtonVPN/Spanien-Slowenien.txt).
+    """
+    with open(filename, encoding="utf-8", errors="replace") as f:
+        lines = f.read().splitlines()
+    if lines and lines[0].startswith("#\tTimestamp"):
+        lines = lines[1:]
+    if not lines or not DATA_LINE.match(lines[0]):
+        return None
+    sequence, seconds, ips, countries = [], [], [], []
+    for line in lines:
+        parts = line.split("\t")
+        if len(parts) < 4:
+            continue
+        try:
+            seconds.append(parse_seconds(parts[1].strip()))
+        except ValueError:
+            continue
+        sequence.append(parse_sequence(parts[0]))
+        ips.append(parts[2].strip())
+        # "The Netherlands" -> "Netherlands", damit der Abgleich mit dem Dateinamen passt
+        countries.append(re.sub(r"^The ", "", parts[3].strip()))
+    if not seconds:
+        return None
+
+    sequence = np.asarray(sequence)
+    # Die Logs sind absteigend sortiert (neueste Zeile zuerst)
+    order = np.argsort(sequence, kind="stable") if (sequence >= 0).all() else np.arange(len(sequence))[::-1]
+    t = np.asarray(seconds)[order]
+    # Mitternachtsüberlauf ausgleichen
+    t = t + 86400.0 * np.concatenate(([0], np.cumsum(np.diff(t) < -43200)))
+    ip_names, ip_codes = np.unique(np.asarray(ips)[order], return_inverse=True)
+    country_names, country_codes = np.unique(np.asarray(countries)[order], return_inverse=True)
+    return {
+        "t": t,
+        "ip_names": ip_names,
+        "ip": ip_codes,
+        "connected": ip_names[ip_codes] != NO_CONNECTION,
+        "country_names": country_names,
+        "country": country_codes,
+    }
+
+
+def find_windows(mask):
+    """Start- (inklusiv) und End-Indizes (exklusiv) aller True-Läufe in mask."""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def window_durations(t, starts, ends):
+    """
+    Dauer je Fenster: vom letzten Sample davor bis zum ersten Sample danach
+    (am Dateirand: bis zum Rand). Entspricht der maximal möglichen Länge.
+    """
+    before = t[np.maximum(starts - 1, 0)]
+    after = t[np.minimum(ends, len(t) - 1)]
+    return after - before
+
+
+def analyze(timeline, endpoints):
+    """Berechnet Ausfall-, Leak-, Reconnect- und Lückenstatistiken einer Zeitleiste."""
+    t = timeline["t"]
+    names = timeline["country_names"]
+    country = timeline["country"]
+    known = timeline["connected"] & (names[country] != "-")
+
+    known_idx = np.flatnonzero(known)
+    if len(endpoints) < 2 and len(known_idx):
+        endpoints = list(endpoints) + [names[country[known_idx[0]]], names[country[known_idx[-1]]]]
+    endpoint_mask = np.isin(names, endpoints)
+
+    outage_starts, outage_ends = find_windows(~timeline["connected"])
+    outages = window_durations(t, outage_starts, outage_ends)
+    leak_mask = known & ~endpoint_mask[country]
+    leak_starts, leak_ends = find_windows(leak_mask)
+    leaks = window_durations(t, leak_starts, leak_ends)
+
+    reconnect = np.nan
+    if len(known_idx):
+        source = country[known_idx[0]]
+        target = country[known_idx[-1]]
+        if source != target:
+            first_target = np.flatnonzero(known & (country == target))[0]
+            last_source = np.flatnonzero(known[:first_target] & (country[:first_target] == source))
+            if len(last_source):
+                reconnect = t[first_target] - t[last_source[-1]]
+
+    gaps = np.diff(t) * 1000 if len(t) > 1 else np.zeros(1)
+    return {
+        "samples": len(t),
+        "duration": t[-1] - t[0],
+        "outages": len(outages),
+        "outage_max": outages.max(initial=0.0),
+        "outage_total": outages.sum(),
+        "leaks": len(leaks),
+        "leak_max": leaks.max(initial=0.0),
+        "leak_total": leaks.sum(),
+        "leak_countries": sorted(set(names[country[leak_mask]])),
+        "reconnect": reconnect,
+        "gap_median": np.median(gaps),
+        "gap_p95": np.percentile(gaps, 95),
+        "gap_max": gaps.max(),
+    }
+
+
+def collect_files(paths):
+    """Sammelt alle .txt-Dateien aus den angegebenen Dateien/Verzeichnissen."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files += [os.path.join(root, n) for n in sorted(names) if n.endswith(".txt")]
+        else:
+            files.append(path)
+    return sorted(files)
+
+
+def result_row(provider, name, stats):
+    """Eine Tabellenzeile in der Reihenfolge von TABLE_COLUMNS."""
+    return [
+        provider, name, stats["samples"], stats["duration"],
+        stats["outages"], stats["outage_max"], stats["outage_total"],
+        stats["leaks"], stats["leak_max"], stats["leak_total"],
+        stats["reconnect"], stats["gap_median"], stats["gap_p95"], stats["gap_max"],
+    ]
+
+
+def provider_rows(rows):
+    """Fasst die Dateizeilen je Anbieter zusammen (Summen bzw. Mediane)."""
+    by_provider = {}
+    for row in rows:
+        by_provider.setdefault(row[0], []).append(row)
+    summary = []
+    for provider, group in sorted(by_provider.items()):
+        values = np.array([row[2:] for row in group], dtype=float)
+        summary.append([
+            provider, f"{len(group)} Dateien",
+            int(values[:, 0].sum()), values[:, 1].sum(),
+            int(values[:, 2].sum()), values[:, 3].max(), values[:, 4].sum(),
+            int(values[:, 5].sum()), values[:, 6].max(), values[:, 7].sum(),
+            np.nanmedian(values[:, 8]) if not np.isnan(values[:, 8]).all() else np.nan,
+            np.median(values[:, 9]), np.median(values[:, 10]), values[:, 11].max(),
+        ])
+    return summary
+
+
+def format_row(row):
+    """Formatiert eine Zeile gemäß TABLE_COLUMNS (NaN als "-")."""
+    cells = []
+    for value, (_, fmt) in zip(row, TABLE_COLUMNS):
+        if isinstance(value, float) and np.isnan(value):
+            cells.append("-")
+        else:
+            cells.append(fmt.format(value))
+    return cells
+
+
+def print_table(rows):
+    """Gibt eine ausgerichtete Tabelle aus."""
+    header = [name for name, _ in TABLE_COLUMNS]
+    cells = [format_row(row) for row in rows]
+    widths = [max(len(str(c)) for c in column) for column in zip(header, *cells)]
+    for line in [header] + cells:
+        print("  ".join(str(c).ljust(w) for c, w in zip(line, widths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vektorisierte Auswertung der Killswitch-Zeitleisten.")
+    parser.add_argument("paths", nargs="*", default=["KillSwitchTests"], help="Dateien oder Verzeichnisse")
+    parser.add_argument("--output", help="Vergleichstabelle zusätzlich als TSV speichern")
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    rows = []
+    leak_notes = []
+    for filename in collect_files(args.paths):
+        timeline = load_timeline(filename)
+        if timeline is None:
+            continue
+        provider = os.path.basename(os.path.dirname(filename)) or "-"
+        name = os.path.basename(filename)
+        stats = analyze(timeline, endpoints_from_filename(filename))
+        rows.append(result_row(provider, name, stats))
+        if stats["leaks"]:
+            leak_notes.append(f"{provider}/{name}: {', '.join(stats['leak_countries'])}")
+    if not rows:
+        print("Keine Zeitleisten gefunden.")
+        return
+
+    summary = provider_rows(rows)
+    print_table(rows)
+    print()
+    print_table(summary)
+    if leak_notes:
+        print("\nLeak-Länder:")
+        for note in leak_notes:
+            print(f"  {note}")
+    print(f"\n{len(rows)} Dateien in {time.monotonic() - started:.2f} s ausgewertet.")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write("\t".join(name for name, _ in TABLE_COLUMNS) + "\n")
+            for row in rows + summary:
+                f.write("\t".join(format_row(row)) + "\n")
+        print(f"Vergleichstabelle wurde in '{args.output}' gespeichert.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Automatisierter Killswitch-Test.
+
+Ersetzt die manuell mitgeschnittenen Logs unter KillSwitchTests/<Anbieter>/:
+Die externe IP wird mit einer festen, einstellbaren Rate (z. B. 10-20 Abfragen/s)
+über parallele, asynchrone curl-Aufrufe abgefragt, während über die Anbieter-CLI
+zwischen zwei Servern gewechselt wird. Geschrieben wird dieselbe Zeitleiste wie in
+den manuellen Logs ("#  Timestamp  IP Address  Country  IP Changed?") sowie eine
+Auswertung mit den erkannten Leak-Fenstern.
+
+Der Takt des Samplers ist unabhängig von der Antwortzeit: Zu jedem Tick wird eine
+neue Abfrage gestartet, ohne auf die vorherige zu warten. Nur wenn bereits
+max_inflight Abfragen offen sind, wird ein Tick verworfen (und gezählt).
+
+Beispiel:
+  ./killswitch_monitor.py --provider nordvpn --from us --to uk --rate 15
+"""
+import argparse
+import asyncio
+import collections
+import datetime
+import math
+import time
+
+import exit_ip
+import providers
+
+NO_CONNECTION = "No connection detected"
+TIMELINE_HEADER = "#\tTimestamp\tIP Address\tCountry\tIP Changed?\n"
+
+DEFAULT_IP_URL = "ip.me"
+DEFAULT_GEO_URL = "http://ip-api.com/line/{ip}?fields=country"
+
+# Länder je IP werden nur einmal nachgeschlagen (Wert: Future mit dem Ländernamen)
+_country_cache = {}
+
+
+async def run_curl(url, timeout):
+    """Führt curl asynchron aus und liefert die (bereinigte) Ausgabe oder ""."""
+    proc = await asyncio.create_subprocess_exec(
+        "curl", "-s", "--max-time", str(timeout), url,
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL
+    )
+    stdout, _ = await proc.communicate()
+    return stdout.decode(errors="replace").strip()
+
+
+async def fetch_exit_ip(url, timeout):
+    """Fragt die externe IP ab. Liefert None, wenn keine Verbindung bestand."""
+    output = await run_curl(url, timeout)
+    return output if exit_ip.is_ip_address(output) else None
+
+
+async def lookup_country(ip, geo_url, timeout):
+    """
+    Ermittelt das Land zu einer IP über geo_url (Platzhalter {ip}).
+    Gleichzeitige Anfragen für dieselbe IP teilen sich einen Aufruf.
+    """
+    future = _country_cache.get(ip)
+    if future is None:
+        future = asyncio.ensure_future(run_curl(geo_url.format(ip=ip), timeout))
+        _country_cache[ip] = future
+    country = await future
+    return country or None
+
+
+async def take_sample(sample, ip_url, geo_url, timeout, geo_db=None):
+    """
+    Füllt einen vorbereiteten Sample-Eintrag mit IP, Land und Antwortzeit.
+    Mit geo_db wird das Land offline nachgeschlagen (siehe exit_ip.geolocate(); die
+    Datenbank muss vorab geladen sein, siehe main()).
+    """
+    started = time.monotonic()
+    ip = await fetch_exit_ip(ip_url, timeout)
+    sample["latency"] = time.monotonic() - started
+    sample["ip"] = ip
+    if ip is not None and geo_db:
+        sample["country"] = exit_ip.geolocate(ip, geo_db)["country_name"]
+    elif ip is not None and geo_url:
+        sample["country"] = await lookup_country(ip, geo_url, timeout)
+
+
+async def run_sampler(samples, stats, stop_event, ip_url, geo_url, rate, timeout, max_inflight, geo_db=None):
+    """
+    Startet im festen Takt (rate Abfragen/s) neue Abfragen, bis stop_event gesetzt ist.
+    Fällt die Schleife hinter den Takt zurück (z. B. weil der Rechner ausgelastet war),
+    werden verpasste Ticks übersprungen und in stats["missed"] gezählt.
+    """
+    loop = asyncio.get_running_loop()
+    interval = 1.0 / rate
+    start = loop.time()
+    tick = 0
+    pending = set()
+    while not stop_event.is_set():
+        delay = start + tick * interval - loop.time()
+        if delay > 0:
+            try:
+                await asyncio.wait_for(stop_event.wait(), delay)
+                break
+            except asyncio.TimeoutError:
+                pass
+        lag = loop.time() - (start + tick * interval)
+        stats["max_lag"] = max(stats["max_lag"], lag)
+        if lag > interval:
+            skipped = int(lag / interval)
+            stats["missed"] += skipped
+            tick += skipped
+        tick += 1
+        if len(pending) >= max_inflight:
+            stats["dropped"] += 1
+            continue
+        sample = {
+            "seq": len(samples) + 1,
+            "wall": time.time(),
+            "mono": time.monotonic(),
+            "ip": None,
+            "country": None,
+            "latency": None,
+        }
+        samples.append(sample)
+        task = asyncio.ensure_future(take_sample(sample, ip_url, geo_url, timeout, geo_db))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+    if pending:
+        await asyncio.gather(*pending)
+
+
+async def run_command(command):
+    """Führt einen CLI-Befehl asynchron aus, ohne den Sampler zu blockieren."""
+    proc = await asyncio.create_subprocess_exec(
+        *command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT
+    )
+    stdout, _ = await proc.communicate()
+    return stdout.decode(errors="replace").strip()
+
+
+async def switch_server(provider, target):
+    """Wechselt über die Anbieter-CLI auf target (ggf. mit vorherigem Trennen)."""
+    if provider in providers.SWITCH_NEEDS_DISCONNECT:
+        await run_command(providers.disconnect_command(provider))
+    output = await run_command(providers.connect_command(provider, target))
+    return providers.parse_connect_output(output)
+
+
+async def run_test(args, targets):
+    """Sampler starten, Serverwechsel auslösen und Samples sowie Ereignisse liefern."""
+    samples = []
+    events = []
+    stats = {"missed": 0, "dropped": 0, "max_lag": 0.0}
+    stop_event = asyncio.Event()
+    max_inflight = args.max_inflight or math.ceil(args.timeout * args.rate) + 1
+    sampler = asyncio.ensure_future(run_sampler(
+        samples, stats, stop_event, args.ip_url, args.geo_url,
+        args.rate, args.timeout, max_inflight, args.geo_db
+    ))
+
+    await asyncio.sleep(args.before)
+    for target in targets:
+        if args.provider is None:
+            break
+        print(f"Wechsle auf {target} ...")
+        events.append((time.time(), f"Wechsel auf {target} gestartet"))
+        status = await switch_server(args.provider, target)
+        events.append((time.time(), f"Wechsel auf {target} beendet ({status})"))
+        print(f"Wechsel auf {target}: {status}")
+        await asyncio.sleep(args.after)
+    if args.provider is None:
+        # Nur Mitschnitt, Serverwechsel erfolgen manuell
+        await asyncio.sleep(args.after)
+
+    stop_event.set()
+    await sampler
+    return samples, events, stats
+
+
+def format_timestamp(wall):
+    """Formatiert einen Unix-Zeitstempel wie in den manuellen Logs (HH:MM:SS.mmm)."""
+    return datetime.datetime.fromtimestamp(wall).strftime("%H:%M:%S.%f")[:-3]
+
+
+def mark_ip_changes(samples):
+    """Setzt für jedes Sample "changed", wenn sich die IP gegenüber dem letzten Treffer ändert."""
+    last_ip = None
+    for sample in samples:
+        sample["changed"] = False
+        if sample["ip"] is None:
+            continue
+        if last_ip is not None and sample["ip"] != last_ip:
+            sample["changed"] = True
+        last_ip = sample["ip"]
+
+
+def majority_country(samples):
+    """Liefert das häufigste bekannte Land in samples (oder None)."""
+    counts = collections.Counter(s["country"] for s in samples if s["country"])
+    return counts.most_common(1)[0][0] if counts else None
+
+
+def expected_countries(samples, events, extra):
+    """
+    Bestimmt die erlaubten Länder: Land vor dem ersten Wechsel, Land nach dem letzten
+    Wechsel sowie explizit angegebene Länder.
+    """
+    allowed = set(extra)
+    if events:
+        first_switch = events[0][0]
+        last_switch = events[-1][0]
+        before = majority_country([s for s in samples if s["wall"] < first_switch])
+        after = majority_country([s for s in samples if s["wall"] > last_switch])
+        allowed.update(c for c in (before, after) if c)
+    elif not allowed:
+        country = majority_country(samples)
+        if country:
+            allowed.add(country)
+    return allowed
+
+
+def is_leak(sample, allowed, home_ip):
+    """Ein Sample ist ein Leak, wenn die eigene IP oder ein fremdes Land sichtbar ist."""
+    if sample["ip"] is None:
+        return False
+    if home_ip and sample["ip"] == home_ip:
+        return True
+    return bool(sample["country"]) and sample["country"] not in allowed
+
+
+def compute_leak_windows(samples, allowed, home_ip):
+    """
+    Fasst aufeinanderfolgende Leak-Samples zu Fenstern zusammen.
+    Die Dauer reicht bis zum nächsten sauberen Sample und ist damit eine obere Schranke.
+    """
+    windows = []
+    current = None
+    for sample in samples:
+        if is_leak(sample, allowed, home_ip):
+            if current is None:
+                current = {"start": sample["wall"], "samples": [], "end": None}
+            current["samples"].append(sample)
+            continue
+        if current is not None:
+            current["end"] = sample["wall"]
+            windows.append(current)
+            current = None
+    if current is not None:
+        current["end"] = current["samples"][-1]["wall"]
+        windows.append(current)
+    return windows
+
+
+def write_timeline(samples, filename):
+    """Schreibt die Zeitleiste im Format der manuellen Logs (neueste Zeile zuerst)."""
+    with open(filename, "w") as f:
+        f.write(TIMELINE_HEADER)
+        for sample in reversed(samples):
+            ip = sample["ip"] or NO_CONNECTION
+            country = sample["country"] or "-"
+            changed = "Yes" if sample["changed"] else "No"
+            f.write(f"{sample['seq']}\t{format_timestamp(sample['wall'])}\t{ip}\t{country}\t{changed}\n")
+
+
+def write_report(samples, events, stats, windows, allowed, home_ip, args, filename):
+    """Schreibt die Auswertung (Sampler-Statistik, Ereignisse, Leak-Fenster)."""
+    duration = samples[-1]["wall"] - samples[0]["wall"] if len(samples) > 1 else 0.0
+    outages = sum(1 for s in samples if s["ip"] is None)
+    with open(filename, "w") as f:
+        f.write(f"Anbieter\t{args.provider or 'manuell'}\n")
+        f.write(f"Eigene IP\t{home_ip or '-'}\n")
+        f.write(f"Erlaubte Länder\t{', '.join(sorted(allowed)) or '-'}\n")
+        f.write(f"Samples\t{len(samples)}\n")
+        f.write(f"Soll-Rate\t{args.rate:.1f}/s\n")
+        f.write(f"Ist-Rate\t{(len(samples) - 1) / duration if duration else 0.0:.1f}/s\n")
+        f.write(f"Verpasste Ticks\t{stats['missed']}\n")
+        f.write(f"Verworfene Ticks\t{stats['dropped']}\n")
+        f.write(f"Max. Verzögerung\t{stats['max_lag'] * 1000:.0f} ms\n")
+        f.write(f"Ohne Verbindung\t{outages}\n")
+        f.write("\nZeit\tEreignis\n")
+        for wall, text in events:
+            f.write(f"{format_timestamp(wall)}\t{text}\n")
+        f.write("\nStart\tEnde\tDauer (ms)\tSamples\tIP Address\tCountry\n")
+        for window in windows:
+            first = window["samples"][0]
+            f.write(
+                f"{format_timestamp(window['start'])}\t{format_timestamp(window['end'])}\t"
+                f"{(window['end'] - window['start']) * 1000:.0f}\t{len(window['samples'])}\t"
+                f"{first['ip']}\t{first['country'] or '-'}\n"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Automatisierter Killswitch-Test mit hochfrequenter IP-Abfrage.")
+    parser.add_argument("--provider", choices=sorted(providers.SETTLE_SECONDS),
+                        help="Anbieter-CLI für die Serverwechsel (ohne Angabe: nur Mitschnitt)")
+    parser.add_argument("--from", dest="source", help="Startserver bzw. -land")
+    parser.add_argument("--to", dest="target", help="Zielserver bzw. -land")
+    parser.add_argument("--switches", type=int, default=1,
+                        help="Anzahl der Wechsel (abwechselnd zwischen --to und --from)")
+    parser.add_argument("--rate", type=float, default=10.0, help="Abfragen pro Sekunde")
+    parser.add_argument("--timeout", type=float, default=2.0, help="Timeout pro Abfrage (s)")
+    parser.add_argument("--max-inflight", type=int, default=0,
+                        help="Maximal gleichzeitig offene Abfragen (Standard: timeout * rate + 1)")
+    parser.add_argument("--before", type=float, default=10.0, help="Mitschnitt vor dem Wechsel (s)")
+    parser.add_argument("--after", type=float, default=30.0, help="Mitschnitt nach jedem Wechsel (s)")
+    parser.add_argument("--ip-url", default=DEFAULT_IP_URL, help="Endpunkt, der die externe IP liefert")
+    parser.add_argument("--geo-url", default=DEFAULT_GEO_URL, help="Geolokalisierung, Platzhalter {ip}")
+    parser.add_argument("--geo-db", help="Länder-Datenbank (.mmdb/.csv) statt --geo-url, siehe exit_ip.py")
+    parser.add_argument("--country", action="append", default=[], help="Zusätzlich erlaubtes Land")
+    parser.add_argument("--output", help="Dateiname der Zeitleiste")
+    args = parser.parse_args()
+
+    if args.provider and not (args.source and args.target):
+        parser.error("--provider erfordert --from und --to")
+
+    if args.geo_db:
+        # Vorab laden: Das erste Nachschlagen würde sonst die ganze Datenbank im Sampler
+        # laden und dessen Takt (und damit die Zeitleiste) für diese Zeit anhalten
+        exit_ip.load_database(args.geo_db)
+
+    print("Ermittle die eigene IP ohne VPN ...")
+    home_ip = asyncio.run(fetch_exit_ip(args.ip_url, args.timeout)) if args.provider else None
+    print(f"Eigene IP: {home_ip or '-'}")
+
+    targets = []
+    if args.provider:
+        status = providers.connect_vpn(args.provider, args.source)
+        if status != "connected":
+            print(f"Fehler: Verbindung zu {args.source} fehlgeschlagen ({status}).")
+            return
+        time.sleep(providers.SETTLE_SECONDS[args.provider])
+        targets = [args.target if i % 2 == 0 else args.source for i in range(args.switches)]
+
+    samples, events, stats = asyncio.run(run_test(args, targets))
+    if not samples:
+        print("Fehler: Es wurden keine Samples aufgezeichnet.")
+        return
+
+    mark_ip_changes(samples)
+    allowed = expected_countries(samples, events, args.country)
+    windows = compute_leak_windows(samples, allowed, home_ip)
+
+    output_file = args.output
+    if not output_file:
+        name = f"{args.source}-{args.target}" if args.provider else datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        output_file = f"{name}(Leak).txt" if windows else f"{name}.txt"
+    report_file = output_file.rsplit(".", 1)[0] + "_Auswertung.txt"
+    write_timeline(samples, output_file)
+    write_report(samples, events, stats, windows, allowed, home_ip, args, report_file)
+
+    for window in windows:
+        first = window["samples"][0]
+        print(f"Leak: {format_timestamp(window['start'])} - {format_timestamp(window['end'])} "
+              f"{first['ip']} ({first['country'] or '-'})")
+    print(f"\nTest abgeschlossen. {len(samples)} Samples, {len(windows)} Leak-Fenster.")
+    print(f"Zeitleiste: '{output_file}', Auswertung: '{report_file}'")
+
+    if args.provider:
+        providers.disconnect_vpn(args.provider)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Latenz-Vorprüfung aller Server vor dem eigentlichen Sweep.
+
+Bisher wird die Serverliste in API-Reihenfolge (NordVPN) bzw. alphabetisch nach
+Stadt (CyberGhost) abgearbeitet, und auch tote oder sehr langsame Server kosten
+einen vollen Verbindungszyklus. Hier wird vorab zu jedem Server, dessen Adresse
+bekannt ist (NordVPN-Station, ProtonVPN-/WireGuard-Endpunkt), gleichzeitig die
+Dauer des TCP-Handshakes gemessen - per asyncio für tausende Server auf einmal,
+begrenzt durch eine Semaphore.
+
+Klassifizierung je Adresse:
+  ok          Handshake erfolgreich
+  refused     Host antwortet, Port geschlossen (RST) - Host lebt, RTT ist gültig
+  timeout     keine Antwort innerhalb des Timeouts
+  unreachable Netz/Host nicht erreichbar (ICMP) oder Name nicht auflösbar
+
+Die Messungen werden in einer Cache-Datei gehalten und für max_age Sekunden
+wiederverwendet. rank_servers() liefert daraus die Sweep-Reihenfolge (schnellste
+zuerst) und die Server, die ohne "nordvpn connect" als nicht erreichbar gelten.
+
+Beispiel:
+  ./latency_scan.py --provider nordvpn --country us --max-rtt 250
+"""
+import argparse
+import asyncio
+import os
+import resource
+import socket
+import time
+
+import providers
+
+CACHE_HEADER = "Adresse\tStatus\tRTT (ms)\tZeit\n"
+DEFAULT_CACHE = "latency_cache.txt"
+DEFAULT_PORT = 443
+DEFAULT_CONCURRENCY = 500
+DEFAULT_TIMEOUT = 2.0
+DEFAULT_ATTEMPTS = 2
+DEFAULT_MAX_AGE = 6 * 3600
+REACHABLE = ("ok", "refused")
+
+
+def server_address(server, port=DEFAULT_PORT):
+    """
+    Adresse (host, port), unter der ein Server vorab geprüft werden kann, oder None.
+    ExpressVPN-Locations und CyberGhost-Instanzen haben keine bekannte Adresse.
+    """
+    if server.get("wireguard"):
+        return server["wireguard"]["endpoint"].rsplit(":", 1)[0], port
+    if server.get("endpoint"):
+        return server["endpoint"].rsplit(":", 1)[0], port
+    if server.get("station"):
+        return server["station"], port
+    if server.get("hostname"):
+        return server["hostname"], port
+    return None
+
+
+def raise_file_limit():
+    """Hebt das Limit offener Dateien auf das Maximum an (viele gleichzeitige Sockets)."""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    return hard
+
+
+async def measure_tcp(host, port, timeout):
+    """Misst einen TCP-Handshake. Liefert (Status, RTT in ms oder None)."""
+    started = time.monotonic()
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except asyncio.TimeoutError:
+        return "timeout", None
+    except ConnectionRefusedError:
+        return "refused", (time.monotonic() - started) * 1000
+    except (socket.gaierror, OSError):
+        return "unreachable", None
+    rtt = (time.monotonic() - started) * 1000
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return "ok", rtt
+
+
+async def measure_address(semaphore, address, timeout, attempts):
+    """Mehrere Versuche je Adresse; die kleinste RTT zählt, der beste Status gewinnt."""
+    best_status, best_rtt = "unreachable", None
+    async with semaphore:
+        for _ in range(attempts):
+            status, rtt = await measure_tcp(address[0], address[1], timeout)
+            if rtt is not None and (best_rtt is None or rtt < best_rtt):
+                best_status, best_rtt = status, rtt
+            elif best_rtt is None and status == "timeout":
+                best_status = status
+    return address, best_status, best_rtt
+
+
+def load_cache(filename, max_age):
+    """Liest die Cache-Datei; liefert nur Einträge jünger als max_age Sekunden."""
+    cache = {}
+    if not filename or not os.path.exists(filename):
+        return cache
+    now = time.time()
+    with open(filename, "r") as f:
+        for line in f.readlines()[1:]:
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) < 4 or now - float(parts[3]) > max_age:
+                continue
+            host, _, port = parts[0].rpartition(":")
+            rtt = float(parts[2]) if parts[2] else None
+            cache[(host, int(port))] = {"status": parts[1], "rtt": rtt, "time": float(parts[3])}
+    return cache
+
+
+def save_cache(filename, cache):
+    """Schreibt alle Messungen in die Cache-Datei."""
+    with open(filename, "w") as f:
+        f.write(CACHE_HEADER)
+        for (host, port), entry in sorted(cache.items()):
+            rtt = "" if entry["rtt"] is None else f"{entry['rtt']:.1f}"
+            f.write(f"{host}:{port}\t{entry['status']}\t{rtt}\t{entry['time']:.0f}\n")
+
+
+async def measure_all(addresses, concurrency, timeout, attempts):
+    """Misst alle Adressen gleichzeitig, höchstens concurrency auf einmal."""
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = [measure_address(semaphore, address, timeout, attempts) for address in addresses]
+    return await asyncio.gather(*tasks)
+
+
+def scan(servers, port=DEFAULT_PORT, concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT,
+         attempts=DEFAULT_ATTEMPTS, cache_file=DEFAULT_CACHE, max_age=DEFAULT_MAX_AGE):
+    """
+    Misst alle Server mit bekannter Adresse (Cache-Treffer werden übersprungen) und
+    liefert ein Dict Adresse -> {"status", "rtt", "time"}.
+    """
+    cache = load_cache(cache_file, max_age)
+    addresses = {server_address(s, port) for s in servers} - {None}
+    missing = sorted(a for a in addresses if a not in cache)
+    if missing:
+        limit = raise_file_limit()
+        concurrency = min(concurrency, max(limit - 64, 1))
+        print(f"Messe {len(missing)} Adressen ({len(addresses) - len(missing)} aus dem Cache) ...")
+        started = time.monotonic()
+        results = asyncio.run(measure_all(missing, concurrency, timeout, attempts))
+        now = time.time()
+        for address, status, rtt in results:
+            cache[address] = {"status": status, "rtt": rtt, "time": now}
+        print(f"Messung abgeschlossen in {time.monotonic() - started:.1f} s.")
+        if cache_file:
+            save_cache(cache_file, cache)
+    return cache
+
+
+def rank_servers(servers, measurements, port=DEFAULT_PORT, max_rtt=None):
+    """
+    Sortiert die Server nach gemessener RTT (schnellste zuerst); Server ohne bekannte
+    Adresse folgen in ursprünglicher Reihenfolge. Liefert (Reihenfolge, übersprungene),
+    wobei übersprungene eine Liste von (Server, Grund) ist.
+    """
+    measured, unknown, skipped = [], [], []
+    for server in servers:
+        address = server_address(server, port)
+        entry = measurements.get(address) if address else None
+        if entry is None:
+            unknown.append(server)
+        elif entry["status"] not in REACHABLE:
+            skipped.append((server, f"Server unreachable: {entry['status']}"))
+        elif max_rtt is not None and entry["rtt"] > max_rtt:
+            skipped.append((server, f"RTT {entry['rtt']:.0f} ms > {max_rtt:.0f} ms"))
+        else:
+            server["rtt"] = entry["rtt"]
+            measured.append(server)
+    measured.sort(key=lambda s: s["rtt"])
+    return measured + unknown, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latenz-Vorprüfung aller Server eines Anbieters.")
+    parser.add_argument("--provider", required=True, choices=sorted(providers.DISPLAY_NAMES))
+    parser.add_argument("--country", required=True, help="Ländercode, z. B. us oder gb")
+    parser.add_argument("--backend", default="cli", choices=["cli", "wireguard", "openvpn"])
+    parser.add_argument("--configs", help="ProtonVPN: Verzeichnis mit Konfigurationsdateien")
+    parser.add_argument("--catalogue", help="WireGuard: Katalogdatei")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="TCP-Port für den Handshake")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT)
+    parser.add_argument("--attempts", type=int, default=DEFAULT_ATTEMPTS)
+    parser.add_argument("--max-rtt", type=float, help="Server mit höherer RTT (ms) aussortieren")
+    parser.add_argument("--cache", default=DEFAULT_CACHE, help="Cache-Datei")
+    parser.add_argument("--max-age", type=float, default=DEFAULT_MAX_AGE, help="Gültigkeit des Caches (s)")
+    parser.add_argument("--output", help="Rangliste als Datei speichern")
+    args = parser.parse_args()
+
+    session = providers.open_session(args.provider, args.backend, configs=args.configs, catalogue=args.catalogue)
+    servers = providers.fetch_servers(session, args.country)
+    if not servers:
+        print("Fehler: Es konnten keine Server gefunden werden.")
+        return
+    measurements = scan(servers, args.port, args.concurrency, args.timeout, args.attempts, args.cache, args.max_age)
+    ordered, skipped = rank_servers(servers, measurements, args.port, args.max_rtt)
+
+    lines = ["Server\tRTT (ms)\tStatus\n"]
+    lines += [f"{s['name']}\t{s['rtt']:.1f}\tok\n" if "rtt" in s else f"{s['name']}\t\tunbekannt\n" for s in ordered]
+    lines += [f"{s['name']}\t\t{reason}\n" for s, reason in skipped]
+    if args.output:
+        with open(args.output, "w") as f:
+            f.writelines(lines)
+        print(f"Rangliste wurde in '{args.output}' gespeichert.")
+    else:
+        print("".join(lines), end="")
+    print(f"{len(ordered)} Server für den Sweep, {len(skipped)} aussortiert.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+DNS-, IPv6- und WebRTC-Leak-Prüfung je Verbindung.
+
+Ein Server kann Peacock freischalten und trotzdem DNS-Anfragen oder IPv6-Verkehr
+am Tunnel vorbeischicken. Geprüft wird je Verbindung:
+  - DNS:    Es werden eindeutige Namen unterhalb einer eigenen Zone aufgelöst. Der
+            autoritative Server dieser Zone (siehe "serve") antwortet mit der IP des
+            Resolvers, der bei ihm angefragt hat. Ein Leak liegt vor, wenn derselbe
+            Resolver wie ohne VPN antwortet oder (mit Länder-Datenbank) der Resolver
+            in einem anderen Land als die Exit-IP steht.
+  - IPv6:   IPv6-Adresse über einen reinen IPv6-Echo-Dienst. Leak, wenn das /64-Präfix
+            dem ohne VPN entspricht oder das Land abweicht.
+  - WebRTC: Wie ein Browser per STUN (UDP) die öffentliche Adresse erfragen. Leak,
+            wenn sie von der HTTP-Exit-IP abweicht oder der eigenen IP entspricht.
+
+Im Sweep läuft die Prüfung als Nebenprüfung parallel zur Dienstprüfung (--leak-check);
+die Vergleichswerte ohne VPN (baseline()) werden vor der ersten Verbindung erhoben.
+
+Lokaler Test mit dem eingebauten autoritativen Stub-Server:
+  ./leak_probe.py serve --zone leak.test --port 5353 &
+  ./leak_probe.py check --zone leak.test --resolver 127.0.0.1:5353
+Für echte Tests muss die Zone (NS-Eintrag) auf einen Rechner zeigen, auf dem
+"serve" auf Port 53 läuft; aufgelöst wird dann über den Resolver des Systems.
+"""
+import argparse
+import ipaddress
+import os
+import socket
+import struct
+import subprocess
+import uuid
+
+import exit_ip
+
+DEFAULT_QUERIES = 3
+DEFAULT_TIMEOUT = 3.0
+DEFAULT_IPV6_URL = "https://api6.ipify.org"
+DEFAULT_STUN_SERVER = "stun.l.google.com:19302"
+
+COLUMNS = ["DNS-Resolver", "DNS-Leak", "IPv6", "IPv6-Leak", "STUN-IP", "WebRTC-Leak"]
+
+TYPE_A = 1
+TYPE_TXT = 16
+RCODE_REFUSED = 5
+STUN_MAGIC = 0x2112A442
+STUN_XOR_MAPPED_ADDRESS = 0x0020
+STUN_MAPPED_ADDRESS = 0x0001
+
+
+def split_address(text, default_port):
+    """"host:port" bzw. "host" -> (host, port)."""
+    host, _, port = text.rpartition(":")
+    if not host:
+        return text, default_port
+    return host, int(port)
+
+
+def encode_name(name):
+    """Domainname im DNS-Format (Längenpräfix je Label)."""
+    labels = [label.encode() for label in name.rstrip(".").split(".")]
+    return b"".join(bytes([len(label)]) + label for label in labels) + b"\x00"
+
+
+def decode_name(data, offset):
+    """Liest einen (ggf. komprimierten) Namen; liefert (Name, Offset danach)."""
+    labels = []
+    end = None
+    while True:
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            if end is None:
+                end = offset + 2
+            offset = ((length & 0x3F) << 8) | data[offset + 1]
+            continue
+        offset += 1
+        if length == 0:
+            break
+        labels.append(data[offset:offset + length].decode(errors="replace"))
+        offset += length
+    return ".".join(labels), end if end is not None else offset
+
+
+def build_query(name, qtype=TYPE_A):
+    """DNS-Anfrage mit Rekursionswunsch; liefert (Kennung, Paket)."""
+    ident = int.from_bytes(os.urandom(2), "big")
+    header = struct.pack("!HHHHHH", ident, 0x0100, 1, 0, 0, 0)
+    return ident, header + encode_name(name) + struct.pack("!HH", qtype, 1)
+
+
+def parse_answers(data):
+    """Liefert (Kennung, RCODE, [(Typ, Daten)]) einer DNS-Antwort."""
+    ident, flags, qdcount, ancount, _, _ = struct.unpack("!HHHHHH", data[:12])
+    offset = 12
+    for _ in range(qdcount):
+        _, offset = decode_name(data, offset)
+        offset += 4
+    answers = []
+    for _ in range(ancount):
+        _, offset = decode_name(data, offset)
+        rtype, _, _, length = struct.unpack("!HHIH", data[offset:offset + 10])
+        offset += 10
+        answers.append((rtype, data[offset:offset + length]))
+        offset += length
+    return ident, flags & 0x000F, answers
+
+
+def query_resolver(name, resolver, timeout=DEFAULT_TIMEOUT):
+    """Fragt einen bestimmten Resolver (host, port) per UDP nach dem A-Eintrag von name."""
+    ident, packet = build_query(name)
+    family = socket.AF_INET6 if ":" in resolver[0] else socket.AF_INET
+    with socket.socket(family, socket.SOCK_DGRAM) as sock:
+        sock.settimeout(timeout)
+        sock.sendto(packet, resolver)
+        while True:
+            data, _ = sock.recvfrom(4096)
+            answer_ident, rcode, answers = parse_answers(data)
+            if answer_ident == ident:
+                break
+    return [socket.inet_ntoa(rdata) for rtype, rdata in answers if rtype == TYPE_A and rcode == 0]
+
+
+def query_system(name):
+    """Löst name über den Resolver des Systems auf (A-Einträge)."""
+    try:
+        infos = socket.getaddrinfo(name, None, socket.AF_INET, socket.SOCK_DGRAM)
+    except socket.gaierror:
+        return []
+    return sorted({info[4][0] for info in infos})
+
+
+def dns_resolvers(zone, resolver=None, queries=DEFAULT_QUERIES, timeout=DEFAULT_TIMEOUT):
+    """
+    Löst queries eindeutige Namen unter zone auf und liefert die Menge der Resolver-IPs,
+    die der autoritative Server gesehen hat. Eindeutige Namen umgehen jeden Cache.
+    """
+    token = uuid.uuid4().hex[:12]
+    resolvers = set()
+    for index in range(queries):
+        name = f"{token}-{index}.{zone}"
+        try:
+            found = query_resolver(name, resolver, timeout) if resolver else query_system(name)
+        except OSError:
+            found = []
+        resolvers.update(found)
+    return resolvers
+
+
+def ipv6_address(url=DEFAULT_IPV6_URL, timeout=DEFAULT_TIMEOUT):
+    """Externe IPv6-Adresse oder None, wenn kein IPv6-Verkehr möglich ist."""
+    result = subprocess.run(["curl", "-6", "-s", "--max-time", str(timeout), url], capture_output=True, text=True)
+    output = result.stdout.strip()
+    return output if exit_ip.is_ip_address(output) and ":" in output else None
+
+
+def stun_address(server=DEFAULT_STUN_SERVER, timeout=DEFAULT_TIMEOUT):
+    """Öffentliche Adresse per STUN Binding Request (RFC 5389), wie sie WebRTC ermittelt."""
+    host, port = split_address(server, 3478)
+    transaction = os.urandom(12)
+    request = struct.pack("!HHI", 0x0001, 0, STUN_MAGIC) + transaction
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.settimeout(timeout)
+            sock.sendto(request, (socket.gethostbyname(host), port))
+            data, _ = sock.recvfrom(2048)
+    except OSError:
+        return None
+    if len(data) < 20 or data[8:20] != transaction:
+        return None
+    offset = 20
+    while offset + 4 <= len(data):
+        attribute, length = struct.unpack("!HH", data[offset:offset + 4])
+        value = data[offset + 4:offset + 4 + length]
+        if attribute in (STUN_XOR_MAPPED_ADDRESS, STUN_MAPPED_ADDRESS) and len(value) >= 8 and value[1] == 0x01:
+            raw = struct.unpack("!I", value[4:8])[0]
+            if attribute == STUN_XOR_MAPPED_ADDRESS:
+                raw ^= STUN_MAGIC
+            return str(ipaddress.IPv4Address(raw))
+        offset += 4 + length + (-length % 4)
+    return None
+
+
+def same_prefix(first, second, prefix=64):
+    """True, wenn beide IPv6-Adressen im selben /prefix-Netz liegen."""
+    network = ipaddress.ip_network(f"{first}/{prefix}", strict=False)
+    return ipaddress.ip_address(second) in network
+
+
+def country(ip, country_db):
+    """Land zu ip aus der Länder-Datenbank (oder None)."""
+    if not ip or not country_db:
+        return None
+    return exit_ip.geolocate(ip, country_db)["country"]
+
+
+def baseline(zone=None, resolver=None, ipv6_url=DEFAULT_IPV6_URL, timeout=DEFAULT_TIMEOUT):
+    """Vergleichswerte ohne VPN: Resolver, IPv6-Adresse und externe IP."""
+    ip, _ = exit_ip.lookup_exit_ip(timeout=timeout)
+    return {
+        "resolvers": dns_resolvers(zone, resolver, timeout=timeout) if zone else set(),
+        "ipv6": ipv6_address(ipv6_url, timeout),
+        "ip": ip,
+    }
+
+
+def yes_no(flag):
+    """Spaltenwert für ein Leak-Ergebnis (leer, wenn nicht prüfbar)."""
+    if flag is None:
+        return ""
+    return "ja" if flag else "nein"
+
+
+def run_probe(zone=None, home=None, resolver=None, queries=DEFAULT_QUERIES, ipv6_url=DEFAULT_IPV6_URL,
+              stun_server=DEFAULT_STUN_SERVER, country_db=None, timeout=DEFAULT_TIMEOUT):
+    """
+    Führt alle Prüfungen durch den bestehenden Tunnel aus und liefert ein Dict mit
+    den Spalten aus COLUMNS. home sind die Vergleichswerte aus baseline().
+    """
+    home = home or {"resolvers": set(), "ipv6": None, "ip": None}
+    exit_address, _ = exit_ip.lookup_exit_ip(timeout=timeout)
+    exit_country = country(exit_address, country_db)
+
+    dns_leak = None
+    resolvers = set()
+    if zone:
+        resolvers = dns_resolvers(zone, resolver, queries, timeout)
+        foreign = exit_country is not None and any(country(r, country_db) not in (None, exit_country)
+                                                   for r in resolvers)
+        dns_leak = bool(resolvers & home["resolvers"]) or foreign
+
+    ipv6 = ipv6_address(ipv6_url, timeout)
+    ipv6_leak = False
+    if ipv6:
+        if home["ipv6"]:
+            ipv6_leak = same_prefix(ipv6, home["ipv6"])
+        elif exit_country is not None:
+            ipv6_leak = country(ipv6, country_db) not in (None, exit_country)
+        else:
+            ipv6_leak = None
+
+    stun_ip = stun_address(stun_server, timeout) if stun_server else None
+    webrtc_leak = None
+    if stun_ip and exit_address:
+        webrtc_leak = stun_ip != exit_address or stun_ip == home["ip"]
+
+    return {
+        "DNS-Resolver": ",".join(sorted(resolvers)),
+        "DNS-Leak": yes_no(dns_leak),
+        "IPv6": ipv6 or "",
+        "IPv6-Leak": yes_no(ipv6_leak),
+        "STUN-IP": stun_ip or "",
+        "WebRTC-Leak": yes_no(webrtc_leak),
+    }
+
+
+def answer(query, client_ip, zone):
+    """
+    Antwort des autoritativen Stub-Servers: Für Namen unter zone ein A- bzw.
+    TXT-Eintrag mit der Adresse des anfragenden Resolvers, sonst REFUSED.
+    """
+    ident, flags, _, _, _, _ = struct.unpack("!HHHHHH", query[:12])
+    name, offset = decode_name(query, 12)
+    qtype, _ = struct.unpack("!HH", query[offset:offset + 4])
+    question = query[12:offset + 4]
+    in_zone = name.lower() == zone or name.lower().endswith("." + zone)
+    records = []
+    if in_zone and qtype == TYPE_A and ":" not in client_ip:
+        records.append((TYPE_A, socket.inet_aton(client_ip)))
+    elif in_zone and qtype == TYPE_TXT:
+        text = client_ip.encode()
+        records.append((TYPE_TXT, bytes([len(text)]) + text))
+    response_flags = 0x8400 | (flags & 0x0100) | (0 if in_zone else RCODE_REFUSED)
+    header = struct.pack("!HHHHHH", ident, response_flags, 1, len(records), 0, 0)
+    body = b"".join(struct.pack("!HHHIH", 0xC00C, rtype, 1, 0, len(rdata)) + rdata for rtype, rdata in records)
+    return header + question + body
+
+
+def serve(zone, address="0.0.0.0", port=53):
+    """Autoritativer Stub-Server für zone (läuft bis zum Abbruch)."""
+    zone = zone.lower().rstrip(".")
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind((address, port))
+        print(f"Antworte für *.{zone} auf {address}:{port} ...")
+        while True:
+            query, client = sock.recvfrom(4096)
+            try:
+                sock.sendto(answer(query, client[0], zone), client)
+            except (struct.error, IndexError):
+                continue
+            print(f"{client[0]}\t{decode_name(query, 12)[0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DNS-, IPv6- und WebRTC-Leak-Prüfung.")
+    parser.add_argument("command", choices=["check", "serve"])
+    parser.add_argument("--zone", help="Zone des autoritativen Servers, z. B. leak.example.org")
+    parser.add_argument("--resolver", help="check: Resolver host:port direkt fragen (Standard: System-Resolver)")
+    parser.add_argument("--address", default="0.0.0.0", help="serve: Adresse")
+    parser.add_argument("--port", type=int, default=53, help="serve: Port")
+    parser.add_argument("--queries", type=int, default=DEFAULT_QUERIES)
+    parser.add_argument("--ipv6-url", default=DEFAULT_IPV6_URL)
+    parser.add_argument("--stun-server", default=DEFAULT_STUN_SERVER, help="host:port (leer: keine STUN-Prüfung)")
+    parser.add_argument("--country-db", help="Länder-Datenbank (siehe exit_ip.py)")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        if not args.zone:
+            parser.error("serve benötigt --zone")
+        serve(args.zone, args.address, args.port)
+        return
+
+    resolver = split_address(args.resolver, 53) if args.resolver else None
+    result = run_probe(args.zone, None, resolver, args.queries, args.ipv6_url, args.stun_server,
+                       args.country_db, args.timeout)
+    for column in COLUMNS:
+        print(f"{column}: {result[column] or '-'}")
+
+
+if __name__ == "__main__":
+    main()
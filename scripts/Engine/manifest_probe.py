@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Prüfung auf Wiedergabe-Ebene: Manifest und erstes Segment eines bekannten Titels.
+
+check_peacock() wertet nur die Weiterleitung der Startseite aus, check_bbc_iplayer()
+hält jede Seite ohne Blockierungshinweis für "Available" - auch Fehlerseiten und
+Timeouts. Hier wird stattdessen ein Medien-Manifest (HLS) abgerufen, daraus ein
+Segment geladen und Zeit bis zum ersten Byte (TTFB) sowie Segment-Durchsatz gemessen.
+
+Ergebnis:
+  Available   Manifest und Segment geladen, Werte im Rahmen
+  Degraded    geladen, aber TTFB zu hoch oder Segment-Durchsatz zu niedrig
+  Blocked     Geosperre erkannt (Media-Selector "geolocation", HTTP 403/451, /unavailable)
+  Error       Timeout, Verbindungs- oder Serverfehler, unlesbare Antwort
+              (zählt im Sweep wie "Inconclusive" und wird wiederholt)
+
+BBC iPlayer: Der Media Selector liefert zu einer Versions-ID (vpid) die Manifeste
+oder den Fehler "geolocation". Peacock: Nach der Startseite (mit Fehlererkennung)
+wird ein per Konfiguration angegebenes HLS-Manifest geladen; es ist Pflicht, weil
+die Startseite allein nichts über die Wiedergabe aussagt.
+
+Beispiel (bei bestehender VPN-Verbindung):
+  ./manifest_probe.py --service bbciplayer --vpid <Versions-ID>
+  ./manifest_probe.py --service peacock --manifest-url https://.../master.m3u8
+"""
+import argparse
+import json
+import os
+import subprocess
+import tempfile
+import urllib.parse
+
+BBC_MEDIA_SELECTOR = (
+    "https://open.live.bbc.co.uk/mediaselector/6/select/version/2.0/mediaset/pc/vpid/{vpid}/format/json"
+)
+PEACOCK_URL = "https://www.peacocktv.com"
+
+DEFAULT_TIMEOUT = 15
+DEFAULT_MAX_TTFB_MS = 2000
+DEFAULT_MIN_SEGMENT_MBPS = 5.0
+# Für die Prüfung wird die größte Variante bis zu dieser Bitrate gewählt (HD)
+DEFAULT_MAX_VARIANT_BPS = 8000000
+BLOCKED_STATUS = (403, 451)
+
+COLUMNS = ["TTFB (ms)", "Segment (Mbit/s)"]
+
+
+def fetch(url, timeout=DEFAULT_TIMEOUT, keep_body=True):
+    """
+    Lädt url per curl und liefert ein Dict mit exit, code, ttfb_ms, size, mbps, url
+    und (bei keep_body) body.
+    """
+    body_fd, body_file = tempfile.mkstemp(prefix="manifest-")
+    os.close(body_fd)
+    try:
+        result = subprocess.run(
+            ["curl", "-s", "-L", "--max-time", str(timeout), "-o", body_file if keep_body else "/dev/null",
+             "-w", "%{http_code}\t%{time_starttransfer}\t%{size_download}\t%{speed_download}\t%{url_effective}",
+             url],
+            capture_output=True, text=True
+        )
+        body = ""
+        if keep_body:
+            with open(body_file, "r", errors="replace") as f:
+                body = f.read()
+    finally:
+        os.unlink(body_file)
+    parts = result.stdout.split("\t")
+    if len(parts) != 5:
+        parts = ["0", "0", "0", "0", url]
+    return {
+        "exit": result.returncode,
+        "code": int(parts[0]) if parts[0].isdigit() else 0,
+        "ttfb_ms": float(parts[1]) * 1000,
+        "size": float(parts[2]),
+        "mbps": float(parts[3]) * 8 / 1e6,
+        "url": parts[4],
+        "body": body,
+    }
+
+
+def failure(response):
+    """Fehler- bzw. Sperrklassifizierung einer Antwort, oder None wenn sie in Ordnung ist."""
+    if response["exit"] != 0 and response["code"] == 0:
+        return ("Error", f"curl {response['exit']}")
+    if response["code"] in BLOCKED_STATUS or "/unavailable" in response["url"]:
+        return ("Blocked", f"HTTP {response['code']}")
+    if response["code"] >= 400:
+        return ("Error", f"HTTP {response['code']}")
+    return None
+
+
+def outcome(result, reason="", ttfb_ms=None, mbps=None):
+    """Ergebnis im Format der Sweep-Prüfungen: (Ergebnistext, Zusatzspalten)."""
+    text = f"{result} ({reason})" if reason else result
+    extra = {
+        "TTFB (ms)": "" if ttfb_ms is None else f"{ttfb_ms:.0f}",
+        "Segment (Mbit/s)": "" if mbps is None else f"{mbps:.1f}",
+    }
+    return text, extra
+
+
+def pick_variant(playlist, base_url, max_variant_bps):
+    """Wählt aus einer HLS-Master-Playlist die größte Variante bis max_variant_bps."""
+    variants = []
+    lines = playlist.splitlines()
+    for index, line in enumerate(lines):
+        if not line.startswith("#EXT-X-STREAM-INF"):
+            continue
+        bandwidth = 0
+        for attribute in line.split(":", 1)[1].split(","):
+            if attribute.startswith("BANDWIDTH="):
+                bandwidth = int(attribute.split("=", 1)[1])
+        for uri in lines[index + 1:]:
+            if uri.strip() and not uri.startswith("#"):
+                variants.append((bandwidth, urllib.parse.urljoin(base_url, uri.strip())))
+                break
+    if not variants:
+        return None
+    fitting = [v for v in variants if v[0] <= max_variant_bps]
+    return max(fitting)[1] if fitting else min(variants)[1]
+
+
+def first_segment(playlist, base_url):
+    """Liefert die URL des ersten Segments einer HLS-Media-Playlist."""
+    for line in playlist.splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            return urllib.parse.urljoin(base_url, line)
+    return None
+
+
+def check_hls(manifest_url, timeout=DEFAULT_TIMEOUT, max_ttfb_ms=DEFAULT_MAX_TTFB_MS,
+              min_segment_mbps=DEFAULT_MIN_SEGMENT_MBPS, max_variant_bps=DEFAULT_MAX_VARIANT_BPS):
+    """Lädt Manifest (ggf. Master- und Media-Playlist) und erstes Segment und klassifiziert."""
+    manifest = fetch(manifest_url, timeout)
+    problem = failure(manifest)
+    if problem:
+        return outcome(*problem, ttfb_ms=manifest["ttfb_ms"] or None)
+    if not manifest["body"].startswith("#EXTM3U"):
+        return outcome("Error", "kein HLS-Manifest", manifest["ttfb_ms"])
+    ttfb_ms = manifest["ttfb_ms"]
+
+    playlist, base_url = manifest["body"], manifest["url"]
+    if "#EXT-X-STREAM-INF" in playlist:
+        variant_url = pick_variant(playlist, base_url, max_variant_bps)
+        variant = fetch(variant_url, timeout)
+        problem = failure(variant)
+        if problem:
+            return outcome(*problem, ttfb_ms=ttfb_ms)
+        playlist, base_url = variant["body"], variant["url"]
+
+    segment_url = first_segment(playlist, base_url)
+    if not segment_url:
+        return outcome("Error", "kein Segment im Manifest", ttfb_ms)
+    segment = fetch(segment_url, timeout, keep_body=False)
+    problem = failure(segment)
+    if problem:
+        return outcome(*problem, ttfb_ms=ttfb_ms)
+    if segment["exit"] != 0 or segment["size"] == 0:
+        return outcome("Error", f"Segment unvollständig (curl {segment['exit']})", ttfb_ms)
+
+    if ttfb_ms > max_ttfb_ms:
+        return outcome("Degraded", f"TTFB {ttfb_ms:.0f} ms", ttfb_ms, segment["mbps"])
+    if segment["mbps"] < min_segment_mbps:
+        return outcome("Degraded", f"Segment {segment['mbps']:.1f} Mbit/s", ttfb_ms, segment["mbps"])
+    return outcome("Available", ttfb_ms=ttfb_ms, mbps=segment["mbps"])
+
+
+def hls_connection(selection):
+    """Sucht im Media-Selector-Ergebnis die erste HLS-Verbindung eines Videos."""
+    for media in selection.get("media", []):
+        if media.get("kind") != "video":
+            continue
+        for connection in media.get("connection", []):
+            if connection.get("transferFormat") == "hls" and connection.get("protocol", "https") == "https":
+                return connection.get("href")
+    return None
+
+
+def check_bbc_iplayer_manifest(vpid, timeout=DEFAULT_TIMEOUT, **thresholds):
+    """Fragt den BBC Media Selector zu vpid ab und prüft das gelieferte HLS-Manifest."""
+    response = fetch(BBC_MEDIA_SELECTOR.format(vpid=vpid), timeout)
+    if response["exit"] != 0 and response["code"] == 0:
+        return outcome("Error", f"curl {response['exit']}")
+    try:
+        selection = json.loads(response["body"])
+    except ValueError:
+        return outcome("Error", f"Media Selector HTTP {response['code']}", response["ttfb_ms"])
+    if selection.get("result") == "geolocation":
+        return outcome("Blocked", "geolocation", response["ttfb_ms"])
+    if selection.get("result"):
+        return outcome("Error", selection["result"], response["ttfb_ms"])
+    manifest_url = hls_connection(selection)
+    if not manifest_url:
+        return outcome("Error", "kein HLS-Manifest", response["ttfb_ms"])
+    return check_hls(manifest_url, timeout, **thresholds)
+
+
+def check_peacock_manifest(manifest_url, timeout=DEFAULT_TIMEOUT, **thresholds):
+    """
+    Prüft zuerst die Startseite (mit Fehlererkennung statt pauschal "Available")
+    und danach das HLS-Manifest eines Titels.
+    """
+    landing = fetch(PEACOCK_URL, timeout, keep_body=False)
+    problem = failure(landing)
+    if problem:
+        return outcome(*problem, ttfb_ms=landing["ttfb_ms"] or None)
+    return check_hls(manifest_url, timeout, **thresholds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dienst auf Wiedergabe-Ebene (Manifest und Segment) prüfen.")
+    parser.add_argument("--service", required=True, choices=["peacock", "bbciplayer"])
+    parser.add_argument("--vpid", help="BBC iPlayer: Versions-ID eines Titels")
+    parser.add_argument("--manifest-url", help="Peacock bzw. beliebiger Dienst: HLS-Manifest eines Titels")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT)
+    parser.add_argument("--max-ttfb", type=float, default=DEFAULT_MAX_TTFB_MS, help="TTFB-Schwelle in ms")
+    parser.add_argument("--min-segment-mbps", type=float, default=DEFAULT_MIN_SEGMENT_MBPS)
+    args = parser.parse_args()
+
+    thresholds = {"max_ttfb_ms": args.max_ttfb, "min_segment_mbps": args.min_segment_mbps}
+    if args.service == "bbciplayer":
+        if not args.vpid:
+            parser.error("BBC iPlayer benötigt --vpid")
+        result, extra = check_bbc_iplayer_manifest(args.vpid, args.timeout, **thresholds)
+    else:
+        if not args.manifest_url:
+            parser.error("Peacock benötigt --manifest-url")
+        result, extra = check_peacock_manifest(args.manifest_url, args.timeout, **thresholds)
+    print(f"Ergebnis: {result}")
+    for column in COLUMNS:
+        print(f"{column}: {extra[column] or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Mehrere Sweeps (Dienst, Land) eines Anbieters in einem Lauf.
+
+Die Einzelskripte und sweep.py testen je Aufruf ein Land und einen Dienst. Für den
+täglichen Standardlauf (BBC iPlayer in UK, Peacock in den USA) heißt das zwei
+Katalog-Downloads und zwei Prozesse. Hier wird der Katalog des Anbieters einmal für
+alle Länder abgerufen (providers.fetch_servers_by_country()) und auf die Jobs
+verteilt. Gehört ein Server zu mehreren Jobs (z. B. Peacock und iPlayer über
+dieselben UK-Server), wird er nur einmal verbunden, die externe IP einmal ermittelt
+und danach jede Dienstprüfung in derselben Verbindung ausgeführt.
+
+Jeder Job schreibt eine eigene Ergebnisdatei im Schema von sweep.py; unentschiedene
+Server werden je Job am Ende wiederholt (sweep.retry_queue()). Nebenprüfungen,
+Prüfung auf Wiedergabe-Ebene und --pipeline bleiben sweep.py vorbehalten.
+
+Beispiele:
+  ./multi_sweep.py --provider nordvpn --job bbciplayer:gb --job peacock:us
+  ./multi_sweep.py --provider expressvpn --job peacock --job bbciplayer --job peacock:gb --status online
+"""
+import argparse
+import datetime
+import time
+
+import catalogue
+import probes
+import providers
+import rate_limit
+import sweep
+
+
+def parse_job(text):
+    """"dienst[:land]" -> Job-Dict; das Land ist standardmäßig das des Dienstes."""
+    service, _, country = text.partition(":")
+    if service not in probes.SERVICES:
+        raise ValueError(f"Unbekannter Dienst: {service}")
+    return {"service": service, "country": country or probes.SERVICES[service]["country"]}
+
+
+def plan(jobs, servers_by_country):
+    """
+    Verbindungsplan: [(Server, [Job-Indizes])] in der Reihenfolge der Kataloge; jeder
+    Server steht nur einmal darin, auch wenn er zu mehreren Jobs gehört.
+    """
+    order, members = [], {}
+    for number, job in enumerate(jobs):
+        for server in servers_by_country[job["country"]]:
+            key = server["name"]
+            if key not in members:
+                members[key] = []
+                order.append(server)
+            members[key].append(number)
+    return [(server, members[server["name"]]) for server in order]
+
+
+def test_server(session, server, jobs, limiter=None, account=None):
+    """
+    Verbindet einmal mit server und führt die Dienstprüfungen aller jobs aus.
+    Liefert je Job einen Ergebnis-Eintrag wie sweep.test_server().
+    """
+    rate_limit.acquire(limiter, account)
+    status = providers.connect_server(session, server)
+    if status != "connected":
+        result = sweep.SKIPPED_RESULTS.get(status, status)
+        rate_limit.report(limiter, account, rate_limit.signal(result))
+        return [{"server": server["name"], "ip": "n/a", "result": result} for _ in jobs]
+    rate_limit.report(limiter, account, "ok")
+    time.sleep(session["settle"])
+    ip = probes.check_external_ip()
+    print(f"Externe IP: {ip}")
+    records = []
+    for job in jobs:
+        domain = job["service_info"]["domain"]
+        rate_limit.acquire(limiter, domain)
+        try:
+            result, extra = sweep.run_check(job["check"])
+        except Exception as e:
+            result, extra = f"Error ({e})", {}
+        rate_limit.report(limiter, domain, rate_limit.signal(result))
+        print(f"{server['name']}\t{job['service_info']['label']}\t{result}")
+        records.append({"server": server["name"], "ip": ip, "result": result, "extra": extra})
+    return records
+
+
+def run(session, jobs, connections, retry_rounds=sweep.RETRY_ROUNDS, retry_budget=sweep.RETRY_BUDGET,
+        retry_backoff=sweep.RETRY_BACKOFF, throttle=None):
+    """
+    Arbeitet den Verbindungsplan ab und schreibt je Job fortlaufend in job["output"].
+    Übersprungene Server (job["skipped"], siehe catalogue.pick()) werden vorab eingetragen.
+    """
+    limiter, account = (throttle["limiter"], throttle["account"]) if throttle else (None, None)
+    for job in jobs:
+        with open(job["output"], "w") as f:
+            f.write("\t".join(sweep.RESULTS_COLUMNS) + "\n")
+        job["records"], job["queue"] = [], []
+        for server, reason in job["skipped"]:
+            record = {"server": server["name"], "ip": "n/a", "result": f"Skipped ({reason})"}
+            sweep.write_result(job["output"], record)
+            job["records"].append(record)
+    with rate_limit.session_slot(limiter, account):
+        try:
+            for server, members in connections:
+                print(f"\nStarte Test für {server['name']} ({len(members)} Prüfung(en)) ...")
+                selected = [jobs[number] for number in members]
+                try:
+                    records = test_server(session, server, selected, limiter, account)
+                except Exception as e:
+                    print(f"Fehler beim Test für {server['name']}: {e}")
+                    records = [{"server": server["name"], "ip": "n/a", "result": f"Error ({e})"} for _ in selected]
+                providers.disconnect_server(session)
+                for job, record in zip(selected, records):
+                    sweep.write_result(job["output"], record)
+                    if sweep.needs_retry(record):
+                        job["queue"].append((len(job["records"]), server))
+                    job["records"].append(record)
+                time.sleep(sweep.PAUSE_SECONDS)
+            for job in jobs:
+                if job["queue"] and retry_rounds:
+                    job_throttle = dict(throttle, domain=job["service_info"]["domain"]) if throttle else None
+                    sweep.retry_queue(session, job["queue"], job["records"], job["check"], (), retry_rounds,
+                                      retry_budget, retry_backoff, False, None, job_throttle)
+                    sweep.rewrite_results(job["output"], job["records"])
+        finally:
+            providers.close_session(session)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mehrere Sweeps eines Anbieters mit einem Katalogabruf.")
+    parser.add_argument("--provider", required=True, choices=sorted(providers.DISPLAY_NAMES))
+    parser.add_argument("--job", action="append", required=True,
+                        help="dienst[:land], z. B. bbciplayer:gb (mehrfach)")
+    parser.add_argument("--backend", default="cli", choices=["cli", "wireguard", "openvpn"])
+    parser.add_argument("--configs", help="ProtonVPN: Verzeichnis mit .ovpn- bzw. .conf-Dateien")
+    parser.add_argument("--auth-file", help="ProtonVPN/OpenVPN: Datei mit Benutzername und Passwort")
+    parser.add_argument("--catalogue", help="WireGuard: Katalogdatei (siehe wireguard_backend.py)")
+    parser.add_argument("--private-key-file", help="WireGuard: privater Schlüssel des Anbieters")
+    parser.add_argument("--results-dir", default=".", help="Verzeichnis für Server- und Ergebnislisten")
+    parser.add_argument("--status", help="Nur Server mit diesem Status testen, z. B. online")
+    parser.add_argument("--max-load", type=int, help="Nur Server mit bekanntem Load bis zu diesem Wert (%%)")
+    parser.add_argument("--one-per", choices=catalogue.CATEGORIES)
+    parser.add_argument("--retries", type=int, default=sweep.RETRY_ROUNDS)
+    parser.add_argument("--retry-budget", type=int, default=sweep.RETRY_BUDGET)
+    parser.add_argument("--retry-backoff", type=float, default=sweep.RETRY_BACKOFF)
+    parser.add_argument("--account", help="Name des Anbieter-Kontos für die Sitzungs- und Ratenbegrenzung")
+    parser.add_argument("--limits", help="JSON-Datei mit Limits je Anbieter bzw. Domain (siehe rate_limit.py)")
+    parser.add_argument("--throttle", action="store_true",
+                        help="Sitzungen und Raten je Konto und Domain begrenzen (siehe rate_limit.py)")
+    args = parser.parse_args()
+
+    try:
+        jobs = list({(job["service"], job["country"]): job for job in map(parse_job, args.job)}.values())
+    except ValueError as e:
+        parser.error(str(e))
+    display = providers.DISPLAY_NAMES[args.provider]
+    today = datetime.datetime.now().strftime("%Y%m%d")
+    session = providers.open_session(
+        args.provider, args.backend,
+        configs=args.configs, auth_file=args.auth_file,
+        catalogue=args.catalogue, private_key_file=args.private_key_file,
+    )
+    countries = [job["country"] for job in jobs]
+    print(f"Hole die Serverliste von {display} ({', '.join(dict.fromkeys(countries))}) ...")
+    servers_by_country = providers.fetch_servers_by_country(session, countries)
+    for country, servers in servers_by_country.items():
+        server_file = f"{args.results_dir}/{display}_{country.upper()}_{today}.txt"
+        sweep.save_server_list(servers, server_file)
+        print(f"{len(servers)} Server ({country}) wurden in '{server_file}' gespeichert.")
+
+    selected_by_country, skipped_by_country = {}, {}
+    for country, servers in servers_by_country.items():
+        selected_by_country[country], skipped_by_country[country] = \
+            catalogue.pick(servers, args.status, None, args.max_load, args.one_per)
+    for job in jobs:
+        job["service_info"] = service = probes.SERVICES[job["service"]]
+        job["check"] = service["check"]
+        job["skipped"] = skipped_by_country[job["country"]]
+        job["output"] = f"{args.results_dir}/{service['label']}_Results_{display}_{job['country'].upper()}_{today}.txt"
+    connections = plan(jobs, selected_by_country)
+    checks = sum(len(members) for _, members in connections)
+    print(f"{len(jobs)} Jobs: {checks} Prüfungen über {len(connections)} Verbindungen.")
+
+    throttle = None
+    if args.throttle:
+        throttle = {
+            "limiter": rate_limit.new_limiter(rate_limit.load_limits(args.limits)),
+            "account": f"{args.provider}:{args.account or 'default'}",
+        }
+    run(session, jobs, connections, args.retries, args.retry_budget, args.retry_backoff, throttle)
+    for job in jobs:
+        print(f"Ergebnisse {job['service']} ({job['country']}): '{job['output']}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Lokales Testlabor in einem Network Namespace (benötigt root und iproute2).
+
+Aufbau:
+  Namespace "vpnlab"
+    vl-phys  10.200.0.2/24   "physisches" Interface (veth, Gegenstelle vl-host im Host)
+    vl-tun   10.201.0.2/24   Fake-Tunnel (tun ohne Gegenstelle), Default-Route zeigt hierauf
+  Namespace "vpnlab-srv"
+    vl-host  10.200.0.1/24   Gegenstelle; dient zugleich als "VPN-Endpunkt"
+
+Alles, was über vl-tun geroutet wird, verschwindet (wie in einem Tunnel) und taucht
+nicht auf vl-phys auf. Wird der Tunnel mit "tunnel-down" entfernt, greift die
+Fallback-Default-Route über vl-phys - genau das Leak-Szenario eines fehlenden
+Killswitches.
+
+Für das WireGuard-Backend legt "wg-selftest" zusätzlich zwei WireGuard-Server an.
+Deren UDP-Sockets entstehen in "vpnlab-srv" (erreichbar unter 10.200.0.1:51821 bzw.
+:51822), die Interfaces selbst werden danach in eigene Namespaces "vpnlab-exit1/2"
+verschoben. So können beide Server dieselbe Tunnel-Adresse 10.5.0.1 nutzen, wie es
+bei echten Anbietern der Fall ist.
+
+Beispiel:
+  sudo ./netns_lab.py setup
+  sudo ./netns_lab.py selftest
+  sudo ./netns_lab.py wg-selftest
+  sudo ./netns_lab.py destroy
+"""
+import argparse
+import datetime
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import wireguard_backend
+
+LAB_NS = "vpnlab"
+SERVER_NS = "vpnlab-srv"
+HOST_IF = "vl-host"
+PHYS_IF = "vl-phys"
+TUN_IF = "vl-tun"
+HOST_ADDR = "10.200.0.1"
+PHYS_ADDR = "10.200.0.2"
+TUN_ADDR = "10.201.0.2"
+# Ziel "im Internet" (TEST-NET-2), das nur durch den Tunnel erreicht werden darf
+INTERNET_ADDR = "198.51.100.1"
+WG_SERVER_ADDR = "10.5.0.1"
+WG_BASE_PORT = 51820
+# Spielraum zwischen den Zeitstempeln des Kernels und denen der Tunnel-Schritte (s)
+LEAK_TOLERANCE = 0.05
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def run(command, check=True):
+    """Führt einen Befehl aus; bei check=True führt ein Fehler zum Abbruch."""
+    result = subprocess.run(command, capture_output=True, text=True)
+    if check and result.returncode != 0:
+        raise RuntimeError(f"{' '.join(command)}: {result.stderr.strip()}")
+    return result
+
+
+def ns(command, namespace=LAB_NS):
+    """Stellt einem Befehl "ip netns exec <namespace>" voran."""
+    return ["ip", "netns", "exec", namespace] + command
+
+
+def namespaces():
+    """Liefert die Namen aller vorhandenen Network Namespaces."""
+    result = run(["ip", "netns", "list"], check=False)
+    return [line.split()[0] for line in result.stdout.splitlines() if line.strip()]
+
+
+def setup():
+    """Legt Namespaces, veth-Paar und Fake-Tunnel an."""
+    if LAB_NS in namespaces():
+        destroy()
+    run(["ip", "netns", "add", LAB_NS])
+    run(["ip", "netns", "add", SERVER_NS])
+    run(["ip", "link", "add", HOST_IF, "type", "veth", "peer", "name", PHYS_IF])
+    run(["ip", "link", "set", PHYS_IF, "netns", LAB_NS])
+    run(["ip", "link", "set", HOST_IF, "netns", SERVER_NS])
+    run(ns(["ip", "link", "set", "lo", "up"], SERVER_NS))
+    run(ns(["ip", "addr", "add", f"{HOST_ADDR}/24", "dev", HOST_IF], SERVER_NS))
+    run(ns(["ip", "link", "set", HOST_IF, "up"], SERVER_NS))
+    # IPv6 im Labor abschalten, damit Router Solicitations o. ä. den Test nicht verfälschen
+    run(ns(["sysctl", "-q", "-w", "net.ipv6.conf.all.disable_ipv6=1"]), check=False)
+    run(ns(["ip", "link", "set", "lo", "up"]))
+    run(ns(["ip", "addr", "add", f"{PHYS_ADDR}/24", "dev", PHYS_IF]))
+    run(ns(["ip", "link", "set", PHYS_IF, "up"]))
+    # Fallback-Route über das physische Interface, wie auf einem echten Rechner
+    run(ns(["ip", "route", "add", "default", "via", HOST_ADDR, "dev", PHYS_IF, "metric", "1000"]))
+    tunnel_up()
+    print(f"Labor '{LAB_NS}' eingerichtet (Endpunkt {HOST_ADDR}, Tunnel {TUN_IF}).")
+
+
+def tunnel_up():
+    """Legt den Fake-Tunnel an und setzt die Default-Route darauf."""
+    run(ns(["ip", "tuntap", "add", "dev", TUN_IF, "mode", "tun"]), check=False)
+    run(ns(["ip", "addr", "replace", f"{TUN_ADDR}/24", "dev", TUN_IF]))
+    run(ns(["ip", "link", "set", TUN_IF, "up"]))
+    run(ns(["ip", "route", "replace", "default", "dev", TUN_IF, "metric", "10"]))
+
+
+def tunnel_down():
+    """Entfernt den Fake-Tunnel; ab jetzt greift die Fallback-Route (Leak)."""
+    run(ns(["ip", "link", "del", TUN_IF]), check=False)
+
+
+def destroy():
+    """Entfernt alle Labor-Namespaces (das veth-Paar verschwindet mit ihnen)."""
+    for namespace in namespaces():
+        if namespace == LAB_NS or namespace.startswith(LAB_NS + "-"):
+            run(["ip", "netns", "del", namespace], check=False)
+    print(f"Labor '{LAB_NS}' entfernt.")
+
+
+def traffic_command(duration, rate):
+    """
+    Kommandozeile für einen Verkehrsgenerator im Namespace: sendet abwechselnd
+    UDP-Pakete an den Endpunkt (erlaubt, "verschlüsselter Tunnelverkehr") und an
+    eine Internet-Adresse (darf nur durch den Tunnel gehen).
+    """
+    code = (
+        "import socket,time\n"
+        "s=socket.socket(socket.AF_INET,socket.SOCK_DGRAM)\n"
+        f"end=time.monotonic()+{duration}\n"
+        "i=0\n"
+        "while time.monotonic()<end:\n"
+        f"    target=('{HOST_ADDR}',51820) if i%2 else ('{INTERNET_ADDR}',53)\n"
+        "    try:\n"
+        "        s.sendto(b'x'*64,target)\n"
+        "    except OSError:\n"
+        "        pass\n"
+        "    i+=1\n"
+        f"    time.sleep({1.0 / rate})\n"
+    )
+    return ns([sys.executable, "-c", code])
+
+
+def leak_times(filename, reference):
+    """
+    Zeitpunkte (Unix-Zeit) aller LEAK-Zeilen eines Berichts von packet_monitor.py.
+    Der Bericht enthält nur die Uhrzeit; das Datum stammt von reference (um
+    Mitternacht ggf. der Folgetag).
+    """
+    day = datetime.datetime.fromtimestamp(reference)
+    times = []
+    with open(filename) as f:
+        for line in f:
+            if not line.startswith("LEAK\t"):
+                continue
+            clock = datetime.datetime.strptime(line.split("\t")[1], "%H:%M:%S.%f")
+            wall = day.replace(hour=clock.hour, minute=clock.minute, second=clock.second,
+                               microsecond=clock.microsecond).timestamp()
+            times.append(wall + 86400 if wall < reference - 43200 else wall)
+    return times
+
+
+def selftest(duration, rate):
+    """
+    Startet den Paketmonitor im Namespace, erzeugt Verkehr, entfernt den Tunnel
+    für eine Sekunde und prüft, dass Leaks erkannt werden und alle zwischen dem
+    Entfernen und dem Wiederherstellen des Tunnels liegen (bis auf LEAK_TOLERANCE).
+    """
+    setup()
+    output_file = os.path.join("/tmp", "vpnlab_packet_leaks.txt")
+    monitor = subprocess.Popen(ns([
+        sys.executable, os.path.join(SCRIPT_DIR, "packet_monitor.py"),
+        "--interface", PHYS_IF, "--endpoint", HOST_ADDR,
+        "--duration", str(duration), "--output", output_file,
+    ]))
+    time.sleep(0.5)
+    generator = subprocess.Popen(traffic_command(duration - 1, rate))
+    try:
+        time.sleep(duration / 3)
+        print("Tunnel wird entfernt ...")
+        removed = time.time()
+        tunnel_down()
+        time.sleep(1)
+        print("Tunnel wird wiederhergestellt ...")
+        tunnel_up()
+        restored = time.time()
+        generator.wait()
+        monitor.wait()
+    finally:
+        destroy()
+    leaks = leak_times(output_file, removed)
+    outside = [wall for wall in leaks
+               if not removed - LEAK_TOLERANCE <= wall <= restored + LEAK_TOLERANCE]
+    print(f"Selbsttest: {len(leaks)} Leak-Pakete erkannt (erwartet: > 0), "
+          f"davon {len(outside)} außerhalb des Fensters ohne Tunnel (erwartet: 0).")
+    for wall in outside:
+        print(f"  Leak um {datetime.datetime.fromtimestamp(wall).strftime('%H:%M:%S.%f')}")
+    return 0 if leaks and not outside else 1
+
+
+def setup_wireguard_servers(client_public_key, count=2):
+    """
+    Legt count WireGuard-Server an und liefert sie als Katalogeinträge
+    (wie wireguard_backend.load_catalogue()).
+    """
+    servers = []
+    for index in range(1, count + 1):
+        interface = f"wgs{index}"
+        exit_ns = f"{LAB_NS}-exit{index}"
+        port = WG_BASE_PORT + index
+        private_key, public_key = wireguard_backend.generate_keypair()
+        key_file = tempfile.NamedTemporaryFile("w", delete=False, prefix="vpnlab-", suffix=".key")
+        key_file.write(private_key + "\n")
+        key_file.close()
+        run(["ip", "netns", "add", exit_ns])
+        run(ns(["ip", "link", "add", "dev", interface, "type", "wireguard"], SERVER_NS))
+        run(ns(["wg", "set", interface, "listen-port", str(port), "private-key", key_file.name,
+                "peer", client_public_key, "allowed-ips", "10.5.0.2/32"], SERVER_NS))
+        os.unlink(key_file.name)
+        # Der UDP-Socket bleibt in SERVER_NS, das Interface wandert in den Exit-Namespace
+        run(ns(["ip", "link", "set", interface, "netns", exit_ns], SERVER_NS))
+        run(ns(["ip", "link", "set", "lo", "up"], exit_ns))
+        run(ns(["ip", "addr", "add", f"{WG_SERVER_ADDR}/24", "dev", interface], exit_ns))
+        run(ns(["ip", "link", "set", interface, "up"], exit_ns))
+        servers.append({
+            "name": f"lab{index}",
+            "endpoint": f"{HOST_ADDR}:{port}",
+            "public_key": public_key,
+            "country": "Lab",
+        })
+    return servers
+
+
+def ping(address, namespace=LAB_NS):
+    """Ein einzelner Ping mit kurzem Timeout; True bei Antwort."""
+    result = run(ns(["ping", "-c", "1", "-W", "1", address], namespace), check=False)
+    return result.returncode == 0
+
+
+def wg_selftest():
+    """
+    Baut über wireguard_backend einen Tunnel zu lab1 auf, wechselt auf lab2 und
+    prüft jeweils Handshake und Erreichbarkeit durch den Tunnel.
+    """
+    private_key, public_key = wireguard_backend.generate_keypair()
+    key_file = tempfile.NamedTemporaryFile("w", delete=False, prefix="vpnlab-", suffix=".key")
+    key_file.write(private_key + "\n")
+    key_file.close()
+    failures = 0
+    setup()
+    try:
+        servers = setup_wireguard_servers(public_key)
+        tunnel = wireguard_backend.new_tunnel(private_key_file=key_file.name, namespace=LAB_NS)
+        for server in servers + servers[:1]:
+            status, elapsed = wireguard_backend.connect(tunnel, server)
+            reachable = ping(WG_SERVER_ADDR)
+            print(f"{server['name']}\t{server['endpoint']}\t{status}\t{elapsed * 1000:.0f} ms\t"
+                  f"Ping: {'ok' if reachable else 'keine Antwort'}")
+            if status != "connected" or not reachable:
+                failures += 1
+        wireguard_backend.tunnel_down(tunnel)
+    finally:
+        os.unlink(key_file.name)
+        destroy()
+    print(f"WireGuard-Selbsttest: {'erfolgreich' if not failures else f'{failures} Fehler'}.")
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Network-Namespace-Labor für Killswitch-Tests.")
+    parser.add_argument("command", choices=["setup", "destroy", "tunnel-up", "tunnel-down", "traffic", "selftest", "wg-selftest"])
+    parser.add_argument("--duration", type=float, default=6.0, help="Dauer für traffic/selftest (s)")
+    parser.add_argument("--rate", type=float, default=500.0, help="Pakete pro Sekunde für traffic/selftest")
+    args = parser.parse_args()
+
+    if os.geteuid() != 0:
+        print("Fehler: Das Labor benötigt root-Rechte.")
+        sys.exit(1)
+
+    if args.command == "setup":
+        setup()
+    elif args.command == "destroy":
+        destroy()
+    elif args.command == "tunnel-up":
+        tunnel_up()
+    elif args.command == "tunnel-down":
+        tunnel_down()
+    elif args.command == "traffic":
+        subprocess.run(traffic_command(args.duration, args.rate))
+    elif args.command == "selftest":
+        sys.exit(selftest(args.duration, args.rate))
+    elif args.command == "wg-selftest":
+        sys.exit(wg_selftest())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Leak-Erkennung auf Paketebene (Linux, benötigt root bzw. CAP_NET_RAW).
+
+Statt die externe IP per HTTP abzufragen (wobei Leaks kürzer als der Abfrageabstand
+unbemerkt bleiben), wird das physische Interface mit einem AF_PACKET-Socket
+mitgeschnitten, während über die Anbieter-CLI verbunden, gewechselt und getrennt wird.
+Jedes ausgehende Paket, das nicht an einen erlaubten Endpunkt (VPN-Server) geht,
+wird mit Zeitstempel und Flow-Details als Leak markiert.
+
+Damit auch bei Leitungsrate nichts verloren geht, filtert ein klassisches
+BPF-Programm bereits im Kernel: Eingehende Pakete, ARP und der verschlüsselte
+Verkehr zu den Endpunkten werden dort verworfen, im Userspace kommen nur
+Leak-Kandidaten an. Die Zeitstempel stammen vom Kernel (SO_TIMESTAMPNS), verlorene
+Pakete meldet PACKET_STATISTICS.
+
+IPv6-Pakete werden immer als Leak gewertet, da die Tunnel nur IPv4-Endpunkte nutzen.
+
+Beispiele:
+  sudo ./packet_monitor.py --interface eth0 --provider nordvpn --from uk2242 --to uk2243
+  sudo ./packet_monitor.py --interface eth0 --endpoint 185.245.87.59 --duration 60
+"""
+import argparse
+import collections
+import ctypes
+import datetime
+import ipaddress
+import re
+import socket
+import struct
+import threading
+import time
+
+import providers
+
+ETH_P_ALL = 0x0003
+ETH_P_IP = 0x0800
+ETH_P_ARP = 0x0806
+ETH_P_IPV6 = 0x86DD
+PACKET_OUTGOING = 4
+SOL_PACKET = 263
+PACKET_STATISTICS = 6
+SO_ATTACH_FILTER = 26
+SO_RCVBUFFORCE = 33
+SO_TIMESTAMPNS = getattr(socket, "SO_TIMESTAMPNS", 35)
+
+# Klassisches BPF (linux/filter.h)
+BPF_LD_W_ABS = 0x20
+BPF_ALU_AND_K = 0x54
+BPF_JEQ_K = 0x15
+BPF_RET_K = 0x06
+SKF_AD_OFF = -0x1000
+SKF_AD_PROTOCOL = 0
+SKF_AD_PKTTYPE = 4
+
+# Es werden nur die ersten Bytes jedes Pakets übernommen (Header reichen für Flows)
+SNAPLEN = 128
+RECV_BUFFER = 32 * 1024 * 1024
+
+PROTOCOLS = {1: "ICMP", 6: "TCP", 17: "UDP", 58: "ICMPv6"}
+
+
+def build_filter(allowed_networks):
+    """
+    Erzeugt das BPF-Programm (Liste von (code, jt, jf, k)).
+    Sprungziele werden symbolisch als "ACCEPT"/"DROP" angegeben und am Ende aufgelöst.
+    Der Filter arbeitet auf SOCK_DGRAM, d. h. Offset 0 ist der Beginn des IP-Headers.
+    """
+    program = [
+        (BPF_LD_W_ABS, 0, 0, SKF_AD_OFF + SKF_AD_PKTTYPE),
+        (BPF_JEQ_K, 0, "DROP", PACKET_OUTGOING),
+        (BPF_LD_W_ABS, 0, 0, SKF_AD_OFF + SKF_AD_PROTOCOL),
+        (BPF_JEQ_K, "DROP", 0, ETH_P_ARP),
+        (BPF_JEQ_K, 0, "ACCEPT", ETH_P_IP),
+    ]
+    for network in allowed_networks:
+        net = int(network.network_address)
+        mask = int(network.netmask)
+        # Ziel-IP des IPv4-Headers laden (Offset 16)
+        program.append((BPF_LD_W_ABS, 0, 0, 16))
+        if mask != 0xFFFFFFFF:
+            program.append((BPF_ALU_AND_K, 0, 0, mask))
+        program.append((BPF_JEQ_K, "DROP", 0, net))
+    program.append((BPF_RET_K, 0, 0, SNAPLEN))   # ACCEPT
+    program.append((BPF_RET_K, 0, 0, 0))         # DROP
+    labels = {"ACCEPT": len(program) - 2, "DROP": len(program) - 1}
+
+    resolved = []
+    for index, (code, jt, jf, k) in enumerate(program):
+        if isinstance(jt, str):
+            jt = labels[jt] - index - 1
+        if isinstance(jf, str):
+            jf = labels[jf] - index - 1
+        if jt > 255 or jf > 255:
+            raise ValueError("Zu viele erlaubte Netze für einen BPF-Sprung")
+        resolved.append((code, jt, jf, k & 0xFFFFFFFF))
+    return resolved
+
+
+def attach_filter(sock, program):
+    """Hängt das BPF-Programm per SO_ATTACH_FILTER an den Socket."""
+    raw = b"".join(struct.pack("HBBI", *instruction) for instruction in program)
+    buffer = ctypes.create_string_buffer(raw)
+    fprog = struct.pack("HL", len(program), ctypes.addressof(buffer))
+    sock.setsockopt(socket.SOL_SOCKET, SO_ATTACH_FILTER, fprog)
+    return buffer  # muss bis zum setsockopt-Aufruf am Leben bleiben
+
+
+def open_capture(interface, allowed_networks):
+    """
+    Öffnet den AF_PACKET-Socket. Der Filter wird vor dem bind() gesetzt, damit
+    keine ungefilterten Pakete in der Empfangswarteschlange landen.
+    """
+    sock = socket.socket(socket.AF_PACKET, socket.SOCK_DGRAM, 0)
+    attach_filter(sock, build_filter(allowed_networks))
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, SO_RCVBUFFORCE, RECV_BUFFER)
+    except OSError:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECV_BUFFER)
+    sock.setsockopt(socket.SOL_SOCKET, SO_TIMESTAMPNS, 1)
+    sock.bind((interface, ETH_P_ALL))
+    sock.settimeout(0.2)
+    return sock
+
+
+def read_statistics(sock):
+    """Liest (und setzt zurück) die Kernel-Zähler: (empfangen, verworfen)."""
+    data = sock.getsockopt(SOL_PACKET, PACKET_STATISTICS, 8)
+    return struct.unpack("II", data)
+
+
+def capture_loop(sock, packets, stats, stop_event):
+    """Liest Pakete, bis stop_event gesetzt ist. Ausgewertet wird erst danach."""
+    ancillary_size = socket.CMSG_SPACE(16)
+    while not stop_event.is_set():
+        try:
+            data, ancillary, _, address = sock.recvmsg(SNAPLEN, ancillary_size)
+        except socket.timeout:
+            continue
+        timestamp = None
+        for level, kind, value in ancillary:
+            if level == socket.SOL_SOCKET and kind == SO_TIMESTAMPNS:
+                seconds, nanoseconds = struct.unpack("qq", value[:16])
+                timestamp = seconds + nanoseconds / 1e9
+        packets.append((timestamp or time.time(), address[1], data))
+    received, dropped = read_statistics(sock)
+    stats["received"] += received
+    stats["dropped"] += dropped
+
+
+def parse_packet(protocol, data):
+    """Zerlegt den IP-Header: liefert (Protokoll, Quelle, Ziel, Quellport, Zielport, Länge)."""
+    if protocol == ETH_P_IP and len(data) >= 20:
+        header_length = (data[0] & 0x0F) * 4
+        proto = data[9]
+        length = struct.unpack("!H", data[2:4])[0]
+        src = str(ipaddress.IPv4Address(data[12:16]))
+        dst = str(ipaddress.IPv4Address(data[16:20]))
+        ports = data[header_length:header_length + 4]
+    elif protocol == ETH_P_IPV6 and len(data) >= 40:
+        header_length = 40
+        proto = data[6]
+        length = struct.unpack("!H", data[4:6])[0] + 40
+        src = str(ipaddress.IPv6Address(data[8:24]))
+        dst = str(ipaddress.IPv6Address(data[24:40]))
+        ports = data[40:44]
+    else:
+        return (f"0x{protocol:04x}", "-", "-", None, None, len(data))
+    sport = dport = None
+    if proto in (6, 17) and len(ports) == 4:
+        sport, dport = struct.unpack("!HH", ports)
+    return (PROTOCOLS.get(proto, str(proto)), src, dst, sport, dport, length)
+
+
+def format_timestamp(wall):
+    """Zeitstempel wie in den Killswitch-Logs, aber mit Mikrosekunden."""
+    return datetime.datetime.fromtimestamp(wall).strftime("%H:%M:%S.%f")
+
+
+def format_endpoint(address, port):
+    """Adresse mit optionalem Port."""
+    if port is None:
+        return address
+    return f"[{address}]:{port}" if ":" in address else f"{address}:{port}"
+
+
+def phase_at(events, timestamp):
+    """Liefert die zum Zeitpunkt gültige Phase (letztes Ereignis davor)."""
+    phase = "-"
+    for wall, text in events:
+        if wall > timestamp:
+            break
+        phase = text
+    return phase
+
+
+def write_report(packets, events, stats, allowed_networks, filename):
+    """Schreibt alle Leak-Pakete, eine Flow-Zusammenfassung und die Statistik."""
+    flows = collections.OrderedDict()
+    with open(filename, "w") as f:
+        f.write(f"# Erlaubte Endpunkte: {', '.join(str(n) for n in allowed_networks) or '-'}\n")
+        f.write("#\tZeit\tPhase\tProtokoll\tQuelle\tZiel\tLänge\n")
+        for timestamp, protocol, data in packets:
+            proto, src, dst, sport, dport, length = parse_packet(protocol, data)
+            phase = phase_at(events, timestamp)
+            f.write(
+                f"LEAK\t{format_timestamp(timestamp)}\t{phase}\t{proto}\t"
+                f"{format_endpoint(src, sport)}\t{format_endpoint(dst, dport)}\t{length}\n"
+            )
+            key = (proto, dst, dport)
+            flow = flows.setdefault(key, {"first": timestamp, "last": timestamp, "packets": 0, "bytes": 0})
+            flow["last"] = timestamp
+            flow["packets"] += 1
+            flow["bytes"] += length
+        f.write("\n#\tProtokoll\tZiel\tErstes Paket\tLetztes Paket\tPakete\tBytes\n")
+        for (proto, dst, dport), flow in flows.items():
+            f.write(
+                f"FLOW\t{proto}\t{format_endpoint(dst, dport)}\t{format_timestamp(flow['first'])}\t"
+                f"{format_timestamp(flow['last'])}\t{flow['packets']}\t{flow['bytes']}\n"
+            )
+        f.write("\n#\tZeit\tEreignis\n")
+        for wall, text in events:
+            f.write(f"EVENT\t{format_timestamp(wall)}\t{text}\n")
+        f.write(f"\nKernel: {stats['received']} Pakete an den Socket geliefert, {stats['dropped']} verworfen\n")
+    return flows
+
+
+def ipv4_networks(values):
+    """Netze zu Adressen bzw. CIDR-Angaben; ValueError bei ungültigen oder IPv6-Werten."""
+    networks = []
+    for value in values:
+        network = ipaddress.ip_network(value, strict=False)
+        if network.version != 4:
+            raise ValueError(f"{value}: nur IPv4 möglich (die Tunnel nutzen nur IPv4-Endpunkte)")
+        networks.append(network)
+    return networks
+
+
+def resolve_endpoint(provider, target):
+    """Löst NordVPN-Hostnamen (z. B. "uk2242") zur Server-IP auf, sonst None."""
+    if provider != "nordvpn" or not re.match(r"^[a-z]{2}\d+$", target):
+        return None
+    try:
+        return socket.gethostbyname(f"{target}.nordvpn.com")
+    except OSError:
+        return None
+
+
+def run_provider_scenario(args, events):
+    """Verbinden, Wechseln und Trennen über die Anbieter-CLI, mit Ereignis-Markern."""
+    settle = providers.SETTLE_SECONDS[args.provider]
+    events.append((time.time(), f"Verbinde mit {args.source}"))
+    status = providers.connect_vpn(args.provider, args.source)
+    events.append((time.time(), f"Verbunden mit {args.source} ({status})"))
+    time.sleep(settle)
+    events.append((time.time(), f"Wechsel auf {args.target}"))
+    if args.provider in providers.SWITCH_NEEDS_DISCONNECT:
+        providers.disconnect_vpn(args.provider)
+    status = providers.connect_vpn(args.provider, args.target)
+    events.append((time.time(), f"Verbunden mit {args.target} ({status})"))
+    time.sleep(settle)
+    events.append((time.time(), "Trenne"))
+    providers.disconnect_vpn(args.provider)
+    events.append((time.time(), "Getrennt"))
+    time.sleep(args.after)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Leak-Erkennung per AF_PACKET-Mitschnitt.")
+    parser.add_argument("--interface", required=True, help="Physisches Interface, z. B. eth0")
+    parser.add_argument("--endpoint", action="append", default=[], help="Erlaubte Endpunkt-IP (VPN-Server)")
+    parser.add_argument("--allow", action="append", default=[], help="Zusätzlich erlaubtes Netz (CIDR)")
+    parser.add_argument("--provider", choices=sorted(providers.SETTLE_SECONDS))
+    parser.add_argument("--from", dest="source", help="Startserver")
+    parser.add_argument("--to", dest="target", help="Zielserver")
+    parser.add_argument("--after", type=float, default=5.0, help="Mitschnitt nach dem Trennen (s)")
+    parser.add_argument("--duration", type=float, default=0.0, help="Nur mitschneiden, Dauer in s")
+    parser.add_argument("--output", help="Ergebnisdatei")
+    args = parser.parse_args()
+
+    if args.provider and not (args.source and args.target):
+        parser.error("--provider erfordert --from und --to")
+    if not args.provider and args.duration <= 0:
+        parser.error("Entweder --provider oder --duration angeben")
+    try:
+        allowed_networks = ipv4_networks(args.endpoint + args.allow)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.provider:
+        for target in (args.source, args.target):
+            address = resolve_endpoint(args.provider, target)
+            if address:
+                print(f"Endpunkt {target}: {address}")
+                allowed_networks += ipv4_networks([address])
+
+    today = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    output_file = args.output or f"PacketLeaks_{args.interface}_{today}.txt"
+
+    sock = open_capture(args.interface, allowed_networks)
+    # Zähler vor Beginn zurücksetzen
+    read_statistics(sock)
+    packets = []
+    events = []
+    stats = {"received": 0, "dropped": 0}
+    stop_event = threading.Event()
+    thread = threading.Thread(target=capture_loop, args=(sock, packets, stats, stop_event), daemon=True)
+    thread.start()
+    print(f"Mitschnitt auf {args.interface} gestartet ...")
+    events.append((time.time(), "Mitschnitt gestartet"))
+    try:
+        if args.provider:
+            run_provider_scenario(args, events)
+        else:
+            time.sleep(args.duration)
+    finally:
+        stop_event.set()
+        thread.join()
+        sock.close()
+
+    flows = write_report(packets, events, stats, allowed_networks, output_file)
+    print(f"{len(packets)} Leak-Pakete in {len(flows)} Flows, {stats['dropped']} im Kernel verworfen.")
+    for (proto, dst, dport), flow in flows.items():
+        print(f"  {proto} -> {format_endpoint(dst, dport)}: {flow['packets']} Pakete")
+    print(f"Ergebnisse wurden in '{output_file}' gespeichert.")
+
+
+if __name__ == "__main__":
+    main()
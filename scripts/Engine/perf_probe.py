@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Leistungsmessung durch den bestehenden Tunnel: Durchsatz, RTT und Jitter.
+
+Für Streaming reicht "Available" allein nicht - der Server muss auch HD-Video
+tragen. Gemessen wird gegen ein einstellbares Ziel (in Tests z. B. ein lokaler
+HTTP-Server), jeweils mit begrenzter Dauer:
+  - Durchsatz: Download per curl (--max-time), Ergebnis in Mbit/s
+  - RTT:       count TCP-Handshakes zum Ziel, Median in ms
+  - Jitter:    mittlere Differenz aufeinanderfolgender RTTs (wie RFC 3550)
+
+Im Sweep läuft die Messung als Nebenprüfung (siehe sweep.py, --perf) parallel zur
+Dienstprüfung, sodass der Zyklus je Server kaum länger wird.
+
+Beispiel (bei bestehender VPN-Verbindung):
+  ./perf_probe.py --url http://127.0.0.1:8000/testfile --rtt-host 127.0.0.1 --rtt-port 8000
+"""
+import argparse
+import asyncio
+import statistics
+import subprocess
+import urllib.parse
+
+import latency_scan
+
+DEFAULT_URL = "https://speed.cloudflare.com/__down?bytes=25000000"
+DEFAULT_MAX_SECONDS = 8.0
+DEFAULT_RTT_COUNT = 10
+DEFAULT_RTT_INTERVAL = 0.1
+# Zeitlimit je Handshake; die ganze RTT-Serie ist zusätzlich auf max_seconds begrenzt
+DEFAULT_RTT_TIMEOUT = 1.0
+# Netflix/Peacock empfehlen für HD etwa 5 Mbit/s
+DEFAULT_HD_MBPS = 5.0
+
+COLUMNS = ["Download (Mbit/s)", "RTT (ms)", "Jitter (ms)", "HD"]
+
+
+def measure_throughput(url, max_seconds):
+    """Lädt url höchstens max_seconds lang und liefert die Rate in Mbit/s (None bei Fehler)."""
+    result = subprocess.run(
+        ["curl", "-s", "-o", "/dev/null", "--max-time", str(max_seconds),
+         "-w", "%{speed_download} %{size_download}", url],
+        capture_output=True, text=True
+    )
+    parts = result.stdout.split()
+    if len(parts) != 2 or float(parts[1]) == 0:
+        return None
+    # Abbruch durch --max-time (Rückgabewert 28) ist gewollt: die Rate bis dahin zählt
+    return float(parts[0]) * 8 / 1e6
+
+
+async def measure_rtts(host, port, count, interval, timeout, rtts=None):
+    """
+    count TCP-Handshakes im Abstand interval; liefert die gültigen RTTs in ms. Mit
+    rtts werden sie dort angehängt, sodass sie auch bei einem Abbruch erhalten bleiben.
+    """
+    rtts = [] if rtts is None else rtts
+    for _ in range(count):
+        _, rtt = await latency_scan.measure_tcp(host, port, timeout)
+        if rtt is not None:
+            rtts.append(rtt)
+        await asyncio.sleep(interval)
+    return rtts
+
+
+def jitter(rtts):
+    """Mittlere absolute Differenz aufeinanderfolgender RTTs."""
+    if len(rtts) < 2:
+        return None
+    return statistics.mean(abs(b - a) for a, b in zip(rtts, rtts[1:]))
+
+
+def default_rtt_target(url):
+    """Host und Port der Download-URL als RTT-Ziel."""
+    parsed = urllib.parse.urlparse(url)
+    port = parsed.port or (443 if parsed.scheme == "https" else 80)
+    return parsed.hostname, port
+
+
+def run_probe(url=DEFAULT_URL, max_seconds=DEFAULT_MAX_SECONDS, rtt_host=None, rtt_port=None,
+              rtt_count=DEFAULT_RTT_COUNT, rtt_interval=DEFAULT_RTT_INTERVAL, hd_mbps=DEFAULT_HD_MBPS):
+    """
+    Führt alle Messungen aus und liefert ein Dict mit den Spalten aus COLUMNS.
+    RTT und Download laufen dabei gleichzeitig und sind beide auf max_seconds
+    begrenzt (die RTT-Serie wird danach mit den bis dahin gemessenen Werten beendet).
+    """
+    host, port = default_rtt_target(url)
+    host = rtt_host or host
+    port = rtt_port or port
+
+    rtts = []
+
+    async def series():
+        timeout = min(DEFAULT_RTT_TIMEOUT, max_seconds)
+        try:
+            await asyncio.wait_for(measure_rtts(host, port, rtt_count, rtt_interval, timeout, rtts), max_seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def both():
+        download = asyncio.to_thread(measure_throughput, url, max_seconds)
+        mbps, _ = await asyncio.gather(download, series())
+        return mbps
+
+    mbps = asyncio.run(both())
+    rtt = statistics.median(rtts) if rtts else None
+    jitter_ms = jitter(rtts)
+    return {
+        "Download (Mbit/s)": "" if mbps is None else f"{mbps:.1f}",
+        "RTT (ms)": "" if rtt is None else f"{rtt:.1f}",
+        "Jitter (ms)": "" if jitter_ms is None else f"{jitter_ms:.1f}",
+        "HD": "ja" if mbps is not None and mbps >= hd_mbps else "nein",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Durchsatz, RTT und Jitter der aktuellen Verbindung messen.")
+    parser.add_argument("--url", default=DEFAULT_URL, help="Download-Ziel")
+    parser.add_argument("--max-seconds", type=float, default=DEFAULT_MAX_SECONDS)
+    parser.add_argument("--rtt-host", help="Ziel der RTT-Messung (Standard: Host der URL)")
+    parser.add_argument("--rtt-port", type=int, help="Port der RTT-Messung")
+    parser.add_argument("--rtt-count", type=int, default=DEFAULT_RTT_COUNT)
+    parser.add_argument("--hd-mbps", type=float, default=DEFAULT_HD_MBPS, help="Schwelle für HD in Mbit/s")
+    args = parser.parse_args()
+
+    result = run_probe(args.url, args.max_seconds, args.rtt_host, args.rtt_port,
+                       args.rtt_count, DEFAULT_RTT_INTERVAL, args.hd_mbps)
+    for column in COLUMNS:
+        print(f"{column}: {result[column] or '-'}")
+
+
+if __name__ == "__main__":
+    main()
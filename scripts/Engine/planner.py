@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Sweep mit Zeitbudget: die nützlichsten Server zuerst, pünktlich fertig.
+
+Ein vollständiger Sweep (z. B. NordVPN USA für Peacock) dauert oft deutlich länger
+als das verfügbare Zeitfenster. Hier wird für jeden Server abgewogen:
+  Kosten  erwartete Dauer eines Tests von Verbinden bis Trennen aus den gelernten
+          Zeiten (timings.expected(), ohne Messungen die festen Vorgaben) plus die
+          Pause zwischen zwei Servern
+  Nutzen  nie getestet: NEVER_TESTED_VALUE; sonst (1 + Alter des letzten
+          eindeutigen Ergebnisses / STALE_DAYS, höchstens MAX_STALENESS) *
+          (FLIP_BASE + Wechselrate der bisherigen Ergebnisse), dazu
+          COVERAGE_VALUE / (1 + getestete Server derselben Stadt in diesem Lauf)
+Vor jedem Server wird neu geplant (sweep.run_budget()): Unter den Servern, deren
+erwartete Dauer noch ins Restbudget passt, kommt der mit dem höchsten Nutzen je
+Sekunde an die Reihe.
+Die gelernten Zeiten werden dabei laufend fortgeschrieben, sodass langsame Server
+im Lauf teurer werden. Nutzen und Kosten je Server werden zwischengespeichert und
+nach einem Test nur für den getesteten Server und für Server ohne eigene Messungen
+in allen Phasen (die auf die Werte des Anbieters zurückgreifen) neu berechnet
+(forget()). Überzieht ein Server das Budget, bricht der Sweep ihn zwischen zwei
+Phasen ab; er wird ebenfalls zurückgestellt. Was nicht mehr passt, wird als "Skipped (Deferred)" in die
+Ergebnisdatei und mit Nutzen und Kosten in eine eigene Liste geschrieben.
+
+Die Vorgeschichte stammt aus früheren Ergebnisdateien (Schema von sweep.py bzw. der
+Einzelskripte, Datum im Dateinamen wie snapshot_archive.parse_filename()).
+
+Beispiele:
+  ./sweep.py --provider nordvpn --service peacock --budget 120 --timings timings.txt \\
+      --history ../../results/NordVPN/Peacock/results/*.txt
+  ./planner.py --provider nordvpn --service peacock --budget 120 --timings timings.txt \\
+      --history ../../results/NordVPN/Peacock/results/*.txt
+"""
+import argparse
+import datetime
+
+import catalogue
+import probes
+import providers
+import snapshot_archive
+import timings
+
+NEVER_TESTED_VALUE = 3.0
+STALE_DAYS = 7.0
+MAX_STALENESS = 5.0
+FLIP_BASE = 0.5
+COVERAGE_VALUE = 1.0
+DEFAULT_CONNECT = 5.0
+DEFAULT_IP = 1.0
+DEFAULT_PROBE = 10.0
+DEFAULT_DISCONNECT = 2.0
+# Pause zwischen zwei Servern (sweep.PAUSE_SECONDS)
+PAUSE_SECONDS = 2
+DEFERRED_HEADER = "Server\tStadt\tNutzen\tErwartete Dauer (s)\n"
+DEFERRED_RESULT = "Skipped (Deferred)"
+
+
+def load_history(filenames):
+    """{Server: [(Datum, Ergebnis)]} aus früheren Ergebnisdateien, nach Datum sortiert."""
+    history = {}
+    for filename in filenames:
+        _, date = snapshot_archive.parse_filename(filename)
+        if not date:
+            continue
+        with open(filename, "r", errors="replace") as f:
+            lines = [line.rstrip("\n").split("\t") for line in f if line.strip()]
+        if not lines:
+            continue
+        column = lines[0].index("Ergebnis") if "Ergebnis" in lines[0] else -1
+        for parts in lines[1:]:
+            result = parts[column] if len(parts) > max(column, 0) else ""
+            if not result or result.startswith("Skipped") or probes.is_inconclusive(result):
+                continue
+            history.setdefault(parts[0], []).append((date, result))
+    for entries in history.values():
+        entries.sort()
+    return history
+
+
+def flip_rate(entries):
+    """Anteil der Wechsel zwischen aufeinanderfolgenden Ergebnissen ("Degraded (...)" zählt als Degraded)."""
+    states = [result.split(" (")[0] for _, result in entries]
+    if len(states) < 2:
+        return 0.0
+    return sum(1 for a, b in zip(states, states[1:]) if a != b) / (len(states) - 1)
+
+
+def base_value(entries, today):
+    """Nutzen eines Servers ohne den Anteil der Abdeckung."""
+    if not entries:
+        return NEVER_TESTED_VALUE
+    last = datetime.date.fromisoformat(entries[-1][0])
+    age = (today - last).days
+    return min(1 + age / STALE_DAYS, MAX_STALENESS) * (FLIP_BASE + flip_rate(entries))
+
+
+def area(server):
+    """Stadt des Servers (NordVPN: aus der API); ersatzweise Adresse bzw. Land."""
+    return server.get("city") or server.get("station") or server["country"]
+
+
+def default_cost(session):
+    return {"connect": DEFAULT_CONNECT, "settle": session["settle"], "ip": DEFAULT_IP,
+            "probe": DEFAULT_PROBE, "disconnect": DEFAULT_DISCONNECT}
+
+
+def candidates(session, pending, history, covered, today, pause=PAUSE_SECONDS, cache=None):
+    """
+    [(Nutzen, Kosten, Server)] aller noch offenen Server; covered zählt getestete
+    Server je Stadt. cache ({Server: (Nutzen ohne Abdeckung, Kosten, eigene Zeiten)})
+    wird gefüllt und weiterverwendet (siehe forget()).
+    """
+    cache = {} if cache is None else cache
+    learned, default = session["timings"], default_cost(session)
+    result = []
+    for server in pending:
+        entry = cache.get(server["name"])
+        if entry is None:
+            entry = (base_value(history.get(server["name"], ()), today),
+                     timings.expected(learned, session, server["name"], default) + pause,
+                     timings.learned_all(learned, session, server["name"]))
+            cache[server["name"]] = entry
+        value = entry[0] + COVERAGE_VALUE / (1 + covered.get(area(server), 0))
+        result.append((value, entry[1], server))
+    return result
+
+
+def forget(cache, server):
+    """Nach dem Test von server: seine Kosten und die aller Server ohne eigene Zeiten neu berechnen."""
+    cache.pop(server["name"], None)
+    for name in [name for name, entry in cache.items() if not entry[2]]:
+        del cache[name]
+
+
+def choose(options, remaining):
+    """Höchster Nutzen je Sekunde unter den Servern, die ins Restbudget passen; sonst None."""
+    fitting = [option for option in options if option[1] <= remaining]
+    if not fitting:
+        return None
+    return max(fitting, key=lambda option: option[0] / option[1])
+
+
+def plan(session, servers, budget, history, today=None):
+    """Vorschau: (Reihenfolge [(Nutzen, Kosten, Server)], zurückgestellte) ohne zu verbinden."""
+    today = today or datetime.date.today()
+    pending, covered, ordered, remaining, cache = list(servers), {}, [], budget, {}
+    while pending:
+        option = choose(candidates(session, pending, history, covered, today, cache=cache), remaining)
+        if option is None:
+            break
+        ordered.append(option)
+        remaining -= option[1]
+        pending.remove(option[2])
+        covered[area(option[2])] = covered.get(area(option[2]), 0) + 1
+    return ordered, candidates(session, pending, history, covered, today, cache=cache)
+
+
+def write_deferred(filename, deferred):
+    """Liste der zurückgestellten Server, nützlichste zuerst."""
+    with open(filename, "w") as f:
+        f.write(DEFERRED_HEADER)
+        for value, cost, server in deferred:
+            f.write(f"{server['name']}\t{area(server)}\t{value:.2f}\t{cost:.0f}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vorschau des Plans für einen Sweep mit Zeitbudget.")
+    parser.add_argument("--provider", required=True, choices=sorted(providers.DISPLAY_NAMES))
+    parser.add_argument("--service", required=True, choices=sorted(probes.SERVICES))
+    parser.add_argument("--country", help="Ländercode der Server (Standard: Land des Dienstes)")
+    parser.add_argument("--backend", default="cli", choices=["cli", "wireguard", "openvpn"])
+    parser.add_argument("--configs", help="ProtonVPN: Verzeichnis mit .ovpn- bzw. .conf-Dateien")
+    parser.add_argument("--catalogue", help="WireGuard: Katalogdatei (siehe wireguard_backend.py)")
+    parser.add_argument("--list", help="Gespeicherte Serverliste statt Abruf (siehe catalogue.parse_server_list())")
+    parser.add_argument("--budget", type=float, required=True, help="Zeitbudget (min)")
+    parser.add_argument("--timings", help="Datei der gelernten Zeiten (siehe timings.py)")
+    parser.add_argument("--history", nargs="*", default=[], help="Frühere Ergebnisdateien")
+    args = parser.parse_args()
+
+    country = args.country or probes.SERVICES[args.service]["country"]
+    session = providers.open_session(args.provider, args.backend, configs=args.configs, catalogue=args.catalogue)
+    session["timings"] = timings.load(args.timings)
+    if args.list:
+        servers = catalogue.parse_server_list(args.list, args.provider, country)
+    else:
+        servers = providers.fetch_servers(session, country)
+    ordered, deferred = plan(session, servers, args.budget * 60, load_history(args.history))
+    for value, cost, server in ordered:
+        print(f"{server['name']}\t{area(server)}\t{value:.2f}\t{cost:.0f} s")
+    total = sum(cost for _, cost, _ in ordered)
+    print(f"{len(ordered)} Server in {total / 60:.1f} min geplant, {len(deferred)} zurückgestellt.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Prüfungen, die bei bestehender VPN-Verbindung ausgeführt werden.
+
+check_peacock() und check_bbc_iplayer() entsprechen den gleichnamigen Funktionen
+der Einzelskripte unter scripts/<Anbieter>/. Selenium wird nur für BBC iPlayer
+benötigt und erst beim Aufruf importiert.
+
+Ergebnisse sind "Available", "Blocked" oder "Inconclusive (Grund)", wenn die
+Prüfung selbst gescheitert ist (curl-Fehler, leere Antwort, Serverfehler, Absturz
+des Browsers). Die Einzelskripte werten eine leere effektive URL noch als
+"Available"; hier landet so ein Server in der Wiederholungsschlange des Sweeps.
+
+Der Browser für BBC iPlayer lädt nur, was für die Prüfung nötig ist: Bilder,
+Videos, Schriften und bekannte Tracker werden per DevTools-Protokoll blockiert, und
+das Laden wird abgebrochen, sobald der Blockierungshinweis oder die iPlayer-Seite
+da ist (statt pauschal 5 Sekunden zu warten).
+
+Zu jedem Dienst gibt es zusätzlich eine Prüfung auf Wiedergabe-Ebene
+("manifest_check", siehe manifest_probe.py). Sie liefert (Ergebnis, Zusatzspalten)
+statt nur des Ergebnistexts.
+"""
+import queue
+import subprocess
+import time
+
+import exit_ip
+import manifest_probe
+
+BBC_IPLAYER_URL = "https://www.bbc.co.uk/iplayer"
+BBC_IPLAYER_BLOCKED = "Sorry, BBC iPlayer isn’t available in your region."
+# Nur auf der freigeschalteten Seite: Links auf einzelne Sendungen ("iPlayer" allein
+# steht auch im Blockierungshinweis)
+BBC_IPLAYER_MARKER = "/iplayer/episode/"
+# Höchstens so lange wird auf eine Entscheidung gewartet; nach dem vollständigen
+# Laden (readyState "complete") noch grace Sekunden, falls der Blockierungshinweis
+# per Skript eingeblendet wird
+BBC_IPLAYER_TIMEOUT = 15
+BBC_IPLAYER_GRACE = 2.0
+BROWSER_POLL_INTERVAL = 0.2
+# Vom Browser nicht geladene Anfragen (Muster für Network.setBlockedURLs)
+BLOCKED_URL_PATTERNS = [
+    "*.jpg*", "*.jpeg*", "*.png*", "*.gif*", "*.webp*", "*.avif*", "*.svg*", "*.ico*",
+    "*.woff*", "*.ttf*", "*.otf*", "*.mp4*", "*.m4s*", "*.webm*", "*.mp3*",
+    "*ichef.bbci.co.uk*", "*vod-*.akamaized.net*",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*scorecardresearch.com*",
+    "*chartbeat.com*", "*chartbeat.net*", "*optimizely.com*", "*facebook.net*", "*hotjar.com*",
+    "*permutive.com*", "*adobedtm.com*", "*omtrdc.net*",
+]
+PEACOCK_URL = "https://www.peacocktv.com"
+INCONCLUSIVE = "Inconclusive"
+
+# Im Voraus gestarteter Browser für die nächste iPlayer-Prüfung (siehe warm_browser())
+_spare_browsers = queue.Queue(maxsize=1)
+
+
+def inconclusive(reason):
+    """Ergebnistext einer Prüfung ohne verwertbare Antwort."""
+    return f"{INCONCLUSIVE} ({reason})"
+
+
+def is_inconclusive(result):
+    """True für unentschiedene Ergebnisse, auch "Error (...)" der Prüfung auf Wiedergabe-Ebene."""
+    return result.startswith(INCONCLUSIVE) or result.startswith("Error")
+
+
+def check_external_ip(endpoints=exit_ip.DEFAULT_ENDPOINTS):
+    """
+    Ruft die externe IP ab; mehrere Echo-Dienste (z. B. ip.me) werden gleichzeitig
+    gefragt, die erste gültige Antwort zählt (siehe exit_ip.py). Liefert "" ohne Antwort.
+    """
+    ip, _ = exit_ip.lookup_exit_ip(endpoints)
+    return ip or ""
+
+
+def check_peacock():
+    """
+    Ruft mit curl die finale URL von https://www.peacocktv.com ab.
+    Wird in der effektiven URL der Pfad '/unavailable' gefunden, gilt Peacock als blockiert.
+    Scheitert curl oder antwortet der Server mit einem Fehler, ist das Ergebnis unentschieden.
+    """
+    result = subprocess.run(
+        ["curl", "-s", "-o", "/dev/null", "-w", "%{http_code} %{url_effective}", "-L", PEACOCK_URL],
+        capture_output=True, text=True
+    )
+    code, _, effective_url = result.stdout.strip().partition(" ")
+    if "/unavailable" in effective_url:
+        return "Blocked"
+    if result.returncode != 0 or not effective_url:
+        return inconclusive(f"curl {result.returncode}")
+    if code.startswith("5") or code in ("000", "429"):
+        return inconclusive(f"HTTP {code}")
+    return "Available"
+
+
+def start_browser():
+    """
+    Startet einen Headless Chrome (via Selenium), der Bilder, Medien, Schriften und
+    Tracker nicht lädt. driver.get() kehrt sofort zurück (pageLoadStrategy "none");
+    gewartet wird in wait_for_iplayer().
+    """
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+    chrome_options.add_argument("--autoplay-policy=user-gesture-required")
+    chrome_options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    chrome_options.page_load_strategy = "none"
+    driver = webdriver.Chrome(options=chrome_options)
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+    return driver
+
+
+def wait_for_iplayer(driver, timeout=BBC_IPLAYER_TIMEOUT, grace=BBC_IPLAYER_GRACE):
+    """
+    Wartet, bis der Blockierungshinweis erscheint oder die iPlayer-Seite aufgebaut ist
+    (vollständig geladen, Marker vorhanden, danach grace Sekunden ohne Hinweis), und
+    bricht das weitere Laden ab. Liefert (Seitenquelle, True bei Zeitüberschreitung
+    ohne Entscheidung).
+    """
+    script = (
+        "const html = document.documentElement ? document.documentElement.innerHTML : '';"
+        "return [document.readyState, html.includes(arguments[0]), html.includes(arguments[1])];"
+    )
+    deadline = time.monotonic() + timeout
+    ready_since = None
+    timed_out = True
+    while time.monotonic() < deadline:
+        state, blocked, marker = driver.execute_script(script, BBC_IPLAYER_BLOCKED, BBC_IPLAYER_MARKER)
+        if blocked:
+            timed_out = False
+            break
+        if ready_since is None and marker and state == "complete":
+            ready_since = time.monotonic()
+        if ready_since is not None and time.monotonic() - ready_since >= grace:
+            timed_out = False
+            break
+        time.sleep(BROWSER_POLL_INTERVAL)
+    driver.execute_script("window.stop();")
+    return driver.page_source, timed_out
+
+
+def warm_browser():
+    """
+    Startet einen Browser für die nächste Prüfung im Voraus, damit dessen Startzeit
+    nicht zwischen zwei Servern anfällt. Es wird höchstens ein Browser vorgehalten.
+    """
+    if _spare_browsers.full():
+        return
+    driver = start_browser()
+    try:
+        _spare_browsers.put_nowait(driver)
+    except queue.Full:
+        driver.quit()
+
+
+def close_spare_browser():
+    """Beendet einen nicht mehr benötigten, vorab gestarteten Browser."""
+    try:
+        _spare_browsers.get_nowait().quit()
+    except queue.Empty:
+        pass
+
+
+def check_bbc_iplayer():
+    """
+    Startet einen Headless Chrome (via Selenium) und lädt die BBC iPlayer-Seite ohne
+    Bilder, Medien und Tracker (siehe start_browser() und wait_for_iplayer()).
+    Wird in der Seitenquelle der Blockierungshinweis gefunden, gilt der Test als "Blocked".
+    Fehlt die iPlayer-Seite ganz (Browserfehler, Fehlerseite) oder fällt bis zum Zeitlimit
+    keine Entscheidung, ist das Ergebnis unentschieden.
+    """
+    from selenium.common.exceptions import WebDriverException
+
+    try:
+        driver = _spare_browsers.get_nowait()
+    except queue.Empty:
+        driver = start_browser()
+    try:
+        driver.get(BBC_IPLAYER_URL)
+        page_source, timed_out = wait_for_iplayer(driver)
+    except WebDriverException as e:
+        return inconclusive(e.msg or type(e).__name__)
+    finally:
+        driver.quit()
+    if BBC_IPLAYER_BLOCKED in page_source:
+        return "Blocked"
+    if "captcha" in page_source.lower():
+        return inconclusive("Captcha")
+    if timed_out:
+        return inconclusive("Zeitüberschreitung beim Laden")
+    if BBC_IPLAYER_MARKER not in page_source:
+        return inconclusive("iPlayer-Seite nicht geladen")
+    return "Available"
+
+
+# Dienst -> Anzeigename (für Dateinamen), Land der Server, Domain (für rate_limit.py),
+# Prüffunktionen und ggf. Vorbereitung der nächsten Prüfung ("warm", siehe sweep.py --pipeline)
+SERVICES = {
+    "peacock": {"label": "Peacock", "country": "us", "domain": "peacocktv.com", "check": check_peacock,
+                "manifest_check": manifest_probe.check_peacock_manifest},
+    "bbciplayer": {"label": "BBCiPlayer", "country": "gb", "domain": "bbc.co.uk", "check": check_bbc_iplayer,
+                   "manifest_check": manifest_probe.check_bbc_iplayer_manifest, "warm": warm_browser},
+}
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Live-Fortschritt eines Sweeps über einen lokalen HTTP-Endpunkt (JSON).
+
+Während eines mehrstündigen Laufs gibt es sonst nur die fortlaufende Ausgabe
+("Verbinde mit uk2242 ..."). Mit --status-port hält sweep.py einen Tracker, den die
+Sweep-Schleife nur unter einer Sperre fortschreibt (keine Ein-/Ausgabe), und ein
+HTTP-Dienst in einem eigenen Thread liefert auf GET / den aktuellen Stand:
+  - Server gesamt, fertig, offen und gerade in Arbeit
+  - Durchsatz in Servern pro Stunde über die letzten RATE_WINDOW Sekunden
+  - Dauer je Phase (connect, settle, ip, probe, disconnect) über die letzten
+    PHASE_WINDOW Messungen: Mittelwert, p50, p95
+  - Ergebnisse je Klasse (Available, Blocked, Inconclusive, Error, Skipped (Grund),
+    ...) mit Anteil an allen Versuchen
+  - geschätzte Restdauer (ETA) aus dem Durchsatz, beim Lauf mit Zeitbudget
+    höchstens bis zu dessen Ende
+"watch" zeigt denselben Stand im Terminal an und aktualisiert ihn regelmäßig.
+
+Beispiele:
+  ./sweep.py --provider nordvpn --service peacock --status-port 8750
+  curl -s http://127.0.0.1:8750/ | jq .
+  ./progress.py watch --url http://127.0.0.1:8750
+"""
+import argparse
+import collections
+import datetime
+import http.server
+import json
+import threading
+import time
+import urllib.request
+
+DEFAULT_ADDRESS = "127.0.0.1"
+DEFAULT_PORT = 8750
+PHASES = ("connect", "settle", "ip", "probe", "disconnect")
+PHASE_WINDOW = 50
+RATE_WINDOW = 1800
+WATCH_INTERVAL = 2.0
+
+
+def new_tracker(label, total):
+    """Tracker für einen Lauf über total Server."""
+    return {
+        "lock": threading.Lock(),
+        "label": label,
+        "total": total,
+        "started": time.time(),
+        "deadline": None,
+        "done": set(),
+        "current": {},
+        "attempts": 0,
+        "finished": collections.deque(maxlen=1000),
+        "phases": {phase: collections.deque(maxlen=PHASE_WINDOW) for phase in PHASES},
+        "results": collections.Counter(),
+    }
+
+
+def begin(tracker, server_name):
+    """Server wird gerade getestet (kein Tracker: nichts zu tun)."""
+    if tracker is None:
+        return
+    with tracker["lock"]:
+        tracker["current"][server_name] = time.time()
+
+
+def phase(tracker, name, seconds):
+    """Nimmt die Dauer einer Phase auf."""
+    if tracker is None:
+        return
+    with tracker["lock"]:
+        tracker["phases"][name].append(seconds)
+
+
+def result_class(result):
+    """Klasse eines Ergebnisses: bei Skipped mit Grund, sonst ohne Zusatz in Klammern."""
+    return result if result.startswith("Skipped") else result.split(" (")[0]
+
+
+def finish(tracker, server_name, result):
+    """Server ist (vorerst) fertig; Wiederholungen zählen als weitere Versuche."""
+    if tracker is None:
+        return
+    with tracker["lock"]:
+        tracker["current"].pop(server_name, None)
+        tracker["done"].add(server_name)
+        tracker["attempts"] += 1
+        tracker["finished"].append(time.time())
+        tracker["results"][result_class(result)] += 1
+
+
+def set_deadline(tracker, deadline):
+    """Ende des Zeitbudgets (Unix-Zeit) für die ETA."""
+    if tracker is None:
+        return
+    with tracker["lock"]:
+        tracker["deadline"] = deadline
+
+
+def summarize_phase(values):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered), 3),
+        "p50": round(ordered[(len(ordered) - 1) // 2], 3),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+    }
+
+
+def snapshot(tracker):
+    """Aktueller Stand als JSON-fähiges Dict."""
+    with tracker["lock"]:
+        now = time.time()
+        elapsed = now - tracker["started"]
+        recent = [stamp for stamp in tracker["finished"] if now - stamp <= RATE_WINDOW]
+        window = min(elapsed, RATE_WINDOW)
+        rate = len(recent) / window * 3600 if recent and window > 0 else None
+        remaining = max(0, tracker["total"] - len(tracker["done"]))
+        eta = remaining / rate * 3600 if rate else None
+        if tracker["deadline"] is not None:
+            left = max(0.0, tracker["deadline"] - now)
+            eta = left if eta is None else min(eta, left)
+        attempts = tracker["attempts"]
+        return {
+            "label": tracker["label"],
+            "started": datetime.datetime.fromtimestamp(tracker["started"]).isoformat(timespec="seconds"),
+            "elapsed_seconds": round(elapsed),
+            "total": tracker["total"],
+            "done": len(tracker["done"]),
+            "remaining": remaining,
+            "current": {name: round(now - since, 1) for name, since in tracker["current"].items()},
+            "attempts": attempts,
+            "servers_per_hour": None if rate is None else round(rate, 1),
+            "eta_seconds": None if eta is None else round(eta),
+            "eta": None if eta is None else
+            datetime.datetime.fromtimestamp(now + eta).isoformat(timespec="seconds"),
+            "phases": {name: summarize_phase(values) for name, values in tracker["phases"].items()},
+            "results": {name: {"count": count, "rate": round(count / attempts, 3)}
+                        for name, count in tracker["results"].most_common()},
+        }
+
+
+def serve(tracker, address=DEFAULT_ADDRESS, port=DEFAULT_PORT):
+    """Startet den HTTP-Dienst (GET /) in einem Daemon-Thread; liefert den Server zum Beenden."""
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/status"):
+                self.send_error(404)
+                return
+            body = json.dumps(snapshot(tracker)).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer((address, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Fortschritt unter http://{address}:{server.server_address[1]}/")
+    return server
+
+
+def format_duration(seconds):
+    if seconds is None:
+        return "-"
+    hours, rest = divmod(int(seconds), 3600)
+    return f"{hours}:{rest // 60:02d}:{rest % 60:02d}"
+
+
+def render(state):
+    """Terminalansicht eines Stands."""
+    lines = [
+        f"{state['label']}  seit {state['started']} ({format_duration(state['elapsed_seconds'])})",
+        f"Fertig {state['done']}/{state['total']}, offen {state['remaining']}, Versuche {state['attempts']}",
+        f"Durchsatz {state['servers_per_hour'] or '-'} Server/h, "
+        f"ETA {format_duration(state['eta_seconds'])} ({state['eta'] or '-'})",
+        "Aktuell: " + (", ".join(f"{name} ({age:.0f} s)" for name, age in state["current"].items()) or "-"),
+        "",
+        "Phase\t\tn\tMittel\tp50\tp95",
+    ]
+    for name, values in state["phases"].items():
+        if values:
+            lines.append(f"{name:<12}\t{values['count']}\t{values['mean']:.2f}\t"
+                         f"{values['p50']:.2f}\t{values['p95']:.2f}")
+    lines += ["", "Ergebnis\tAnzahl\tAnteil"]
+    for name, entry in state["results"].items():
+        lines.append(f"{name}\t{entry['count']}\t{entry['rate'] * 100:.1f} %")
+    return "\n".join(lines)
+
+
+def watch(url, interval=WATCH_INTERVAL):
+    """Zeigt den Stand des Endpunkts url im Terminal an, bis Strg+C."""
+    try:
+        while True:
+            try:
+                with urllib.request.urlopen(url, timeout=5) as response:
+                    text = render(json.loads(response.read()))
+            except OSError as e:
+                text = f"Endpunkt {url} nicht erreichbar: {e}"
+            print("\033[H\033[J" + text, flush=True)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fortschritt eines laufenden Sweeps anzeigen.")
+    parser.add_argument("command", choices=["watch", "show"])
+    parser.add_argument("--url", default=f"http://{DEFAULT_ADDRESS}:{DEFAULT_PORT}/")
+    parser.add_argument("--interval", type=float, default=WATCH_INTERVAL)
+    args = parser.parse_args()
+
+    if args.command == "watch":
+        watch(args.url, args.interval)
+    else:
+        with urllib.request.urlopen(args.url, timeout=5) as response:
+            print(render(json.loads(response.read())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+ProtonVPN ohne Hersteller-CLI (benötigt root sowie openvpn bzw. wg).
+
+Da die ProtonVPN-CLI nicht mehr unterstützt wird, wurden die Ergebnisse unter
+results/ProtonVPN/ bisher von Hand erstellt. Stattdessen werden hier die im
+ProtonVPN-Konto herunterladbaren Konfigurationsdateien genutzt:
+  - OpenVPN:   *.ovpn, z. B. "uk-10.protonvpn.udp.ovpn" (Anmeldung über --auth-user-pass)
+  - WireGuard: *.conf, z. B. "UK-10.conf" ([Interface] PrivateKey/Address, [Peer] PublicKey/Endpoint)
+
+Der Servername wird aus dem Dateinamen gebildet ("uk-10..." -> "UK#10"), das Land
+aus dessen Präfix ("uk" -> "gb"). Über providers.open_session("protonvpn", ...)
+laufen die Server durch dieselbe Sweep-Schleife wie die übrigen Anbieter.
+"""
+import os
+import re
+import subprocess
+import tempfile
+import time
+
+import wireguard_backend
+
+# Präfix im Dateinamen -> Ländercode (ISO)
+COUNTRY_PREFIXES = {"uk": "gb"}
+CONNECT_TIMEOUT = 30
+OPENVPN_READY = "Initialization Sequence Completed"
+OPENVPN_FAILED = ("AUTH_FAILED", "Exiting due to fatal error")
+
+
+def server_name(filename):
+    """Bildet den Servernamen aus dem Dateinamen, z. B. "node-uk-10.protonvpn.net.udp.ovpn" -> "UK#10"."""
+    stem = os.path.basename(filename).split(".")[0]
+    stem = re.sub(r"^(node|wg)-", "", stem, flags=re.IGNORECASE)
+    head, _, number = stem.rpartition("-")
+    return f"{head}#{number}".upper() if head and number.isdigit() else stem.upper()
+
+
+def config_country(name):
+    """Ländercode aus dem Servernamen ("UK#10" -> "gb", "US-NY#01" -> "us")."""
+    prefix = name[:2].lower()
+    return COUNTRY_PREFIXES.get(prefix, prefix)
+
+
+def parse_openvpn_config(filename):
+    """Liefert den ersten Endpunkt ("remote <host> <port>") einer OpenVPN-Konfiguration."""
+    with open(filename, "r") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0] == "remote":
+                port = parts[2] if len(parts) > 2 else "1194"
+                return f"{parts[1]}:{port}"
+    return ""
+
+
+def parse_wireguard_config(filename):
+    """Liest eine WireGuard-Konfiguration (wg-quick-Format) als Dict der Schlüssel."""
+    values = {}
+    with open(filename, "r") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if "=" in line:
+                key, value = line.split("=", 1)
+                values[key.strip().lower()] = value.strip()
+    return values
+
+
+def find_configs(directory, country, backend):
+    """
+    Sucht im Verzeichnis alle Konfigurationen für country und liefert je Datei
+    name, config und endpoint. backend "openvpn" nutzt *.ovpn, "wireguard" *.conf.
+    """
+    extension = ".conf" if backend == "wireguard" else ".ovpn"
+    entries = []
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(extension):
+            continue
+        path = os.path.join(directory, filename)
+        name = server_name(filename)
+        if country and config_country(name) != country:
+            continue
+        if backend == "wireguard":
+            endpoint = parse_wireguard_config(path).get("endpoint", "")
+        else:
+            endpoint = parse_openvpn_config(path)
+        entries.append({"name": name, "config": path, "endpoint": endpoint})
+    return entries
+
+
+def connect_openvpn(session, server):
+    """Startet OpenVPN als Daemon und wartet auf "Initialization Sequence Completed"."""
+    log_file = os.path.join(tempfile.gettempdir(), "protonvpn_openvpn.log")
+    pid_file = os.path.join(tempfile.gettempdir(), "protonvpn_openvpn.pid")
+    if os.path.exists(log_file):
+        subprocess.run(["sudo", "rm", "-f", log_file], capture_output=True)
+    subprocess.run(
+        ["sudo", "openvpn", "--config", server["config"], "--auth-user-pass", session["options"]["auth_file"],
+         "--auth-nocache", "--daemon", "--writepid", pid_file, "--log", log_file],
+        capture_output=True, text=True
+    )
+    session["openvpn_pid_file"] = pid_file
+    started = time.monotonic()
+    while time.monotonic() - started < CONNECT_TIMEOUT:
+        time.sleep(0.2)
+        try:
+            with open(log_file, "r", errors="replace") as f:
+                log = f.read()
+        except OSError:
+            continue
+        if OPENVPN_READY in log:
+            return "connected"
+        if any(marker in log for marker in OPENVPN_FAILED):
+            return "failed"
+    return "failed"
+
+
+def disconnect_openvpn(session):
+    """Beendet den OpenVPN-Daemon und wartet, bis der Prozess verschwunden ist."""
+    pid_file = session.pop("openvpn_pid_file", None)
+    if not pid_file or not os.path.exists(pid_file):
+        return
+    with open(pid_file, "r") as f:
+        pid = f.read().strip()
+    subprocess.run(["sudo", "kill", pid], capture_output=True)
+    started = time.monotonic()
+    while os.path.exists(f"/proc/{pid}") and time.monotonic() - started < 10:
+        time.sleep(0.1)
+    print("VPN-Verbindung getrennt.")
+
+
+def wireguard_server(server):
+    """
+    Wandelt eine WireGuard-Konfiguration in einen Eintrag für wireguard_backend um.
+    Der private Schlüssel bleibt im Speicher und wird "wg set" über stdin übergeben.
+    """
+    values = parse_wireguard_config(server["config"])
+    return {
+        "name": server["name"],
+        "endpoint": values["endpoint"],
+        "public_key": values["publickey"],
+        "private_key": values["privatekey"],
+        "address": values.get("address", "10.2.0.2/32").split(",")[0].strip(),
+    }
+
+
+def connect(session, server):
+    """Verbindet mit einem ProtonVPN-Server über das Backend der Session."""
+    print(f"Verbinde mit {server['name']} ({session['backend']}) ...")
+    if session["backend"] != "wireguard":
+        return connect_openvpn(session, server)
+    # Ggf. schon während des vorigen Servers vorbereitet (siehe providers.prepare_server())
+    entry = server.pop("prepared", None) or wireguard_server(server)
+    if session["tunnel"] is None:
+        # Interface und Namespace aus den Optionen der Session (z. B. soak.py mit server@namespace)
+        options = session["options"]
+        session["tunnel"] = wireguard_backend.new_tunnel(
+            options.get("interface") or wireguard_backend.DEFAULT_INTERFACE,
+            address=entry["address"], namespace=options.get("namespace"),
+        )
+    status, _ = wireguard_backend.connect(session["tunnel"], entry)
+    return status
+
+
+def disconnect(session, final=False):
+    """
+    Trennt nach einem Server. Bei WireGuard bleibt der Tunnel bis final=True bestehen,
+    der nächste Server wird per Peer-Tausch verbunden.
+    """
+    if session["backend"] != "wireguard":
+        disconnect_openvpn(session)
+    elif final and session["tunnel"] is not None:
+        wireguard_backend.tunnel_down(session["tunnel"])
+        session["tunnel"] = None
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Gemeinsame Aufrufe der Anbieter (NordVPN, ExpressVPN, CyberGhostVPN, ProtonVPN).
+
+Die Befehle entsprechen denen aus den Einzelskripten unter scripts/<Anbieter>/,
+werden hier aber zentral gehalten, damit Killswitch-Tests und Sweeps dieselben
+Verbindungsaufrufe nutzen.
+
+Das Ziel ("target") ist je nach Anbieter:
+  - nordvpn:       Hostname oder Land, z. B. "uk2242" oder "us"
+  - expressvpn:    Location, z. B. "USA - Washington DC" oder "UK - London"
+  - cyberghostvpn: "<country-code>[/<city>[/<server>]]", z. B. "gb/london/london-s315-i01"
+  - protonvpn:     Name einer Konfigurationsdatei, z. B. "UK#10" (siehe protonvpn.py)
+
+Für Sweeps wird eine "Session" geöffnet, die das Backend festlegt:
+  - "cli":       Anbieter-CLI (connect/disconnect je Server)
+  - "wireguard": wireguard_backend.py, Serverwechsel per Peer-Tausch
+  - "openvpn":   OpenVPN mit Konfigurationsdateien (nur ProtonVPN)
+"""
+import json
+import re
+import subprocess
+
+import protonvpn
+import wireguard_backend
+
+# Wartezeiten (Sekunden) nach dem Verbindungsaufbau, wie in den Einzelskripten
+SETTLE_SECONDS = {
+    "nordvpn": 5,
+    "expressvpn": 8,
+    "cyberghostvpn": 10,
+}
+
+# Anbieter, deren CLI vor einem Serverwechsel explizit getrennt werden muss
+SWITCH_NEEDS_DISCONNECT = {"expressvpn", "cyberghostvpn"}
+
+# Anzeigenamen für Dateinamen, wie in results/<Anbieter>/
+DISPLAY_NAMES = {
+    "nordvpn": "NordVPN",
+    "expressvpn": "ExpressVPN",
+    "cyberghostvpn": "Cyberghost",
+    "protonvpn": "ProtonVPN",
+}
+
+# Ländercode (ISO) -> Präfix der NordVPN-Hostnamen bzw. ExpressVPN-Location
+NORDVPN_PREFIXES = {"gb": "uk"}
+EXPRESSVPN_PREFIXES = {"gb": "UK -", "us": "USA -"}
+
+
+def connect_command(provider, target):
+    """Liefert die Kommandozeile für den Verbindungsaufbau zu target."""
+    if provider == "nordvpn":
+        return ["nordvpn", "connect", target]
+    if provider == "expressvpn":
+        return ["expressvpn", "connect", target]
+    if provider == "cyberghostvpn":
+        parts = target.split("/")
+        command = ["sudo", "cyberghostvpn", "--country-code", parts[0]]
+        if len(parts) > 1 and parts[1]:
+            command += ["--city", parts[1].lower()]
+        if len(parts) > 2 and parts[2]:
+            command += ["--server", parts[2]]
+        return command + ["--connect"]
+    raise ValueError(f"Unbekannter Anbieter: {provider}")
+
+
+def disconnect_command(provider):
+    """Liefert die Kommandozeile zum Trennen der VPN-Verbindung."""
+    if provider == "nordvpn":
+        return ["nordvpn", "disconnect"]
+    if provider == "expressvpn":
+        return ["expressvpn", "disconnect"]
+    if provider == "cyberghostvpn":
+        return ["sudo", "cyberghostvpn", "--disconnect"]
+    raise ValueError(f"Unbekannter Anbieter: {provider}")
+
+
+def parse_connect_output(output):
+    """
+    Wertet die Ausgabe eines Verbindungsbefehls aus (vgl. NordVPN connect_vpn()).
+    Liefert "dedicated", "failed", "unavailable" oder "connected".
+    """
+    output = output.lower()
+    if "dedicated ip" in output:
+        return "dedicated"
+    if "connection has failed" in output or "unable to connect" in output:
+        return "failed"
+    if "the specified server is not available" in output:
+        return "unavailable"
+    return "connected"
+
+
+def connect_vpn(provider, target):
+    """Baut die VPN-Verbindung synchron auf und liefert den Verbindungsstatus."""
+    print(f"Verbinde mit {target} ({provider}) ...")
+    result = subprocess.run(connect_command(provider, target), capture_output=True, text=True)
+    output = result.stdout.strip()
+    if output:
+        print(output)
+    return parse_connect_output(output)
+
+
+def disconnect_vpn(provider):
+    """Trennt die VPN-Verbindung synchron."""
+    result = subprocess.run(disconnect_command(provider), capture_output=True, text=True)
+    print(result.stdout.strip() or "VPN-Verbindung getrennt.")
+    return result.returncode
+
+
+def new_server(provider, name, target, country, **fields):
+    """Einheitlicher Servereintrag für alle Anbieter."""
+    server = {
+        "provider": provider,
+        "name": name,
+        "target": target,
+        "country": country,
+        "city": "",
+        "hostname": "",
+        "station": "",
+        "status": "",
+        "load": None,
+    }
+    server.update(fields)
+    return server
+
+
+def country_of(name, prefixes):
+    """Erstes Land aus prefixes ({Land: Präfix}), dessen Präfix name beginnt, sonst None."""
+    for country, prefix in prefixes.items():
+        if name.startswith(prefix):
+            return country
+    return None
+
+
+def fetch_nordvpn_countries(countries):
+    """
+    Ruft die NordVPN-Serverliste einmal ab (vgl. fetch_server_list() in scripts/NordVPN/)
+    und liefert {Land: Server} für alle countries.
+    Je nach API-Version liegt die Liste direkt oder unter .servers; die Servergruppen
+    stehen entweder am Server (.groups) oder als IDs mit einer Tabelle (.group_ids),
+    ebenso die Stadt (.locations[].country.city.name bzw. .location_ids).
+    """
+    prefixes = {country: NORDVPN_PREFIXES.get(country, country) for country in countries}
+    selection = json.dumps(sorted(set(prefixes.values())))
+    command = (
+        r'''curl -s "https://api.nordvpn.com/v2/servers?limit=0" | jq -r '''
+        r''''(if type == "array" then {servers: ., groups: []} else . end) as $data '''
+        r'''| ($data.groups // [] | map({key: (.id | tostring), value: .title}) | from_entries) as $titles '''
+        r'''| ($data.locations // [] | map({key: (.id | tostring), value: .country.city.name}) | from_entries) '''
+        r'''as $cities '''
+        rf'''| $data.servers[] | select(.hostname as $host | {selection} | any(. as $p | $host | startswith($p))) '''
+        r'''| {id, name, station, hostname, status, load, groups: ([(.groups // [])[].title] '''
+        r'''+ [(.group_ids // [])[] | $titles[tostring]] | map(select(. != null)) | join(",")), '''
+        r'''city: ([(.locations // [])[].country.city.name] + [(.location_ids // [])[] | $cities[tostring]] '''
+        r'''| map(select(. != null)) | first // "")} '''
+        r'''| "\(.id)\t\(.name)\t\(.station)\t\(.hostname)\t\(.status)\t\(.load)\t\(.groups)\t\(.city)"' '''
+    )
+    result = subprocess.run(command, shell=True, capture_output=True, text=True)
+    servers = {country: [] for country in countries}
+    for line in result.stdout.splitlines():
+        parts = line.split("\t")
+        if len(parts) < 5:
+            continue
+        hostname = parts[3].replace(".nordvpn.com", "")
+        country = country_of(hostname, prefixes)
+        if country is None:
+            continue
+        load = int(parts[5]) if len(parts) > 5 and parts[5].isdigit() else None
+        groups = [group for group in parts[6].split(",") if group] if len(parts) > 6 else []
+        city = parts[7] if len(parts) > 7 else ""
+        servers[country].append(new_server(
+            "nordvpn", hostname, hostname, country, city=city,
+            hostname=parts[3], station=parts[2], status=parts[4], load=load, id=parts[0], groups=groups,
+        ))
+    return servers
+
+
+def fetch_nordvpn_servers(country):
+    """NordVPN-Server eines Landes (siehe fetch_nordvpn_countries())."""
+    return fetch_nordvpn_countries([country])[country]
+
+
+def fetch_expressvpn_countries(countries):
+    """Ruft "expressvpn list all" einmal ab und teilt nach dem Location-Präfix der Länder auf."""
+    prefixes = {country: EXPRESSVPN_PREFIXES.get(country, country.upper() + " -") for country in countries}
+    result = subprocess.run(["expressvpn", "list", "all"], capture_output=True, text=True)
+    servers = {country: [] for country in countries}
+    for line in result.stdout.strip().splitlines():
+        parts = re.split(r"\s{2,}", line.strip())
+        if len(parts) == 4:
+            code, _, location, _ = parts
+        elif len(parts) == 3:
+            code, location, _ = parts
+        else:
+            continue
+        country = country_of(location, prefixes)
+        if country is not None:
+            city = location[len(prefixes[country]):].strip()
+            servers[country].append(new_server("expressvpn", code, location, country, city=city))
+    return servers
+
+
+def fetch_expressvpn_servers(country):
+    """ExpressVPN-Server eines Landes (siehe fetch_expressvpn_countries())."""
+    return fetch_expressvpn_countries([country])[country]
+
+
+def parse_cyberghost_table(output, column):
+    """
+    Liest eine Tabelle der CyberGhost-CLI ("| No. | City | Instance | Load |") und
+    liefert (City, Wert der Spalte column, Load in Prozent).
+    """
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith("|"):
+            continue
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) < 5 or parts[2].lower() == "city" or not parts[2]:
+            continue
+        load = int(parts[4].rstrip("%")) if parts[4].rstrip("%").isdigit() else None
+        rows.append((parts[2], parts[column], load))
+    return rows
+
+
+def fetch_cyberghost_servers(country):
+    """Ruft Städte und deren Instanzen über die CyberGhost-CLI ab (inkl. Load)."""
+    result = subprocess.run(["cyberghostvpn", "--country-code", country], capture_output=True, text=True)
+    cities = sorted({city for city, _, _ in parse_cyberghost_table(result.stdout, 2)})
+    servers = []
+    for city in cities:
+        result = subprocess.run(["cyberghostvpn", "--country-code", country, "--city", city.lower()],
+                                capture_output=True, text=True)
+        for _, instance, load in parse_cyberghost_table(result.stdout, 3):
+            if re.match(r".*-s\d+-i\d+", instance) or instance.isdigit():
+                target = f"{country}/{city}/{instance}"
+                servers.append(new_server("cyberghostvpn", instance, target, country, city=city, load=load))
+    return servers
+
+
+def open_session(provider, backend="cli", **options):
+    """
+    Öffnet eine Sweep-Session für provider.
+    Optionen je Backend:
+      wireguard: catalogue, private_key_file, address, interface, namespace
+      openvpn/wireguard (ProtonVPN): configs, auth_file
+    """
+    session = {"provider": provider, "backend": backend, "options": options, "tunnel": None}
+    if provider == "protonvpn":
+        session["backend"] = backend if backend != "cli" else "openvpn"
+        session["settle"] = 1
+    elif backend == "wireguard":
+        session["settle"] = 1
+    else:
+        session["settle"] = SETTLE_SECONDS[provider]
+    if session["backend"] == "wireguard" and provider != "protonvpn":
+        session["tunnel"] = wireguard_backend.new_tunnel(
+            options.get("interface") or wireguard_backend.DEFAULT_INTERFACE,
+            options.get("private_key_file"),
+            options.get("address") or wireguard_backend.DEFAULT_ADDRESS,
+            options.get("namespace"),
+        )
+    return session
+
+
+def fetch_servers(session, country):
+    """Liefert die Serverliste des Anbieters für country (ISO-Code, z. B. "gb")."""
+    provider = session["provider"]
+    options = session["options"]
+    if provider == "protonvpn":
+        return [
+            new_server(provider, entry["name"], entry["config"], country,
+                       config=entry["config"], endpoint=entry["endpoint"],
+                       station=entry["endpoint"].rsplit(":", 1)[0])
+            for entry in protonvpn.find_configs(options["configs"], country, session["backend"])
+        ]
+    if session["backend"] == "wireguard":
+        prefix = NORDVPN_PREFIXES.get(country, country)
+        catalogue = wireguard_backend.load_catalogue(options["catalogue"])
+        return [
+            new_server(provider, name, name, country, wireguard=entry)
+            for name, entry in catalogue.items() if name.startswith(prefix)
+        ]
+    if provider == "nordvpn":
+        return fetch_nordvpn_servers(country)
+    if provider == "expressvpn":
+        return fetch_expressvpn_servers(country)
+    if provider == "cyberghostvpn":
+        return fetch_cyberghost_servers(country)
+    raise ValueError(f"Unbekannter Anbieter: {provider}")
+
+
+def fetch_servers_by_country(session, countries):
+    """
+    Serverlisten mehrerer Länder: {Land: Server}. NordVPN und ExpressVPN werden dafür
+    nur einmal abgerufen; die übrigen Quellen sind je Land getrennt (CyberGhost-CLI)
+    bzw. lokale Dateien.
+    """
+    countries = list(dict.fromkeys(countries))
+    if session["backend"] == "cli" and session["provider"] == "nordvpn":
+        return fetch_nordvpn_countries(countries)
+    if session["backend"] == "cli" and session["provider"] == "expressvpn":
+        return fetch_expressvpn_countries(countries)
+    return {country: fetch_servers(session, country) for country in countries}
+
+
+def prepare_server(session, server):
+    """
+    Vorbereitung eines Servers, die ohne Verbindung möglich ist und im Sweep schon
+    während der Prüfung des vorigen Servers läuft: WireGuard-Konfiguration lesen
+    und den Endpunkt auflösen.
+    """
+    if session["backend"] != "wireguard":
+        return
+    if session["provider"] == "protonvpn":
+        entry = protonvpn.wireguard_server(server)
+        entry["endpoint"] = wireguard_backend.resolve_endpoint(entry["endpoint"])
+        server["prepared"] = entry
+    else:
+        endpoint = wireguard_backend.resolve_endpoint(server["wireguard"]["endpoint"])
+        server["wireguard"] = dict(server["wireguard"], endpoint=endpoint)
+
+
+def connect_server(session, server, timeout=None):
+    """
+    Verbindet mit server über das Backend der Session und liefert den Status.
+    timeout begrenzt das Warten auf den WireGuard-Handshake (siehe timings.py).
+    """
+    if session["provider"] == "protonvpn":
+        return protonvpn.connect(session, server)
+    if session["backend"] == "wireguard":
+        print(f"Verbinde mit {server['name']} (WireGuard) ...")
+        status, _ = wireguard_backend.connect(session["tunnel"], server["wireguard"],
+                                              timeout or wireguard_backend.HANDSHAKE_TIMEOUT)
+        return status
+    return connect_vpn(session["provider"], server["target"])
+
+
+def disconnect_server(session, final=False):
+    """
+    Trennt nach einem Server. Beim WireGuard-Backend bleibt der Tunnel zwischen zwei
+    Servern bestehen (der nächste connect_server() tauscht nur den Peer), erst mit
+    final=True wird er abgebaut.
+    """
+    if session["provider"] == "protonvpn":
+        protonvpn.disconnect(session, final)
+    elif session["backend"] == "wireguard":
+        if final:
+            wireguard_backend.tunnel_down(session["tunnel"])
+    else:
+        disconnect_vpn(session["provider"])
+
+
+def close_session(session):
+    """Baut verbleibende Tunnel der Session ab (die CLI-Backends trennen je Server selbst)."""
+    if session["provider"] == "protonvpn" or session["backend"] != "cli":
+        disconnect_server(session, final=True)
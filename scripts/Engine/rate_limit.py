@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Begrenzung von Sitzungen und Anfragen je Anbieter-Konto und je Zieldienst.
+
+Parallele Sweeps stoßen schnell an die Gerätelimits der Anbieter und an die
+Ratenbegrenzung bzw. Captcha-Seiten von Peacock und BBC. Hier gibt es je Schlüssel
+(Konto, z. B. "nordvpn:default", oder Domain, z. B. "peacocktv.com"):
+  - einen Token-Bucket: höchstens rate Vorgänge pro Minute (Verbindungen bzw.
+    Dienstprüfungen), Spitzen bis burst
+  - für Konten höchstens sessions gleichzeitige Tunnel (je Sitzung eine Sperrdatei
+    in SLOT_DIR, per flock belegt; stirbt ein Prozess, gibt das Betriebssystem seine
+    Sperre frei)
+Beides gilt über alle Prozesse des Rechners hinweg (Scheduler, Worker, ip_pool,
+weitere Shells): Der Zustand der Buckets (Token, aktuelle Rate, Sperre) liegt je
+Schlüssel in einer Datei in SLOT_DIR und wird nur unter flock gelesen und
+geschrieben. Der Scheduler startet keinen Sweep, solange das Konto keine freie
+Sitzung hat oder gesperrt ist (available()).
+
+Die Rate passt sich an (AIMD): Meldet der Sweep HTTP 429 oder ein Captcha oder
+scheitern FAILURE_STREAK Verbindungen in Folge, wird die Rate halbiert und der
+Schlüssel für cooldown Sekunden gesperrt; jede erfolgreiche Runde hebt sie wieder
+um ein Zehntel der Grundrate an. Einzelne gescheiterte Verbindungen liegen meist am
+Server (tote Server sind in einem NordVPN-Sweep häufig) und bremsen das Konto nicht.
+
+Die Begrenzung ist in den Skripten optional (--throttle).
+
+Limits können per JSON-Datei überschrieben werden, z. B.:
+  {"nordvpn": {"sessions": 6, "rate": 4}, "peacocktv.com": {"rate": 10}}
+"""
+import contextlib
+import fcntl
+import json
+import os
+import tempfile
+import time
+
+# Gerätelimits der Anbieter und vorsichtige Verbindungsraten (pro Minute)
+DEFAULT_LIMITS = {
+    "nordvpn": {"sessions": 10, "rate": 6},
+    "expressvpn": {"sessions": 8, "rate": 4},
+    "cyberghostvpn": {"sessions": 7, "rate": 4},
+    "protonvpn": {"sessions": 10, "rate": 10},
+    "peacocktv.com": {"rate": 20},
+    "bbc.co.uk": {"rate": 20},
+}
+DEFAULT_RATE = 30
+DEFAULT_BURST = 2
+MIN_RATE = 0.5
+DEFAULT_COOLDOWN = 60
+THROTTLE_MARKERS = ("429", "captcha")
+FAILURE_STREAK = 5
+SLOT_DIR = os.path.join(tempfile.gettempdir(), "vpntesting_sessions")
+SLOT_POLL_SECONDS = 2.0
+SHARED_FIELDS = ("tokens", "rate", "updated", "blocked_until", "failures")
+
+
+def load_limits(filename=None):
+    """Standard-Limits, ggf. ergänzt um die Einträge aus einer JSON-Datei."""
+    limits = {key: dict(value) for key, value in DEFAULT_LIMITS.items()}
+    if filename:
+        with open(filename, "r") as f:
+            for key, value in json.load(f).items():
+                limits.setdefault(key, {}).update(value)
+    return limits
+
+
+def new_limiter(limits=None):
+    """Limits dieses Prozesses; der Zustand der Buckets liegt in SLOT_DIR (siehe bucket())."""
+    return {"limits": limits or load_limits()}
+
+
+def limits_for(limiter, key):
+    """Limits für key; Konten "anbieter:name" erben die Werte des Anbieters."""
+    limits = limiter["limits"]
+    return limits.get(key) or limits.get(key.split(":", 1)[0]) or {}
+
+
+def state_file(key, suffix):
+    """Datei in SLOT_DIR zu einem Konto bzw. einer Domain."""
+    os.makedirs(SLOT_DIR, exist_ok=True)
+    return os.path.join(SLOT_DIR, f"{key.replace('/', '_')}{suffix}")
+
+
+@contextlib.contextmanager
+def bucket(limiter, key):
+    """
+    Token-Bucket zu key für die Dauer des Blocks, exklusiv über alle Prozesse und
+    Threads. Gemeinsam sind tokens, rate, updated, blocked_until (Unix-Zeit) und
+    failures; Grundrate, burst und cooldown stammen aus den Limits des Prozesses.
+    Änderungen am Eintrag werden beim Verlassen zurückgeschrieben.
+    """
+    limits = limits_for(limiter, key)
+    rate = limits.get("rate", DEFAULT_RATE)
+    burst = limits.get("burst", DEFAULT_BURST)
+    entry = {"base": rate, "rate": rate, "burst": burst, "tokens": burst, "updated": time.time(),
+             "blocked_until": 0.0, "failures": 0, "cooldown": limits.get("cooldown", DEFAULT_COOLDOWN)}
+    with open(state_file(key, ".bucket"), "a+") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        f.seek(0)
+        try:
+            shared = json.load(f)
+            entry.update({name: shared[name] for name in SHARED_FIELDS})
+        except (ValueError, KeyError, TypeError):
+            pass
+        entry["rate"] = min(entry["rate"], entry["base"])
+        yield entry
+        f.seek(0)
+        f.truncate()
+        json.dump({name: entry[name] for name in SHARED_FIELDS}, f)
+
+
+def acquire(limiter, key):
+    """Wartet, bis für key ein Token verfügbar ist, und verbraucht es. Liefert die Wartezeit."""
+    if limiter is None:
+        return 0.0
+    waited = 0.0
+    while True:
+        with bucket(limiter, key) as entry:
+            now = time.time()
+            entry["tokens"] = min(entry["burst"], entry["tokens"] + (now - entry["updated"]) * entry["rate"] / 60)
+            entry["updated"] = now
+            if now >= entry["blocked_until"] and entry["tokens"] >= 1:
+                entry["tokens"] -= 1
+                return waited
+            delay = max(entry["blocked_until"] - now, (1 - entry["tokens"]) * 60 / entry["rate"])
+        time.sleep(delay)
+        waited += delay
+
+
+def try_slot(account, sessions):
+    """Belegt eine freie Sperrdatei des Kontos; liefert die offene Datei oder None."""
+    for number in range(sessions):
+        handle = open(state_file(account, f".{number}.lock"), "a")
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return handle
+        except OSError:
+            handle.close()
+    return None
+
+
+@contextlib.contextmanager
+def session_slot(limiter, account):
+    """
+    Belegt für die Dauer des Blocks eine der gleichzeitigen Sitzungen des Kontos,
+    auch gegenüber anderen Prozessen (Scheduler, Worker, Dauertests, weitere Shells).
+    """
+    if limiter is None:
+        yield
+        return
+    sessions = limits_for(limiter, account).get("sessions", 1)
+    handle = try_slot(account, sessions)
+    if handle is None:
+        print(f"Alle {sessions} Sitzungen von {account} belegt, warte ...")
+    while handle is None:
+        time.sleep(SLOT_POLL_SECONDS)
+        handle = try_slot(account, sessions)
+    try:
+        yield
+    finally:
+        fcntl.flock(handle, fcntl.LOCK_UN)
+        handle.close()
+
+
+def available(limiter, account):
+    """Hat das Konto eine freie Sitzung und ist es nicht gesperrt? (ohne etwas zu belegen)"""
+    handle = try_slot(account, limits_for(limiter, account).get("sessions", 1))
+    if handle is None:
+        return False
+    fcntl.flock(handle, fcntl.LOCK_UN)
+    handle.close()
+    with bucket(limiter, account) as entry:
+        return time.time() >= entry["blocked_until"]
+
+
+def signal(result):
+    """Wertet ein Ergebnis aus: "throttled" (429/Captcha), "failed" (Verbindung) oder "ok"."""
+    text = result.lower()
+    if any(marker in text for marker in THROTTLE_MARKERS):
+        return "throttled"
+    if "connection failed" in text or "connection has failed" in text:
+        return "failed"
+    return "ok"
+
+
+def report(limiter, key, outcome):
+    """
+    Passt die Rate von key an das Ergebnis an (siehe signal()). "failed" drosselt erst
+    nach FAILURE_STREAK Fehlschlägen in Folge, "throttled" sofort.
+    """
+    if limiter is None:
+        return
+    with bucket(limiter, key) as entry:
+        if outcome == "ok":
+            entry["failures"] = 0
+            entry["rate"] = min(entry["base"], entry["rate"] + entry["base"] / 10)
+            return
+        if outcome == "failed":
+            entry["failures"] += 1
+            if entry["failures"] < FAILURE_STREAK:
+                return
+        entry["failures"] = 0
+        entry["rate"] = max(MIN_RATE, entry["rate"] / 2)
+        entry["tokens"] = 0
+        entry["blocked_until"] = time.time() + entry["cooldown"]
+    print(f"Drossele {key} auf {entry['rate']:.1f}/min ({outcome}), Pause {entry['cooldown']:.0f} s.")
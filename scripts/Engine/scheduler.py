@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Unbeaufsichtigte Sweeps nach Zeitplan.
+
+Die Einzelskripte fragen zweimal per input() nach Dateinamen und blockieren, bis
+jemand Enter drückt. sweep.py kommt ohne Rückfragen aus; dieser Dienst startet es
+nach einer Konfigurationsdatei (JSON) regelmäßig selbst:
+
+  {
+    "results_dir": "results/auto",
+    "state_file": "scheduler_state.json",
+    "concurrency": 1,
+    "throttle": true,
+    "jobs": [
+      {"provider": "nordvpn", "service": "peacock", "every_hours": 24, "importance": 2,
+       "mode": "manifest", "args": ["--prescan", "--peacock-manifest", "https://.../master.m3u8"]},
+      {"provider": "nordvpn", "service": "bbciplayer", "every_hours": 24, "backend": "wireguard",
+       "tunnel": "sweep1", "args": ["--catalogue", "nordlynx_uk.txt", "--private-key-file", "nordlynx.key"]},
+      {"provider": "cyberghostvpn", "service": "bbciplayer", "every_hours": 72}
+    ]
+  }
+
+Je Job: provider, service, country (Standard: Land des Dienstes), backend (--backend,
+Standard cli), mode (--probe-mode, Standard page), account (--account, Standard
+default), tunnel und weitere Argumente für sweep.py in args.
+
+Fällig ist ein Job, wenn seit dem letzten Lauf every_hours vergangen sind. Unter den
+fälligen Jobs läuft zuerst der mit der höchsten Priorität = importance * Alter des
+letzten Laufs / every_hours (nie gelaufene Jobs zuerst).
+Zwei Sweeps, die sich denselben Tunnel teilen, laufen nie gleichzeitig: Jeder Job
+hat einen Tunnel-Schlüssel ("tunnel", Standard "host" - alle Anbieter-CLIs und das
+WireGuard-Backend ohne Namespace ändern das Routing des Rechners). Jeder andere
+Schlüssel ist der Name eines Network Namespace, in dem der Sweep läuft
+(sweep.py --namespace); das geht nur mit dem WireGuard-Backend. Jobs mit
+verschiedenen Schlüsseln laufen bis zu concurrency parallel. Parallel wird nur
+zwischen Sweeps gearbeitet, weil ein Sweep genau einen Tunnel hält.
+Ein Job wartet außerdem, solange sein Konto keine freie Sitzung hat oder nach
+Drosselung gesperrt ist (rate_limit.available(), gilt auch für Sweeps anderer
+Prozesse). Mit "throttle" laufen die Sweeps selbst mit --throttle (und "limits"
+als --limits), sodass sie sich Sitzungen und Raten je Konto und Domain teilen.
+
+Beispiele:
+  ./scheduler.py run --config scheduler.json       # Dienst
+  ./scheduler.py once --config scheduler.json      # alle fälligen Jobs, dann Ende (z. B. per cron)
+  ./scheduler.py status --config scheduler.json
+"""
+import argparse
+import datetime
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import probes
+import providers
+import rate_limit
+
+DEFAULT_RESULTS_DIR = "results/auto"
+DEFAULT_STATE_FILE = "scheduler_state.json"
+DEFAULT_EVERY_HOURS = 24
+HOST_TUNNEL = "host"
+POLL_SECONDS = 30
+SWEEP_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sweep.py")
+
+
+def load_config(filename):
+    """Liest die Konfiguration und ergänzt Standardwerte je Job."""
+    with open(filename, "r") as f:
+        config = json.load(f)
+    config.setdefault("results_dir", DEFAULT_RESULTS_DIR)
+    config.setdefault("state_file", DEFAULT_STATE_FILE)
+    config.setdefault("concurrency", 1)
+    config.setdefault("throttle", False)
+    config.setdefault("limits", None)
+    for job in config["jobs"]:
+        job.setdefault("country", probes.SERVICES[job["service"]]["country"])
+        job.setdefault("every_hours", DEFAULT_EVERY_HOURS)
+        job.setdefault("importance", 1)
+        job.setdefault("backend", "cli")
+        job.setdefault("mode", "page")
+        job.setdefault("account", "default")
+        job.setdefault("tunnel", HOST_TUNNEL)
+        job.setdefault("args", [])
+        job.setdefault("id", f"{job['provider']}-{job['service']}-{job['country']}")
+        if job["tunnel"] != HOST_TUNNEL and job["backend"] != "wireguard":
+            raise ValueError(f"Job {job['id']}: Tunnel {job['tunnel']} (Network Namespace) "
+                             "benötigt das WireGuard-Backend")
+    return config
+
+
+def load_state(filename):
+    """Letzte Läufe je Job: {id: {"last_run", "exit_code", "output"}}."""
+    if not os.path.exists(filename):
+        return {}
+    with open(filename, "r") as f:
+        return json.load(f)
+
+
+def save_state(filename, state):
+    """Schreibt den Zustand atomar (erst Hilfsdatei, dann umbenennen)."""
+    with open(filename + ".tmp", "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(filename + ".tmp", filename)
+
+
+def priority(job, state, now):
+    """Priorität eines Jobs; None, wenn er noch nicht fällig ist."""
+    last_run = state.get(job["id"], {}).get("last_run")
+    if last_run is None:
+        return float("inf")
+    staleness = (now - last_run) / (job["every_hours"] * 3600)
+    if staleness < 1:
+        return None
+    return job["importance"] * staleness
+
+
+def account_of(job):
+    """Schlüssel des Kontos für rate_limit.py, z. B. "nordvpn:default"."""
+    return f"{job['provider']}:{job['account']}"
+
+
+def next_jobs(config, state, running, now, limiter=None):
+    """
+    Fällige Jobs in Startreihenfolge, deren Tunnel frei ist und deren Konto eine freie
+    Sitzung hat und nicht gesperrt ist (höchstens so viele wie Plätze frei).
+    """
+    busy_tunnels = {entry["job"]["tunnel"] for entry in running.values()}
+    due = []
+    for job in config["jobs"]:
+        if job["id"] in running:
+            continue
+        value = priority(job, state, now)
+        if value is not None:
+            due.append((value, job))
+    # Bei gleicher Priorität (z. B. mehrere nie gelaufene Jobs) entscheidet importance
+    due.sort(key=lambda item: (item[0], item[1]["importance"]), reverse=True)
+    selected = []
+    for _, job in due:
+        if len(running) + len(selected) >= config["concurrency"]:
+            break
+        if job["tunnel"] in busy_tunnels:
+            continue
+        if limiter is not None and not rate_limit.available(limiter, account_of(job)):
+            continue
+        busy_tunnels.add(job["tunnel"])
+        selected.append(job)
+    return selected
+
+
+def sweep_command(job, results_dir, now, config=None):
+    """Aufruf von sweep.py für einen Job mit Dateinamen wie im Ordner results/."""
+    label = probes.SERVICES[job["service"]]["label"]
+    display = providers.DISPLAY_NAMES[job["provider"]]
+    stamp = datetime.datetime.fromtimestamp(now).strftime("%Y%m%d-%H%M")
+    country = job["country"].upper()
+    output = os.path.join(results_dir, f"{label}_Results_{display}_{country}_{stamp}.txt")
+    server_list = os.path.join(results_dir, f"{display}_{country}_{stamp}.txt")
+    command = [sys.executable, SWEEP_SCRIPT, "--provider", job["provider"], "--service", job["service"],
+               "--country", job["country"], "--backend", job["backend"], "--probe-mode", job["mode"],
+               "--account", job["account"], "--output", output, "--server-list", server_list]
+    if job["tunnel"] != HOST_TUNNEL:
+        command += ["--namespace", job["tunnel"]]
+    if config and config["throttle"]:
+        command += ["--throttle"] + (["--limits", config["limits"]] if config["limits"] else [])
+    return command + job["args"], output
+
+
+def start_job(job, config, now):
+    """Startet den Sweep eines Jobs als eigenen Prozess (Ausgabe in results_dir/logs)."""
+    results_dir = config["results_dir"]
+    command, output = sweep_command(job, results_dir, now, config)
+    log_dir = os.path.join(results_dir, "logs")
+    os.makedirs(log_dir, exist_ok=True)
+    log_file = open(os.path.join(log_dir, f"{job['id']}_{int(now)}.log"), "w")
+    process = subprocess.Popen(command, stdout=log_file, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL)
+    print(f"Starte {job['id']} (Tunnel {job['tunnel']}): {output}")
+    return {"job": job, "process": process, "log": log_file, "output": output, "started": now}
+
+
+def reap(running, state):
+    """Nimmt beendete Sweeps aus running und trägt sie in den Zustand ein; liefert deren Anzahl."""
+    finished = [job_id for job_id, entry in running.items() if entry["process"].poll() is not None]
+    for job_id in finished:
+        entry = running.pop(job_id)
+        entry["log"].close()
+        code = entry["process"].returncode
+        state[job_id] = {"last_run": entry["started"], "exit_code": code, "output": entry["output"]}
+        duration = (time.time() - entry["started"]) / 60
+        print(f"{job_id} beendet (Rückgabewert {code}) nach {duration:.0f} min.")
+    return len(finished)
+
+
+def run(config, once=False, poll_seconds=POLL_SECONDS):
+    """
+    Hauptschleife: beendete Sweeps einsammeln, fällige starten. Mit once endet sie,
+    sobald keine Jobs mehr laufen oder fällig sind. SIGTERM/SIGINT beenden sie, ohne
+    laufende Sweeps abzubrechen (es werden nur keine neuen mehr gestartet).
+    """
+    os.makedirs(config["results_dir"], exist_ok=True)
+    state = load_state(config["state_file"])
+    running = {}
+    stopping = []
+    limiter = rate_limit.new_limiter(rate_limit.load_limits(config["limits"]))
+    signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+    signal.signal(signal.SIGINT, lambda *_: stopping.append(True))
+    while True:
+        if reap(running, state):
+            save_state(config["state_file"], state)
+        now = time.time()
+        jobs = [] if stopping else next_jobs(config, state, running, now, limiter)
+        for job in jobs:
+            running[job["id"]] = start_job(job, config, now)
+        # Mit once auch auf fällige Jobs warten, deren Konto gerade belegt oder gesperrt ist
+        due = any(priority(job, state, now) is not None for job in config["jobs"] if job["id"] not in running)
+        if not running and (stopping or (once and not due)):
+            break
+        time.sleep(min(poll_seconds, 1) if stopping else poll_seconds)
+    print("Planer beendet.")
+
+
+def print_status(config):
+    """Übersicht: letzter Lauf, Fälligkeit und Priorität je Job."""
+    state = load_state(config["state_file"])
+    now = time.time()
+    print("Job\tTunnel\tLetzter Lauf\tRückgabe\tPriorität")
+    for job in config["jobs"]:
+        entry = state.get(job["id"], {})
+        last_run = entry.get("last_run")
+        last = datetime.datetime.fromtimestamp(last_run).strftime("%Y-%m-%d %H:%M") if last_run else "-"
+        value = priority(job, state, now)
+        shown = "nicht fällig" if value is None else ("neu" if value == float("inf") else f"{value:.2f}")
+        print(f"{job['id']}\t{job['tunnel']}\t{last}\t{entry.get('exit_code', '-')}\t{shown}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweeps nach Zeitplan ausführen.")
+    parser.add_argument("command", choices=["run", "once", "status"])
+    parser.add_argument("--config", required=True, help="Konfigurationsdatei (JSON)")
+    parser.add_argument("--poll-seconds", type=float, default=POLL_SECONDS)
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    if args.command == "status":
+        print_status(config)
+    else:
+        run(config, once=args.command == "once", poll_seconds=args.poll_seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Archiv der Serverlisten mit Inhaltsadressierung und Tages-Deltas.
+
+Unter results/*/serverlist liegt für jeden Tag eine vollständige Kopie der Liste,
+obwohl sich von Tag zu Tag kaum etwas ändert. Das Archiv speichert je Reihe (z. B.
+"NordVPN_US") eine vollständige Basis und für jeden weiteren Tag nur die
+Änderungen gegenüber dieser Basis. Alle Objekte werden zlib-komprimiert unter ihrem
+SHA-256 abgelegt; identische Tage kosten damit keinen zusätzlichen Platz.
+
+Ablage im Archivverzeichnis:
+  index.json        {Reihe: [{"date", "source", "sha256", "lines", "base", "delta"}]}
+  objects/ab/cdef…  zlib-komprimierte Objekte (Basis: Text, Delta: JSON)
+
+Ein Delta enthält die Zeilen-Operationen gegenüber der Basis (zur exakten
+Rekonstruktion) und eine Zusammenfassung je Server (added/removed/changed, Schlüssel
+ist die erste Spalte bzw. der Servername). Da jedes Delta direkt auf der Basis
+aufsetzt, braucht die Rekonstruktion eines Tages nur zwei Objekte; "Was hat sich
+zwischen zwei Tagen geändert" wird allein aus den beiden Zusammenfassungen
+berechnet, ohne die Listen selbst zu lesen. Wird ein Delta größer als
+REBASE_RATIO der Liste, beginnt eine neue Basis.
+
+Reihe und Datum werden aus dem Dateinamen abgeleitet (NordVPN_US_20250301.txt,
+NordVPN_US_01032025.txt, expressvpn_us_server_list_20250316.txt).
+
+Beispiele:
+  ./snapshot_archive.py import ../../results/*/*/serverlist/*.txt
+  ./snapshot_archive.py log NordVPN_US
+  ./snapshot_archive.py show NordVPN_US 2025-03-15
+  ./snapshot_archive.py diff Cyberghost_US 2025-03-15 2025-04-08
+  ./snapshot_archive.py stats
+"""
+import argparse
+import datetime
+import difflib
+import hashlib
+import json
+import os
+import re
+import zlib
+
+DEFAULT_ARCHIVE = "serverlist_archive"
+# Anteil geänderter Zeilen, ab dem ein Tag als neue Basis gespeichert wird
+REBASE_RATIO = 0.5
+DATE_PATTERN = re.compile(r"(\d{8})")
+
+
+def parse_filename(filename):
+    """Leitet (Reihe, Datum "YYYY-MM-DD") aus dem Dateinamen ab; Datum None, wenn keins erkennbar."""
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    match = DATE_PATTERN.search(stem)
+    if not match:
+        return stem, None
+    digits = match.group(1)
+    series = (stem[:match.start()] + stem[match.end():]).strip("_-")
+    for pattern in ("%Y%m%d", "%d%m%Y"):
+        try:
+            return series, datetime.datetime.strptime(digits, pattern).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return series, None
+
+
+def server_key(line):
+    """Schlüssel eines Servers: erste Spalte bei Tab-Zeilen, sonst die Zeile ohne Einrückung."""
+    return line.split("\t", 1)[0].strip()
+
+
+def object_path(archive, digest):
+    return os.path.join(archive, "objects", digest[:2], digest[2:])
+
+
+def put_object(archive, data):
+    """Legt data (bytes) komprimiert unter seinem SHA-256 ab; liefert den Hash."""
+    digest = hashlib.sha256(data).hexdigest()
+    path = object_path(archive, digest)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "wb") as f:
+            f.write(zlib.compress(data, 9))
+        os.replace(path + ".tmp", path)
+    return digest
+
+
+def get_object(archive, digest):
+    with open(object_path(archive, digest), "rb") as f:
+        return zlib.decompress(f.read())
+
+
+def load_index(archive):
+    path = os.path.join(archive, "index.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_index(archive, index):
+    """Schreibt den Index atomar (erst Hilfsdatei, dann umbenennen)."""
+    os.makedirs(archive, exist_ok=True)
+    path = os.path.join(archive, "index.json")
+    with open(path + ".tmp", "w") as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def make_delta(base_lines, lines):
+    """
+    Delta von base_lines zu lines: ops = [[von, bis, neue Zeilen], ...] (Indizes der
+    Basis) und die Zusammenfassung je Server.
+    """
+    matcher = difflib.SequenceMatcher(None, base_lines, lines, autojunk=False)
+    ops, old, new = [], {}, {}
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        ops.append([i1, i2, lines[j1:j2]])
+        for line in base_lines[i1:i2]:
+            old[server_key(line)] = line
+        for line in lines[j1:j2]:
+            new[server_key(line)] = line
+    old.pop("", None)
+    new.pop("", None)
+    summary = {
+        "added": {key: line for key, line in new.items() if key not in old},
+        "removed": {key: line for key, line in old.items() if key not in new},
+        # Nur verschobene Zeilen (gleicher Text) gelten nicht als Änderung
+        "changed": {key: [old[key], line] for key, line in new.items() if key in old and old[key] != line},
+    }
+    return {"ops": ops, "summary": summary}
+
+
+def apply_delta(base_lines, delta):
+    """Rekonstruiert die Zeilen eines Tages aus Basis und Delta."""
+    lines, position = [], 0
+    for i1, i2, replacement in delta["ops"]:
+        lines.extend(base_lines[position:i1])
+        lines.extend(replacement)
+        position = i2
+    lines.extend(base_lines[position:])
+    return lines
+
+
+def split_lines(text):
+    return text.splitlines(keepends=True)
+
+
+def find_entry(index, series, date):
+    """Eintrag des Tages date bzw. des letzten Tages davor (Stand der Liste an date)."""
+    entries = [entry for entry in index.get(series, []) if entry["date"] <= date]
+    if not entries:
+        raise KeyError(f"Keine Serverliste für {series} am oder vor {date}")
+    return entries[-1]
+
+
+def store(archive, filename, series=None, date=None, index=None):
+    """
+    Nimmt eine Serverliste in das Archiv auf. Liefert (Reihe, Datum, Zusammenfassung);
+    die Zusammenfassung ist None bei einer neuen Basis.
+    """
+    parsed_series, parsed_date = parse_filename(filename)
+    series = series or parsed_series
+    date = date or parsed_date or datetime.date.fromtimestamp(os.path.getmtime(filename)).isoformat()
+    with open(filename, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+    own_index = index is None
+    if own_index:
+        index = load_index(archive)
+    entries = [entry for entry in index.get(series, []) if entry["date"] != date]
+    lines = split_lines(data.decode("utf-8"))
+    entry = {"date": date, "source": os.path.basename(filename), "sha256": digest, "lines": len(lines)}
+
+    previous = [e for e in entries if e["date"] < date]
+    base = previous[-1]["base"] if previous else None
+    summary = None
+    if base:
+        delta = make_delta(split_lines(get_object(archive, base).decode("utf-8")), lines)
+        changed = sum(i2 - i1 + len(replacement) for i1, i2, replacement in delta["ops"])
+        if changed > REBASE_RATIO * max(len(lines), 1):
+            base = None
+        else:
+            entry["delta"] = put_object(archive, json.dumps(delta, sort_keys=True).encode("utf-8")) \
+                if delta["ops"] else None
+            summary = delta["summary"]
+    if not base:
+        base = put_object(archive, data)
+        entry["delta"] = None
+    entry["base"] = base
+    entries.append(entry)
+    entries.sort(key=lambda e: e["date"])
+    index[series] = entries
+    if own_index:
+        save_index(archive, index)
+    return series, date, summary
+
+
+def read_delta(archive, entry):
+    if not entry["delta"]:
+        return {"ops": [], "summary": {"added": {}, "removed": {}, "changed": {}}}
+    return json.loads(get_object(archive, entry["delta"]))
+
+
+def reconstruct(archive, series, date, index=None):
+    """Text der Serverliste von series am Tag date."""
+    entry = find_entry(index or load_index(archive), series, date)
+    base_lines = split_lines(get_object(archive, entry["base"]).decode("utf-8"))
+    text = "".join(apply_delta(base_lines, read_delta(archive, entry)))
+    if hashlib.sha256(text.encode("utf-8")).hexdigest() != entry["sha256"]:
+        raise ValueError(f"Prüfsumme von {series} {entry['date']} stimmt nicht")
+    return text
+
+
+def server_lines(lines):
+    return {key: line for key, line in ((server_key(line), line) for line in lines) if key}
+
+
+def view(summary):
+    """
+    Zustand der von einem Delta berührten Server: {Schlüssel: Zeile oder None}, dazu
+    ihre Zeile in der Basis. Nicht berührte Server haben den Stand der Basis.
+    """
+    state, base = {}, {}
+    for key, line in summary["added"].items():
+        state[key], base[key] = line, None
+    for key, line in summary["removed"].items():
+        state[key], base[key] = None, line
+    for key, (old, new) in summary["changed"].items():
+        state[key], base[key] = new, old
+    return state, base
+
+
+def compare(before, after):
+    """Änderungen zwischen zwei Zuständen {Schlüssel: Zeile oder None}."""
+    changes = {"added": {}, "removed": {}, "changed": {}}
+    for key in sorted(set(before) | set(after)):
+        old, new = before.get(key), after.get(key)
+        if old == new:
+            continue
+        if old is None:
+            changes["added"][key] = new
+        elif new is None:
+            changes["removed"][key] = old
+        else:
+            changes["changed"][key] = [old, new]
+    return changes
+
+
+def changes_between(archive, series, date_from, date_to, index=None):
+    """
+    Was hat sich in series zwischen date_from und date_to geändert? Bei gemeinsamer
+    Basis nur aus den beiden Delta-Zusammenfassungen (Aufwand je Änderung), sonst
+    durch Vergleich der rekonstruierten Listen.
+    """
+    index = index or load_index(archive)
+    first, second = find_entry(index, series, date_from), find_entry(index, series, date_to)
+    if first["base"] != second["base"]:
+        before = server_lines(split_lines(reconstruct(archive, series, first["date"], index)))
+        after = server_lines(split_lines(reconstruct(archive, series, second["date"], index)))
+        return compare(before, after)
+    state_from, base_from = view(read_delta(archive, first)["summary"])
+    state_to, base_to = view(read_delta(archive, second)["summary"])
+    base = dict(base_to, **base_from)
+    before = {key: state_from.get(key, base[key]) for key in set(state_from) | set(state_to)}
+    after = {key: state_to.get(key, base[key]) for key in before}
+    return compare(before, after)
+
+
+def archive_size(archive):
+    total = 0
+    for directory, _, files in os.walk(archive):
+        total += sum(os.path.getsize(os.path.join(directory, name)) for name in files)
+    return total
+
+
+def print_changes(changes):
+    for key, line in changes["added"].items():
+        print(f"+ {line.rstrip()}")
+    for key, line in changes["removed"].items():
+        print(f"- {line.rstrip()}")
+    for key, (old, new) in changes["changed"].items():
+        print(f"~ {old.rstrip()}\n  -> {new.rstrip()}")
+    print(f"{len(changes['added'])} neu, {len(changes['removed'])} entfernt, {len(changes['changed'])} geändert.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archiv der Serverlisten mit Tages-Deltas.")
+    parser.add_argument("command", choices=["import", "log", "show", "diff", "stats"])
+    parser.add_argument("arguments", nargs="*", help="import: Dateien; log: Reihe; show: Reihe Datum; "
+                                                     "diff: Reihe Datum Datum")
+    parser.add_argument("--archive", default=DEFAULT_ARCHIVE, help="Archivverzeichnis")
+    parser.add_argument("--series", help="import: Reihe statt aus dem Dateinamen")
+    parser.add_argument("--date", help="import: Datum (YYYY-MM-DD) statt aus dem Dateinamen")
+    parser.add_argument("--output", help="show: Datei statt Standardausgabe")
+    args = parser.parse_intermixed_args()
+    needed = {"import": 1, "log": 1, "show": 2, "diff": 3, "stats": 0}[args.command]
+    if len(args.arguments) < needed:
+        parser.error(f"{args.command} benötigt {needed} Argument(e)")
+
+    if args.command == "import":
+        index = load_index(args.archive)
+        for filename in sorted(args.arguments, key=lambda name: parse_filename(name)[1] or ""):
+            series, date, summary = store(args.archive, filename, args.series, args.date, index)
+            if summary is None:
+                note = "Basis"
+            else:
+                note = f"{len(summary['added'])} neu, {len(summary['removed'])} entfernt, " \
+                       f"{len(summary['changed'])} geändert"
+            print(f"{series}\t{date}\t{note}")
+        save_index(args.archive, index)
+    elif args.command == "log":
+        index = load_index(args.archive)
+        series = args.arguments[0]
+        for entry in index.get(series, []):
+            if entry["delta"] is None and entry["sha256"] == entry["base"]:
+                note = "Basis"
+            else:
+                summary = read_delta(args.archive, entry)["summary"]
+                note = f"+{len(summary['added'])} -{len(summary['removed'])} ~{len(summary['changed'])}"
+            print(f"{entry['date']}\t{entry['lines']} Zeilen\t{note}\t{entry['source']}")
+    elif args.command == "show":
+        text = reconstruct(args.archive, args.arguments[0], args.arguments[1])
+        if args.output:
+            with open(args.output, "w") as f:
+                f.write(text)
+        else:
+            print(text, end="")
+    elif args.command == "diff":
+        print_changes(changes_between(args.archive, *args.arguments[:3]))
+    else:
+        index = load_index(args.archive)
+        print("Reihe\tTage\tBasen")
+        for series, entries in sorted(index.items()):
+            print(f"{series}\t{len(entries)}\t{len({entry['base'] for entry in entries})}")
+        print(f"Archivgröße: {archive_size(args.archive) / 1024:.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Dauertest der Verbindungsstabilität einzelner Server.
+
+Der Sweep hält jeden Tunnel nur wenige Sekunden. Ein Server, der Peacock freischaltet,
+aber alle 20 Minuten abreißt, fällt dabei nicht auf. Hier wird ein Tunnel über
+Stunden gehalten und nebenher mit geringem Aufwand gemessen:
+  - Erreichbarkeit und RTT per TCP-Handshake zu target (Standard 1.1.1.1:443) im
+    Abstand von interval Sekunden
+  - die externe IP im Abstand von ip_interval Sekunden
+Gemessen wird in einem eigenen Prozess ("sample"), der bei Bedarf im Network
+Namespace des Tunnels läuft und je Messung eine Tab-getrennte Zeile ausgibt.
+
+Schlagen drop_after Messungen in Folge fehl, zählt das als Abbruch; dauert er länger
+als reconnect_after Sekunden, wird neu verbunden. Je Server entstehen eine Zeitleiste
+der externen IP im Format von KillSwitchTests/ (inkl. IP-Wechsel), eine Auswertung
+mit den Ereignissen und eine Zeile in soak_summary.txt (Abbrüche pro Stunde,
+Ausfallzeit, Verlust, RTT-Perzentile, IP-Wechsel).
+
+Mehrere Dauertests laufen gleichzeitig, wenn jeder Server einen eigenen Namespace
+hat ("server@namespace", WireGuard-Backend, auch ProtonVPN); über die Anbieter-CLI
+ist nur einer möglich, weil sie das Routing des ganzen Rechners ändert. Schlägt ein
+Dauertest fehl (z. B. Verbindung oder Serverliste), steht der Server mit "-" statt
+Kennzahlen in der Zusammenfassung.
+
+Beispiele:
+  ./soak.py --provider nordvpn --server uk2242 --hours 4
+  ./soak.py --provider nordvpn --backend wireguard --catalogue nordlynx_uk.txt \\
+      --private-key-file nordlynx.key --server uk2242@soak1 --server uk2243@soak2 --hours 8
+"""
+import argparse
+import datetime
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import exit_ip
+import killswitch_monitor
+import providers
+
+DEFAULT_TARGET = "1.1.1.1:443"
+DEFAULT_INTERVAL = 2.0
+DEFAULT_IP_INTERVAL = 60.0
+DEFAULT_TIMEOUT = 2.0
+DROP_AFTER = 3
+RECONNECT_AFTER = 30.0
+PERCENTILES = (50, 95, 99)
+SUMMARY_HEADER = ("Server\tDauer (h)\tAbbrüche\tAbbrüche/h\tAusfall (s)\tVerlust\t"
+                  "RTT p50 (ms)\tRTT p95 (ms)\tRTT p99 (ms)\tIP-Wechsel\tNeu verbunden\n")
+SCRIPT = os.path.abspath(__file__)
+NETNS_DIR = "/run/netns"
+
+
+def tcp_rtt(host, port, timeout):
+    """Dauer des TCP-Handshakes in ms oder None; ein RST zählt als erreichbar."""
+    started = time.monotonic()
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            pass
+    except ConnectionRefusedError:
+        pass
+    except OSError:
+        return None
+    return (time.monotonic() - started) * 1000
+
+
+def sample_loop(target, interval, ip_interval, timeout, endpoints=exit_ip.DEFAULT_ENDPOINTS):
+    """
+    Messprozess: gibt je Messung "rtt<TAB>Zeit<TAB>ms|-" bzw. "ip<TAB>Zeit<TAB>IP|-"
+    aus, bis stdin geschlossen bzw. der Prozess beendet wird.
+    """
+    host, _, port = target.rpartition(":")
+    next_ip = 0.0
+    while True:
+        started = time.monotonic()
+        rtt = tcp_rtt(host, int(port), timeout)
+        print(f"rtt\t{time.time():.3f}\t{'-' if rtt is None else f'{rtt:.1f}'}", flush=True)
+        if started >= next_ip:
+            ip, _ = exit_ip.lookup_exit_ip(endpoints, timeout=timeout)
+            print(f"ip\t{time.time():.3f}\t{ip or '-'}", flush=True)
+            next_ip = started + ip_interval
+        time.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+
+def sampler_command(namespace, target, interval, ip_interval, timeout):
+    command = [sys.executable, SCRIPT, "sample", "--target", target, "--interval", str(interval),
+               "--ip-interval", str(ip_interval), "--timeout", str(timeout)]
+    if namespace:
+        command = ["ip", "netns", "exec", namespace] + command
+    return command
+
+
+def percentile(values, p):
+    """p-Perzentil (nächster Rang) einer sortierten Liste; None, wenn leer."""
+    if not values:
+        return None
+    rank = max(1, -(-p * len(values) // 100))
+    return values[int(rank) - 1]
+
+
+def new_soak(name):
+    return {"name": name, "rtts": [], "probes": 0, "lost": 0, "ip_samples": [], "events": [],
+            "drops": 0, "downtime": 0.0, "reconnects": 0, "started": time.time(), "ended": None,
+            "failures": 0, "down_since": None, "dropped": False, "reconnected_at": None, "error": None}
+
+
+def record_rtt(soak, wall, rtt, drop_after):
+    """Wertet eine Erreichbarkeitsmessung aus und erkennt Abbrüche und Erholung."""
+    soak["probes"] += 1
+    if rtt is not None:
+        soak["rtts"].append(rtt)
+        if soak["dropped"]:
+            outage = wall - soak["down_since"]
+            soak["downtime"] += outage
+            soak["events"].append((wall, f"Verbindung wieder da nach {outage:.1f} s"))
+        soak["failures"], soak["down_since"], soak["dropped"], soak["reconnected_at"] = 0, None, False, None
+        return
+    soak["lost"] += 1
+    soak["failures"] += 1
+    if soak["down_since"] is None:
+        soak["down_since"] = wall
+    if soak["failures"] == drop_after:
+        soak["drops"] += 1
+        soak["dropped"] = True
+        soak["events"].append((soak["down_since"], "Verbindung abgebrochen"))
+
+
+def record_ip(soak, wall, ip):
+    soak["ip_samples"].append({"seq": len(soak["ip_samples"]) + 1, "wall": wall, "mono": 0.0,
+                               "ip": ip, "country": None, "latency": None})
+
+
+def summarize(soak):
+    """Kennzahlen eines Dauertests."""
+    hours = max((soak["ended"] or time.time()) - soak["started"], 1e-9) / 3600
+    rtts = sorted(soak["rtts"])
+    killswitch_monitor.mark_ip_changes(soak["ip_samples"])
+    return {
+        "hours": hours,
+        "drops": soak["drops"],
+        "drops_per_hour": soak["drops"] / hours,
+        "downtime": soak["downtime"],
+        "loss": soak["lost"] / soak["probes"] if soak["probes"] else None,
+        "percentiles": {p: percentile(rtts, p) for p in PERCENTILES},
+        "ip_changes": sum(1 for sample in soak["ip_samples"] if sample["changed"]),
+        "reconnects": soak["reconnects"],
+    }
+
+
+def run_soak(session, server, duration, target, interval, ip_interval, timeout, drop_after, reconnect_after):
+    """Hält die Verbindung zu server für duration Sekunden und liefert den Dauertest."""
+    soak = new_soak(server["name"])
+    status = providers.connect_server(session, server)
+    soak["events"].append((time.time(), f"Verbunden ({status})"))
+    if status != "connected":
+        soak["error"] = f"Verbindung {status}"
+        soak["ended"] = time.time()
+        return soak
+    time.sleep(session["settle"])
+    namespace = session["tunnel"]["namespace"] if session.get("tunnel") else None
+    sampler = subprocess.Popen(sampler_command(namespace, target, interval, ip_interval, timeout),
+                               stdout=subprocess.PIPE, text=True)
+    deadline = time.monotonic() + duration
+    try:
+        for line in sampler.stdout:
+            kind, wall, value = line.rstrip("\n").split("\t")
+            wall = float(wall)
+            if kind == "ip":
+                record_ip(soak, wall, None if value == "-" else value)
+            else:
+                record_rtt(soak, wall, None if value == "-" else float(value), drop_after)
+            down = soak["down_since"]
+            since = soak["reconnected_at"] or down
+            if soak["dropped"] and wall - since >= reconnect_after:
+                status = providers.connect_server(session, server)
+                soak["reconnects"] += 1
+                soak["reconnected_at"] = time.time()
+                soak["events"].append((soak["reconnected_at"], f"Neu verbunden ({status})"))
+            if time.monotonic() >= deadline:
+                break
+    finally:
+        sampler.terminate()
+        sampler.wait()
+        if soak["dropped"]:
+            soak["downtime"] += time.time() - soak["down_since"]
+        soak["ended"] = time.time()
+        providers.disconnect_server(session, final=True)
+    return soak
+
+
+def format_ms(value):
+    return "-" if value is None else f"{value:.1f}"
+
+
+def write_outputs(soak, summary, output_dir):
+    """Zeitleiste der externen IP, Auswertung und Zeile der Zusammenfassung."""
+    base = os.path.join(output_dir, f"{soak['name']}_soak")
+    killswitch_monitor.write_timeline(soak["ip_samples"], base + ".txt")
+    with open(base + "_Auswertung.txt", "w") as f:
+        f.write(f"Server\t{soak['name']}\n")
+        f.write(f"Dauer\t{summary['hours']:.2f} h\n")
+        f.write(f"Messungen\t{soak['probes']}\n")
+        f.write(f"Abbrüche\t{summary['drops']} ({summary['drops_per_hour']:.2f}/h)\n")
+        f.write(f"Ausfallzeit\t{summary['downtime']:.1f} s\n")
+        for p, value in summary["percentiles"].items():
+            f.write(f"RTT p{p}\t{format_ms(value)} ms\n")
+        f.write("\nZeit\tEreignis\n")
+        for wall, text in sorted(soak["events"]):
+            f.write(f"{killswitch_monitor.format_timestamp(wall)}\t{text}\n")
+    summary_file = os.path.join(output_dir, "soak_summary.txt")
+    with open(summary_file, "a") as f:
+        if f.tell() == 0:
+            f.write(SUMMARY_HEADER)
+        if soak["error"]:
+            # Fehlgeschlagene Dauertests ohne Kennzahlen, damit sie nicht als stabil erscheinen
+            f.write(f"{soak['name']}\t{summary['hours']:.2f}" + "\t-" * (SUMMARY_HEADER.count("\t") - 1) + "\n")
+            return
+        loss = "-" if summary["loss"] is None else f"{summary['loss'] * 100:.1f} %"
+        rtts = "\t".join(format_ms(summary["percentiles"][p]) for p in PERCENTILES)
+        f.write(f"{soak['name']}\t{summary['hours']:.2f}\t{summary['drops']}\t{summary['drops_per_hour']:.2f}\t"
+                f"{summary['downtime']:.0f}\t{loss}\t{rtts}\t{summary['ip_changes']}\t{summary['reconnects']}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dauertest der Verbindungsstabilität.")
+    parser.add_argument("command", nargs="?", default="run", choices=["run", "sample"])
+    parser.add_argument("--provider", choices=sorted(providers.DISPLAY_NAMES))
+    parser.add_argument("--server", action="append", help="Server (Ziel der Anbieter-CLI bzw. Katalogname), "
+                                                          "optional mit @namespace (mehrfach)")
+    parser.add_argument("--country", help="Ländercode zum Nachschlagen der Server (Standard: aus dem Namen)")
+    parser.add_argument("--backend", default="cli", choices=["cli", "wireguard", "openvpn"])
+    parser.add_argument("--configs", help="ProtonVPN: Verzeichnis mit .ovpn- bzw. .conf-Dateien")
+    parser.add_argument("--auth-file", help="ProtonVPN/OpenVPN: Datei mit Benutzername und Passwort")
+    parser.add_argument("--catalogue", help="WireGuard: Katalogdatei (siehe wireguard_backend.py)")
+    parser.add_argument("--private-key-file", help="WireGuard: privater Schlüssel des Anbieters")
+    parser.add_argument("--hours", type=float, default=1.0, help="Dauer je Server (h)")
+    parser.add_argument("--target", default=DEFAULT_TARGET, help="host:port für die Erreichbarkeit")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL, help="Abstand der RTT-Messungen (s)")
+    parser.add_argument("--ip-interval", type=float, default=DEFAULT_IP_INTERVAL,
+                        help="Abstand der Abfragen der externen IP (s)")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT)
+    parser.add_argument("--drop-after", type=int, default=DROP_AFTER,
+                        help="So viele Fehlmessungen in Folge gelten als Abbruch")
+    parser.add_argument("--reconnect-after", type=float, default=RECONNECT_AFTER,
+                        help="Nach so vielen Sekunden Abbruch neu verbinden")
+    parser.add_argument("--output-dir", default="soak", help="Verzeichnis für Zeitleisten und Auswertungen")
+    args = parser.parse_args()
+
+    if args.command == "sample":
+        sample_loop(args.target, args.interval, args.ip_interval, args.timeout)
+        return
+    if not (args.provider and args.server):
+        parser.error("run benötigt --provider und --server")
+    entries = [(name, namespace or None) for name, _, namespace in (s.partition("@") for s in args.server)]
+    if len(entries) > 1 and not all(namespace for _, namespace in entries):
+        parser.error("Mehrere gleichzeitige Dauertests benötigen je Server einen Namespace (server@namespace)")
+    if any(namespace for _, namespace in entries) and args.backend != "wireguard":
+        parser.error("Namespaces werden nur mit dem WireGuard-Backend unterstützt")
+    if any(namespace and not os.path.exists(os.path.join(NETNS_DIR, namespace)) for _, namespace in entries):
+        parser.error("Namespace nicht gefunden (siehe ip netns list)")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    results = {}
+
+    def soak_server(name, namespace):
+        session = providers.open_session(
+            args.provider, args.backend, configs=args.configs, auth_file=args.auth_file,
+            catalogue=args.catalogue, private_key_file=args.private_key_file, namespace=namespace,
+            interface=f"wg{namespace}"[:15] if namespace else None,
+        )
+        server = providers.new_server(args.provider, name, name, args.country or name[:2])
+        if args.backend == "wireguard" or args.provider == "protonvpn":
+            country = args.country or name[:2]
+            matches = [s for s in providers.fetch_servers(session, country) if s["name"] == name]
+            if not matches:
+                raise ValueError(f"Server {name} nicht gefunden")
+            server = matches[0]
+        print(f"Dauertest {name}{f' in {namespace}' if namespace else ''} für {args.hours:g} h ...")
+        soak = run_soak(session, server, args.hours * 3600, args.target, args.interval, args.ip_interval,
+                        args.timeout, args.drop_after, args.reconnect_after)
+        return soak, summarize(soak)
+
+    def soak_one(name, namespace):
+        try:
+            results[name] = soak_server(name, namespace)
+        except Exception as e:
+            print(f"Fehler beim Dauertest für {name}: {e}")
+            soak = new_soak(name)
+            soak["error"] = str(e)
+            soak["ended"] = time.time()
+            soak["events"].append((soak["ended"], f"Fehler: {e}"))
+            results[name] = (soak, summarize(soak))
+
+    threads = [threading.Thread(target=soak_one, args=entry) for entry in entries]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
+    print(f"\nDauertests beendet ({stamp}).")
+    for name, (soak, summary) in results.items():
+        write_outputs(soak, summary, args.output_dir)
+        if soak["error"]:
+            print(f"{name}: fehlgeschlagen ({soak['error']})")
+            continue
+        p50, p95 = summary["percentiles"][50], summary["percentiles"][95]
+        print(f"{name}: {summary['drops']} Abbrüche ({summary['drops_per_hour']:.2f}/h), "
+              f"RTT p50 {format_ms(p50)} ms, p95 {format_ms(p95)} ms, {summary['ip_changes']} IP-Wechsel")
+
+
+if __name__ == "__main__":
+    main()
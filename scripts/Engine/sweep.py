@@ -0,0 +1,595 @@
+#!/usr/bin/env python3
+"""
+Gemeinsame Sweep-Schleife für alle Anbieter.
+
+Entspricht dem Ablauf der Einzelskripte (Serverliste abrufen, nacheinander
+verbinden, externe IP und Dienst prüfen, Ergebnis schreiben, trennen), ist aber
+unabhängig vom Anbieter und vom Verbindungs-Backend (siehe providers.py).
+Die Ergebnisse haben dasselbe Schema wie unter results/: Server, Externe IP, Ergebnis.
+
+Beispiele:
+  ./sweep.py --provider nordvpn --service peacock
+  ./sweep.py --provider protonvpn --service bbciplayer --configs ~/protonvpn/openvpn --auth-file ~/protonvpn/auth.txt
+  ./sweep.py --provider protonvpn --service peacock --backend wireguard --configs ~/protonvpn/wireguard
+  ./sweep.py --provider nordvpn --service bbciplayer --backend wireguard \\
+      --catalogue nordlynx_uk.txt --private-key-file nordlynx.key
+  ./sweep.py --provider nordvpn --service bbciplayer --probe-mode manifest --bbc-vpid <Versions-ID>
+  sudo ./sweep.py --provider nordvpn --service peacock --backend wireguard --namespace sweep1 \\
+      --catalogue nordlynx_us.txt --private-key-file nordlynx.key
+
+Mit --namespace startet sich der Sweep per "ip netns exec" im angegebenen Network
+Namespace neu: Tunnel, IP-Abfragen und Prüfungen (curl, Browser) verwenden dann nur
+dessen Routing, das des Rechners bleibt unberührt. Der Namespace braucht eine
+eigene Verbindung nach außen (z. B. veth mit NAT). Nur mit dem WireGuard-Backend,
+weil die Anbieter-CLIs immer das Routing des ganzen Rechners ändern.
+"""
+import argparse
+import concurrent.futures
+import datetime
+import os
+import sys
+import time
+
+import catalogue
+import exit_ip
+import latency_scan
+import leak_probe
+import manifest_probe
+import perf_probe
+import planner
+import probes
+import progress
+import providers
+import rate_limit
+import snapshot_archive
+import timings
+import wireguard_backend
+
+RESULTS_COLUMNS = ["Server", "Externe IP", "Ergebnis"]
+SERVER_LIST_HEADER = "Server\tZiel\tStadt\tStation\tStatus\tLoad\n"
+
+# Verbindungsstatus -> Ergebnistext (wie in scripts/NordVPN/Peacock_Test.py)
+SKIPPED_RESULTS = {
+    "dedicated": "Skipped (Dedicated IP required)",
+    "failed": "Skipped (VPN connection failed)",
+    "unavailable": "Skipped (Server unavailable or unsupported)",
+}
+
+# Kurze Pause vor dem nächsten Test
+PAUSE_SECONDS = 2
+
+# Wiederholung unentschiedener Server am Ende des Laufs: Runden, Gesamtzahl der
+# Wiederholungen und Wartezeit vor der ersten Runde (verdoppelt sich je Runde)
+RETRY_ROUNDS = 2
+RETRY_BUDGET = 50
+RETRY_BACKOFF = 30
+
+NETNS_DIR = "/run/netns"
+# Gesetzt im erneut gestarteten Sweep im Namespace (siehe enter_namespace())
+NAMESPACE_ENV = "VPNTESTING_NAMESPACE"
+
+
+def enter_namespace(namespace):
+    """Startet den Sweep im Network Namespace neu; im Namespace selbst kehrt sie zurück."""
+    if os.environ.get(NAMESPACE_ENV) == namespace:
+        return
+    env = dict(os.environ, **{NAMESPACE_ENV: namespace})
+    command = ["ip", "netns", "exec", namespace, sys.executable, os.path.abspath(__file__)] + sys.argv[1:]
+    os.execvpe("ip", command, env)
+
+
+def save_server_list(servers, filename):
+    """Speichert die Serverliste (Tab-getrennt)."""
+    with open(filename, "w") as f:
+        f.write(SERVER_LIST_HEADER)
+        for server in servers:
+            load = "" if server["load"] is None else server["load"]
+            f.write(f"{server['name']}\t{server['target']}\t{server['city']}\t"
+                    f"{server['station']}\t{server['status']}\t{load}\n")
+
+
+def extra_columns(side_probes):
+    """Zusätzliche Ergebnisspalten aller Nebenprüfungen in fester Reihenfolge."""
+    return [column for side_probe in side_probes for column in side_probe["columns"]]
+
+
+def write_result(filename, record, columns=()):
+    """Hängt ein Ergebnis an die Ergebnisdatei an (Zusatzspalten aus record["extra"])."""
+    extra = record.get("extra", {})
+    cells = [record["server"], record["ip"], record["result"]] + [str(extra.get(c, "")) for c in columns]
+    with open(filename, "a") as f:
+        f.write("\t".join(cells) + "\n")
+
+
+def rewrite_results(filename, records, columns=()):
+    """Schreibt die Ergebnisdatei neu (nach den Wiederholungen)."""
+    with open(filename, "w") as f:
+        f.write("\t".join(RESULTS_COLUMNS + list(columns)) + "\n")
+    for record in records:
+        write_result(filename, record, columns)
+
+
+def needs_retry(record):
+    """Unentschiedene Prüfungen und gescheiterte Verbindungen werden wiederholt."""
+    return probes.is_inconclusive(record["result"]) or record["result"] == SKIPPED_RESULTS["failed"]
+
+
+def run_check(check):
+    """Führt die Dienstprüfung aus; liefert (Ergebnis, Zusatzspalten) für beide Prüfarten."""
+    outcome = check()
+    if isinstance(outcome, tuple):
+        return outcome
+    return outcome, {}
+
+
+def run_side_probes(side_probes, check):
+    """
+    Führt die Dienstprüfung check() aus, während die Nebenprüfungen (z. B. die
+    Leistungsmessung) parallel in eigenen Threads laufen. Liefert (Ergebnis, Zusatzspalten).
+    """
+    if not side_probes:
+        return run_check(check)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(side_probes)) as pool:
+        futures = [pool.submit(side_probe["run"]) for side_probe in side_probes]
+        result, extra = run_check(check)
+        for side_probe, future in zip(side_probes, futures):
+            try:
+                extra.update(future.result())
+            except Exception as e:
+                print(f"Fehler bei der Nebenprüfung {side_probe['name']}: {e}")
+    return result, extra
+
+
+def remaining_time(deadline):
+    """Sekunden bis deadline (time.monotonic()), None ohne Frist."""
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+def test_server(session, server, check, side_probes=(), lookup_ip=None, throttle=None, deadline=None):
+    """
+    Verbindet mit server, prüft IP und Dienst (check) und liefert den Ergebnis-Eintrag.
+    lookup_ip() liefert (IP, Zusatzspalten), z. B. Land und ASN (siehe exit_ip.resolve()).
+    throttle ({"limiter", "account", "domain"}) begrenzt Verbindungen je Konto und
+    Prüfungen je Domain (siehe rate_limit.py).
+    Mit session["progress"] werden die Dauern der Phasen gemeldet (siehe progress.py).
+    Mit session["timings"] ersetzen die gelernten Zeiten je Server die feste Wartezeit
+    und das Zeitlimit des WireGuard-Handshakes; die Dauern werden dabei aufgenommen
+    (siehe timings.py).
+    Mit deadline (time.monotonic()) werden Verbindungsaufbau (WireGuard) und Warten
+    darauf begrenzt und vor jeder weiteren Phase geprüft; ist die Frist um, liefert
+    der Test planner.DEFERRED_RESULT.
+    """
+    limiter, account, domain = (throttle["limiter"], throttle["account"], throttle["domain"]) if throttle \
+        else (None, None, None)
+    learned, tracker = session.get("timings"), session.get("progress")
+    waited = rate_limit.acquire(limiter, account)
+    if waited:
+        print(f"Ratenbegrenzung: {waited:.1f} s gewartet.")
+    connect_timeout = None
+    if learned is not None and session["backend"] == "wireguard":
+        connect_timeout = timings.timeout(learned, session, server["name"], "connect",
+                                          wireguard_backend.HANDSHAKE_TIMEOUT)
+    if deadline is not None and session["backend"] == "wireguard":
+        connect_timeout = min(connect_timeout or wireguard_backend.HANDSHAKE_TIMEOUT, remaining_time(deadline))
+    deferred = {"server": server["name"], "ip": "n/a", "result": planner.DEFERRED_RESULT}
+    started = time.monotonic()
+    status = providers.connect_server(session, server, connect_timeout)
+    connected = time.monotonic() - started
+    progress.phase(tracker, "connect", connected)
+    if status != "connected":
+        result = SKIPPED_RESULTS.get(status, status)
+        rate_limit.report(limiter, account, rate_limit.signal(result))
+        return {"server": server["name"], "ip": "n/a", "result": result}
+    rate_limit.report(limiter, account, "ok")
+    if learned is not None:
+        timings.record(learned, session, server["name"], "connect", connected)
+    if remaining_time(deadline) == 0:
+        return deferred
+    settled_ip = None
+    started = time.monotonic()
+    if learned is None:
+        # Warte, damit sich die VPN-Verbindung aufbauen kann
+        time.sleep(session["settle"] if deadline is None else min(session["settle"], remaining_time(deadline)))
+    else:
+        settled_ip, _ = timings.settle(learned, session, server["name"], max_wait=remaining_time(deadline))
+    progress.phase(tracker, "settle", time.monotonic() - started)
+    if remaining_time(deadline) == 0:
+        return deferred
+    started = time.monotonic()
+    ip, ip_extra = lookup_ip() if lookup_ip else (settled_ip or probes.check_external_ip(), {})
+    looked_up = time.monotonic() - started
+    progress.phase(tracker, "ip", looked_up)
+    if learned is not None:
+        timings.record(learned, session, server["name"], "ip", looked_up)
+    print(f"Externe IP: {ip}")
+    if remaining_time(deadline) == 0:
+        return deferred
+    rate_limit.acquire(limiter, domain)
+    started = time.monotonic()
+    result, extra = run_side_probes(side_probes, check)
+    probed = time.monotonic() - started
+    progress.phase(tracker, "probe", probed)
+    if learned is not None:
+        timings.record(learned, session, server["name"], "probe", probed)
+    rate_limit.report(limiter, domain, rate_limit.signal(result))
+    extra.update(ip_extra)
+    return {"server": server["name"], "ip": ip, "result": result, "extra": extra}
+
+
+def run_sweep(session, servers, check, output_file, skipped=(), side_probes=(), check_columns=(),
+              retry_rounds=RETRY_ROUNDS, retry_budget=RETRY_BUDGET, retry_backoff=RETRY_BACKOFF, retry_fresh=False,
+              lookup_ip=None, pipeline=False, warm=None, throttle=None):
+    """
+    Testet alle Server nacheinander mit der Dienstprüfung check und schreibt die
+    Ergebnisse fortlaufend. check_columns sind die Zusatzspalten der Dienstprüfung
+    selbst (Prüfung auf Wiedergabe-Ebene) und von lookup_ip (siehe test_server()).
+    skipped enthält (Server, Grund) für Server, die vorab aussortiert wurden
+    (siehe latency_scan.rank_servers()); sie werden ohne Verbindung eingetragen.
+    side_probes sind Nebenprüfungen ({"name", "columns", "run"}), deren Spalten
+    an das Ergebnis angehängt werden.
+    Unentschiedene Server (siehe needs_retry()) werden am Ende erneut geprüft
+    (siehe retry_queue()) und ihre Einträge in der Ergebnisdatei ersetzt.
+    Mit pipeline wird Server N+1 vorbereitet (providers.prepare_server() und warm(),
+    z. B. Browser starten), während Server N geprüft wird, und das Ergebnis in einem
+    eigenen Thread geschrieben, sodass zwischen zwei Verbindungen nur Trennen und
+    Verbinden liegen.
+    Mit throttle belegt der Sweep eine Sitzung des Kontos (rate_limit.session_slot())
+    und hält die Raten je Konto und Domain ein (siehe test_server()).
+    """
+    columns = list(check_columns) + extra_columns(side_probes)
+    with open(output_file, "w") as f:
+        f.write("\t".join(RESULTS_COLUMNS + columns) + "\n")
+    records = []
+    for server, reason in skipped:
+        record = {"server": server["name"], "ip": "n/a", "result": f"Skipped ({reason})"}
+        write_result(output_file, record, columns)
+        records.append(record)
+    queue = []
+    preparer = concurrent.futures.ThreadPoolExecutor(max_workers=1) if pipeline else None
+    writer = concurrent.futures.ThreadPoolExecutor(max_workers=1) if pipeline else None
+    limiter, account = (throttle["limiter"], throttle["account"]) if throttle else (None, None)
+    with rate_limit.session_slot(limiter, account):
+        try:
+            prepared = preparer.submit(prepare_server, session, servers[0], warm) if pipeline and servers else None
+            for index, server in enumerate(servers):
+                if prepared:
+                    prepared.result()
+                    prepared = None
+                    if index + 1 < len(servers):
+                        prepared = preparer.submit(prepare_server, session, servers[index + 1], warm)
+                record = probe_server(session, server, check, side_probes, lookup_ip, throttle)
+                if writer:
+                    writer.submit(write_result, output_file, record, columns)
+                else:
+                    write_result(output_file, record, columns)
+                if needs_retry(record):
+                    queue.append((len(records), server))
+                records.append(record)
+            if writer:
+                writer.shutdown(wait=True)
+            if queue and retry_rounds:
+                retry_queue(session, queue, records, check, side_probes, retry_rounds, retry_budget,
+                            retry_backoff, retry_fresh, lookup_ip, throttle)
+                rewrite_results(output_file, records, columns)
+        finally:
+            if pipeline:
+                preparer.shutdown(wait=True)
+                writer.shutdown(wait=True)
+                probes.close_spare_browser()
+            providers.close_session(session)
+    return records
+
+
+def run_budget(session, servers, check, output_file, budget, history, deferred_file, skipped=(), side_probes=(),
+               check_columns=(), lookup_ip=None, throttle=None):
+    """
+    Wie run_sweep(), aber innerhalb von budget Sekunden: Vor jedem Server wird neu
+    geplant und der nützlichste Server getestet, dessen erwartete Dauer noch passt
+    (siehe planner.py). Die übrigen werden als "Skipped (Deferred)" eingetragen und
+    in deferred_file aufgelistet; unentschiedene Server werden nicht wiederholt.
+    Liefert (Ergebnisse, zurückgestellte [(Nutzen, Kosten, Server)]).
+    """
+    session["timings"] = session.get("timings") or {}
+    deadline = time.monotonic() + budget
+    progress.set_deadline(session.get("progress"), time.time() + budget)
+    today = datetime.date.today()
+    columns = list(check_columns) + extra_columns(side_probes)
+    with open(output_file, "w") as f:
+        f.write("\t".join(RESULTS_COLUMNS + columns) + "\n")
+    records = []
+    for server, reason in skipped:
+        record = {"server": server["name"], "ip": "n/a", "result": f"Skipped ({reason})"}
+        write_result(output_file, record, columns)
+        records.append(record)
+    pending, covered, cache = list(servers), {}, {}
+    limiter, account = (throttle["limiter"], throttle["account"]) if throttle else (None, None)
+    with rate_limit.session_slot(limiter, account):
+        try:
+            while pending:
+                remaining = deadline - time.monotonic()
+                options = planner.candidates(session, pending, history, covered, today, PAUSE_SECONDS, cache)
+                option = planner.choose(options, remaining)
+                if option is None:
+                    break
+                value, cost, server = option
+                print(f"\nPlan: {server['name']} (Nutzen {value:.2f}, erwartet {cost:.0f} s, "
+                      f"Rest {remaining / 60:.1f} min, {len(pending) - 1} offen)")
+                # Frist ohne die Pause nach dem Server, damit auch sie noch ins Budget passt
+                record = probe_server(session, server, check, side_probes, lookup_ip, throttle,
+                                      deadline - PAUSE_SECONDS)
+                planner.forget(cache, server)
+                if record["result"] == planner.DEFERRED_RESULT:
+                    print(f"Zeitbudget erschöpft, {server['name']} wird zurückgestellt.")
+                    break
+                write_result(output_file, record, columns)
+                records.append(record)
+                pending.remove(server)
+                covered[planner.area(server)] = covered.get(planner.area(server), 0) + 1
+        finally:
+            providers.close_session(session)
+    deferred = planner.candidates(session, pending, history, covered, today, PAUSE_SECONDS, cache)
+    deferred.sort(key=lambda option: -option[0])
+    for _, _, server in deferred:
+        record = {"server": server["name"], "ip": "n/a", "result": planner.DEFERRED_RESULT}
+        write_result(output_file, record, columns)
+        records.append(record)
+    planner.write_deferred(deferred_file, deferred)
+    return records, deferred
+
+
+def prepare_server(session, server, warm=None):
+    """Vorbereitung des nächsten Servers im Hintergrund; Fehler holt connect_server() nach."""
+    try:
+        providers.prepare_server(session, server)
+        if warm:
+            warm()
+    except Exception as e:
+        print(f"Fehler bei der Vorbereitung von {server['name']}: {e}")
+
+
+def probe_server(session, server, check, side_probes=(), lookup_ip=None, throttle=None, deadline=None):
+    """Ein Testdurchlauf für server inklusive Fehlerbehandlung und Trennen (deadline: siehe test_server())."""
+    print(f"\nStarte Test für {server['name']} ...")
+    learned, tracker = session.get("timings"), session.get("progress")
+    progress.begin(tracker, server["name"])
+    try:
+        record = test_server(session, server, check, side_probes, lookup_ip, throttle, deadline)
+    except Exception as e:
+        print(f"Fehler beim Test für {server['name']}: {e}")
+        record = {"server": server["name"], "ip": "n/a", "result": f"Error ({e})"}
+    print(f"{record['server']}\t{record['result']}")
+    started = time.monotonic()
+    providers.disconnect_server(session)
+    disconnected = time.monotonic() - started
+    progress.phase(tracker, "disconnect", disconnected)
+    if learned is not None:
+        timings.record(learned, session, server["name"], "disconnect", disconnected)
+    progress.finish(tracker, server["name"], record["result"])
+    time.sleep(PAUSE_SECONDS)
+    return record
+
+
+def retry_queue(session, queue, records, check, side_probes, rounds, budget, backoff, fresh, lookup_ip=None,
+                throttle=None):
+    """
+    Prüft die Server in queue ((Index in records, Server)) erneut, höchstens rounds
+    Runden und insgesamt budget Versuche. Vor jeder Runde wird backoff Sekunden
+    gewartet (verdoppelt je Runde); mit fresh wird der Tunnel vor jedem Versuch ganz
+    abgebaut statt nur der Server gewechselt. Ersetzt die Einträge in records.
+    """
+    for round_number in range(rounds):
+        if not queue or budget <= 0:
+            break
+        wait = backoff * 2 ** round_number
+        print(f"\nWiederholung {round_number + 1}: {len(queue)} unentschiedene Server, warte {wait:.0f} s ...")
+        time.sleep(wait)
+        remaining = []
+        for index, server in queue:
+            if budget <= 0:
+                remaining.append((index, server))
+                continue
+            budget -= 1
+            if fresh:
+                providers.disconnect_server(session, final=True)
+            record = probe_server(session, server, check, side_probes, lookup_ip, throttle)
+            records[index] = record
+            if needs_retry(record):
+                remaining.append((index, server))
+        queue = remaining
+    if queue:
+        print(f"{len(queue)} Server bleiben unentschieden.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep über alle Server eines Anbieters.")
+    parser.add_argument("--provider", required=True, choices=sorted(providers.DISPLAY_NAMES))
+    parser.add_argument("--service", required=True, choices=sorted(probes.SERVICES))
+    parser.add_argument("--country", help="Ländercode der Server (Standard: Land des Dienstes)")
+    parser.add_argument("--backend", default="cli", choices=["cli", "wireguard", "openvpn"])
+    parser.add_argument("--server-list", help="Dateiname für die Serverliste")
+    parser.add_argument("--output", help="Dateiname für die Ergebnisse")
+    parser.add_argument("--configs", help="ProtonVPN: Verzeichnis mit .ovpn- bzw. .conf-Dateien")
+    parser.add_argument("--auth-file", help="ProtonVPN/OpenVPN: Datei mit Benutzername und Passwort")
+    parser.add_argument("--catalogue", help="WireGuard: Katalogdatei (siehe wireguard_backend.py)")
+    parser.add_argument("--private-key-file", help="WireGuard: privater Schlüssel des Anbieters")
+    parser.add_argument("--namespace", help="WireGuard: Sweep in diesem Network Namespace ausführen "
+                                            "(der Fortschritt ist dann nur dort erreichbar)")
+    parser.add_argument("--prescan", action="store_true",
+                        help="Server vorab per TCP-Handshake messen, nach RTT sortieren und tote aussortieren")
+    parser.add_argument("--max-rtt", type=float, help="Mit --prescan: Server mit höherer RTT (ms) aussortieren")
+    parser.add_argument("--prescan-port", type=int, default=latency_scan.DEFAULT_PORT)
+    parser.add_argument("--prescan-cache", default=latency_scan.DEFAULT_CACHE)
+    parser.add_argument("--perf", action="store_true",
+                        help="Durchsatz, RTT und Jitter parallel zur Dienstprüfung messen")
+    parser.add_argument("--perf-url", default=perf_probe.DEFAULT_URL, help="Download-Ziel der Leistungsmessung")
+    parser.add_argument("--perf-seconds", type=float, default=perf_probe.DEFAULT_MAX_SECONDS)
+    parser.add_argument("--probe-mode", default="page", choices=["page", "manifest"],
+                        help="Dienst über die Startseite oder auf Wiedergabe-Ebene (Manifest/Segment) prüfen")
+    parser.add_argument("--bbc-vpid", help="Mit --probe-mode manifest: Versions-ID eines iPlayer-Titels")
+    parser.add_argument("--peacock-manifest", help="Mit --probe-mode manifest: HLS-Manifest eines Peacock-Titels")
+    parser.add_argument("--max-ttfb", type=float, default=manifest_probe.DEFAULT_MAX_TTFB_MS,
+                        help="Mit --probe-mode manifest: ab dieser TTFB (ms) gilt der Server als Degraded")
+    parser.add_argument("--min-segment-mbps", type=float, default=manifest_probe.DEFAULT_MIN_SEGMENT_MBPS,
+                        help="Mit --probe-mode manifest: Mindest-Durchsatz beim Segment-Download")
+    parser.add_argument("--retries", type=int, default=RETRY_ROUNDS,
+                        help="Runden, in denen unentschiedene Server am Ende erneut geprüft werden (0: aus)")
+    parser.add_argument("--retry-budget", type=int, default=RETRY_BUDGET, help="Höchstzahl aller Wiederholungen")
+    parser.add_argument("--retry-backoff", type=float, default=RETRY_BACKOFF,
+                        help="Wartezeit vor der ersten Wiederholungsrunde (s), verdoppelt sich je Runde")
+    parser.add_argument("--retry-fresh", action="store_true",
+                        help="Vor jeder Wiederholung den Tunnel komplett neu aufbauen")
+    parser.add_argument("--ip-endpoint", action="append",
+                        help="Echo-Dienst für die externe IP (mehrfach; gleichzeitig abgefragt, siehe exit_ip.py)")
+    parser.add_argument("--country-db", help="Länder-Datenbank (.mmdb/.csv) für die Spalte Land")
+    parser.add_argument("--asn-db", help="ASN-Datenbank (.mmdb/.csv) für die Spalte ASN")
+    parser.add_argument("--leak-check", action="store_true",
+                        help="DNS-, IPv6- und WebRTC-Leaks parallel zur Dienstprüfung prüfen (siehe leak_probe.py)")
+    parser.add_argument("--leak-zone", help="Mit --leak-check: Zone des eigenen autoritativen DNS-Servers")
+    parser.add_argument("--leak-resolver", help="Mit --leak-check: Resolver host:port direkt fragen")
+    parser.add_argument("--stun-server", default=leak_probe.DEFAULT_STUN_SERVER)
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Nächsten Server vorbereiten und Ergebnisse schreiben, während der aktuelle geprüft wird")
+    parser.add_argument("--account", help="Name des Anbieter-Kontos für die Sitzungs- und Ratenbegrenzung")
+    parser.add_argument("--limits", help="JSON-Datei mit Limits je Anbieter bzw. Domain (siehe rate_limit.py)")
+    parser.add_argument("--throttle", action="store_true",
+                        help="Sitzungen und Raten je Konto und Domain begrenzen (siehe rate_limit.py)")
+    parser.add_argument("--status", help="Nur Server mit diesem Status testen, z. B. online (siehe catalogue.py)")
+    parser.add_argument("--group", help="Nur Server dieser Gruppe testen, z. B. P2P (NordVPN)")
+    parser.add_argument("--max-load", type=int, help="Nur Server mit bekanntem Load bis zu diesem Wert (%%) testen")
+    parser.add_argument("--one-per", choices=catalogue.CATEGORIES,
+                        help="Je Wert dieses Felds (z. B. station) nur den Server mit dem geringsten Load testen")
+    parser.add_argument("--archive", help="Serverliste zusätzlich in dieses Archiv aufnehmen (siehe snapshot_archive.py)")
+    parser.add_argument("--timings", help="Datei der gelernten Zeiten je Server: statt fester Wartezeiten verwenden "
+                                          "und fortschreiben (siehe timings.py)")
+    parser.add_argument("--budget", type=float, help="Zeitbudget (min): nur die nützlichsten Server testen, "
+                                                     "pünktlich enden (siehe planner.py)")
+    parser.add_argument("--history", nargs="*", default=[], help="Mit --budget: frühere Ergebnisdateien")
+    parser.add_argument("--deferred", help="Mit --budget: Dateiname für die zurückgestellten Server")
+    parser.add_argument("--status-port", type=int, help="Fortschritt als JSON unter http://127.0.0.1:PORT/ "
+                                                        "(siehe progress.py)")
+    parser.add_argument("--status-address", default=progress.DEFAULT_ADDRESS)
+    args = parser.parse_args()
+
+    if args.provider == "protonvpn" and not args.configs:
+        parser.error("ProtonVPN benötigt --configs")
+    if args.provider == "protonvpn" and args.backend != "wireguard" and not args.auth_file:
+        parser.error("ProtonVPN über OpenVPN benötigt --auth-file")
+    if args.provider != "protonvpn" and args.backend == "wireguard" and not (args.catalogue and args.private_key_file):
+        parser.error("Das WireGuard-Backend benötigt --catalogue und --private-key-file")
+    if args.probe_mode == "manifest" and args.service == "bbciplayer" and not args.bbc_vpid:
+        parser.error("BBC iPlayer auf Wiedergabe-Ebene benötigt --bbc-vpid")
+    if args.probe_mode == "manifest" and args.service == "peacock" and not args.peacock_manifest:
+        parser.error("Peacock auf Wiedergabe-Ebene benötigt --peacock-manifest")
+    if args.budget is not None and args.pipeline:
+        parser.error("--budget und --pipeline lassen sich nicht kombinieren")
+    if args.namespace and args.backend != "wireguard":
+        parser.error("--namespace benötigt das WireGuard-Backend")
+    if args.namespace and not os.path.exists(os.path.join(NETNS_DIR, args.namespace)):
+        parser.error(f"Namespace {args.namespace} nicht gefunden (siehe ip netns list)")
+    if args.namespace:
+        enter_namespace(args.namespace)
+
+    service = probes.SERVICES[args.service]
+    country = args.country or service["country"]
+    display = providers.DISPLAY_NAMES[args.provider]
+    today = datetime.datetime.now().strftime("%Y%m%d")
+    server_file = args.server_list or f"{display}_{country.upper()}_{today}.txt"
+    output_file = args.output or f"{service['label']}_Results_{display}_{country.upper()}_{today}.txt"
+
+    leak_resolver = leak_probe.split_address(args.leak_resolver, 53) if args.leak_resolver else None
+    home = None
+    if args.leak_check:
+        print("Erhebe die Vergleichswerte für die Leak-Prüfung ohne VPN ...")
+        home = leak_probe.baseline(args.leak_zone, leak_resolver)
+
+    session = providers.open_session(
+        args.provider, args.backend,
+        configs=args.configs, auth_file=args.auth_file,
+        catalogue=args.catalogue, private_key_file=args.private_key_file, namespace=args.namespace,
+    )
+    print(f"Hole die Serverliste von {display} ({country}) ...")
+    servers = providers.fetch_servers(session, country)
+    if not servers:
+        print("Fehler: Es konnten keine Server gefunden werden.")
+        return
+    save_server_list(servers, server_file)
+    print(f"{len(servers)} Server wurden in '{server_file}' gespeichert.")
+    if args.archive:
+        series, date, summary = snapshot_archive.store(args.archive, server_file, f"{display}_{country.upper()}")
+        if summary:
+            print(f"Archiv {series} {date}: {len(summary['added'])} neu, {len(summary['removed'])} entfernt, "
+                  f"{len(summary['changed'])} geändert.")
+
+    skipped = []
+    if args.status or args.group or args.max_load is not None or args.one_per:
+        servers, skipped = catalogue.pick(servers, args.status, args.group, args.max_load, args.one_per)
+        print(f"Auswahl: {len(servers)} Server werden getestet, {len(skipped)} aussortiert.")
+    if args.prescan:
+        measurements = latency_scan.scan(servers, port=args.prescan_port, cache_file=args.prescan_cache)
+        servers, unreachable = latency_scan.rank_servers(servers, measurements, args.prescan_port, args.max_rtt)
+        skipped += unreachable
+        print(f"Vorprüfung: {len(servers)} Server werden getestet, {len(unreachable)} aussortiert.")
+
+    side_probes = []
+    if args.perf:
+        side_probes.append({
+            "name": "perf",
+            "columns": perf_probe.COLUMNS,
+            "run": lambda: perf_probe.run_probe(args.perf_url, args.perf_seconds),
+        })
+    if args.leak_check:
+        side_probes.append({
+            "name": "leak",
+            "columns": leak_probe.COLUMNS,
+            "run": lambda: leak_probe.run_probe(args.leak_zone, home, leak_resolver,
+                                                stun_server=args.stun_server, country_db=args.country_db),
+        })
+
+    check, check_columns = service["check"], []
+    if args.probe_mode == "manifest":
+        thresholds = {"max_ttfb_ms": args.max_ttfb, "min_segment_mbps": args.min_segment_mbps}
+        target = args.bbc_vpid if args.service == "bbciplayer" else args.peacock_manifest
+        check = lambda: service["manifest_check"](target, **thresholds)
+        check_columns = manifest_probe.COLUMNS
+
+    lookup_ip = None
+    if args.ip_endpoint or args.country_db or args.asn_db:
+        endpoints = args.ip_endpoint or exit_ip.DEFAULT_ENDPOINTS
+        lookup_ip = lambda: exit_ip.resolve(endpoints, country_db=args.country_db, asn_db=args.asn_db)
+        check_columns = check_columns + exit_ip.COLUMNS
+
+    throttle = None
+    if args.throttle:
+        throttle = {
+            "limiter": rate_limit.new_limiter(rate_limit.load_limits(args.limits)),
+            "account": f"{args.provider}:{args.account or 'default'}",
+            "domain": service["domain"],
+        }
+    warm = service.get("warm") if args.probe_mode == "page" else None
+    if args.timings:
+        session["timings"] = timings.load(args.timings)
+    status_server = None
+    if args.status_port is not None:
+        session["progress"] = progress.new_tracker(f"{display} {service['label']} {country.upper()}", len(servers))
+        status_server = progress.serve(session["progress"], args.status_address, args.status_port)
+    try:
+        if args.budget is not None:
+            deferred_file = args.deferred or os.path.splitext(output_file)[0] + "_Deferred.txt"
+            _, deferred = run_budget(session, servers, check, output_file, args.budget * 60,
+                                     planner.load_history(args.history), deferred_file, skipped, side_probes,
+                                     check_columns, lookup_ip, throttle)
+            print(f"\n{len(deferred)} Server zurückgestellt (Liste in '{deferred_file}').")
+        else:
+            run_sweep(session, servers, check, output_file, skipped, side_probes, check_columns,
+                      args.retries, args.retry_budget, args.retry_backoff, args.retry_fresh, lookup_ip,
+                      args.pipeline, warm, throttle)
+    finally:
+        if args.timings:
+            timings.save(args.timings, session["timings"])
+        if status_server:
+            status_server.shutdown()
+    print(f"\nTest abgeschlossen. Ergebnisse wurden in '{output_file}' gespeichert.")
+
+
+if __name__ == "__main__":
+    main()
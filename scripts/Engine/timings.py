@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Gelernte Verbindungs-, Warte- und Prüfzeiten je Server.
+
+Die Einzelskripte warten nach jedem Verbinden eine feste Zeit je Anbieter (NordVPN
+5 s, ExpressVPN 8 s, CyberGhost 10 s), egal wie schnell der Server tatsächlich
+bereit ist. Hier werden je Server und je Anbieter/Backend die Dauern der Phasen
+  connect  Verbindungsaufbau (providers.connect_server())
+  settle   vom Verbinden bis zur ersten Antwort auf die Abfrage der externen IP
+  ip       Abfrage der externen IP (bzw. exit_ip.resolve())
+  probe    Dienstprüfung inklusive Nebenprüfungen
+  disconnect  Trennen (providers.disconnect_server())
+gesammelt (die letzten MAX_SAMPLES je Phase) und als gewichtete Quantile
+ausgewertet; das Gewicht einer Messung halbiert sich alle HALF_LIFE Sekunden.
+
+Daraus ergeben sich:
+  - der Ablauf nach dem Verbinden (settle_schedule()): erste Abfrage der externen
+    IP nach FIRST_POLL_FRACTION des 10-%-Quantils, dann alle POLL_INTERVAL
+    Sekunden bis zum 95-%-Quantil mal MARGIN. Eine Antwort schon auf die erste
+    Abfrage heißt nur "höchstens so lange"; weil die erste Abfrage früher liegt als
+    das Quantil, können die gelernten Zeiten auch wieder sinken. Kommt bis zum
+    Limit keine Antwort, zählt das Limit als Messung.
+  - Zeitlimits (timeout()), z. B. für den WireGuard-Handshake
+  - die erwartete Dauer je Server (expected()), z. B. für die Planung
+Für Server mit weniger als MIN_SAMPLES Messungen gelten die Werte des Anbieters,
+ohne solche wird sofort abgefragt, höchstens so lange wie die feste Wartezeit
+(providers.SETTLE_SECONDS).
+
+Beispiele:
+  ./sweep.py --provider nordvpn --service peacock --timings timings.txt
+  ./timings.py --file timings.txt --provider nordvpn/cli
+"""
+import argparse
+import os
+import time
+
+import exit_ip
+
+HEADER = "Schlüssel\tPhase\tDauer (s)\tZeit\n"
+DEFAULT_FILE = "timings.txt"
+PHASES = ("connect", "settle", "ip", "probe", "disconnect")
+MAX_SAMPLES = 40
+MIN_SAMPLES = 3
+HALF_LIFE = 7 * 24 * 3600
+MARGIN = 1.5
+MIN_TIMEOUT = 1.0
+MAX_FACTOR = 3
+POLL_INTERVAL = 0.3
+POLL_TIMEOUT = 1.5
+FIRST_POLL_FRACTION = 0.5
+
+
+def load(filename):
+    """{(Schlüssel, Phase): [(Dauer, Zeit)]} aus der Datei (leer, wenn es sie nicht gibt)."""
+    timings = {}
+    if not filename or not os.path.exists(filename):
+        return timings
+    with open(filename, "r") as f:
+        for line in f.readlines()[1:]:
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) < 4:
+                continue
+            timings.setdefault((parts[0], parts[1]), []).append((float(parts[2]), float(parts[3])))
+    return timings
+
+
+def save(filename, timings):
+    """Schreibt alle Messungen (atomar über eine temporäre Datei)."""
+    tmp = filename + ".tmp"
+    with open(tmp, "w") as f:
+        f.write(HEADER)
+        for (key, phase), samples in sorted(timings.items()):
+            for seconds, stamp in samples:
+                f.write(f"{key}\t{phase}\t{seconds:.3f}\t{stamp:.0f}\n")
+    os.replace(tmp, filename)
+
+
+def keys(session, server_name):
+    """Schlüssel des Servers und des Anbieters/Backends."""
+    provider = f"{session['provider']}/{session['backend']}"
+    return f"{provider}:{server_name}", provider
+
+
+def record(timings, session, server_name, phase, seconds):
+    """Nimmt eine Messung für den Server und für den Anbieter auf."""
+    now = time.time()
+    for key in keys(session, server_name):
+        samples = timings.setdefault((key, phase), [])
+        samples.append((seconds, now))
+        del samples[:-MAX_SAMPLES]
+
+
+def weighted_quantile(samples, q, now=None):
+    """q-Quantil der Dauern, jede Messung mit 0.5 ** (Alter / HALF_LIFE) gewichtet."""
+    now = now or time.time()
+    weighted = sorted((seconds, 0.5 ** (max(0.0, now - stamp) / HALF_LIFE)) for seconds, stamp in samples)
+    target = q * sum(weight for _, weight in weighted)
+    total = 0.0
+    for seconds, weight in weighted:
+        total += weight
+        if total >= target:
+            return seconds
+    return weighted[-1][0]
+
+
+def quantile(timings, session, server_name, phase, q):
+    """Quantil des Servers, ersatzweise des Anbieters; None ohne genügend Messungen."""
+    for key in keys(session, server_name):
+        samples = timings.get((key, phase))
+        if samples and len(samples) >= MIN_SAMPLES:
+            return weighted_quantile(samples, q)
+    return None
+
+
+def timeout(timings, session, server_name, phase, default):
+    """Zeitlimit: 95-%-Quantil mal MARGIN, begrenzt auf MIN_TIMEOUT bis default * MAX_FACTOR."""
+    high = quantile(timings, session, server_name, phase, 0.95)
+    if high is None:
+        return default
+    return min(max(high * MARGIN, MIN_TIMEOUT), default * MAX_FACTOR)
+
+
+def settle_schedule(timings, session, server_name):
+    """
+    (erste Abfrage nach, höchstens warten bis) in Sekunden nach dem Verbinden.
+    Ohne Messungen: sofort abfragen, höchstens die feste Wartezeit lang.
+    """
+    low = quantile(timings, session, server_name, "settle", 0.1)
+    if low is None:
+        return 0.0, session["settle"]
+    limit = timeout(timings, session, server_name, "settle", session["settle"])
+    return min(low * FIRST_POLL_FRACTION, limit), limit
+
+
+def settle(timings, session, server_name, endpoints=exit_ip.DEFAULT_ENDPOINTS, max_wait=None):
+    """
+    Wartet nach dem Verbinden nach settle_schedule() auf die externe IP und nimmt
+    die Dauer bis zur ersten Antwort auf (ohne Antwort das Limit). max_wait kürzt
+    das Limit (z. B. auf den Rest eines Zeitbudgets); ein so gekürztes Limit wird
+    nicht aufgenommen. Liefert (IP oder None, Dauer).
+    """
+    first, limit = settle_schedule(timings, session, server_name)
+    shortened = max_wait is not None and max_wait < limit
+    if shortened:
+        first, limit = min(first, max_wait), max_wait
+    started = time.monotonic()
+    time.sleep(first)
+    while True:
+        ip, _ = exit_ip.lookup_exit_ip(endpoints, timeout=POLL_TIMEOUT)
+        elapsed = time.monotonic() - started
+        if ip:
+            record(timings, session, server_name, "settle", elapsed)
+            return ip, elapsed
+        if elapsed >= limit:
+            if not shortened:
+                record(timings, session, server_name, "settle", limit)
+            return None, elapsed
+        time.sleep(POLL_INTERVAL)
+
+
+def learned_all(timings, session, server_name):
+    """True, wenn der Server in allen Phasen eigene Messungen hat (expected() hängt dann nur von ihm ab)."""
+    key = keys(session, server_name)[0]
+    return all(len(timings.get((key, phase), ())) >= MIN_SAMPLES for phase in PHASES)
+
+
+def expected(timings, session, server_name, default):
+    """Erwartete Dauer eines Tests (Median aller Phasen); default für fehlende Phasen."""
+    total = 0.0
+    for phase in PHASES:
+        median = quantile(timings, session, server_name, phase, 0.5)
+        total += default[phase] if median is None else median
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gelernte Zeiten je Server anzeigen.")
+    parser.add_argument("--file", default=DEFAULT_FILE)
+    parser.add_argument("--provider", help="Nur Schlüssel dieses Anbieters/Backends, z. B. nordvpn/cli")
+    args = parser.parse_args()
+
+    timings = load(args.file)
+    print("Schlüssel\tPhase\tMessungen\tp10 (s)\tp50 (s)\tp95 (s)")
+    for (key, phase), samples in sorted(timings.items()):
+        if args.provider and not key.startswith(args.provider):
+            continue
+        values = "\t".join(f"{weighted_quantile(samples, q):.2f}" for q in (0.1, 0.5, 0.95))
+        print(f"{key}\t{phase}\t{len(samples)}\t{values}")
+
+
+if __name__ == "__main__":
+    main()
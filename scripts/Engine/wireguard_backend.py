@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Schneller Verbindungsaufbau direkt über WireGuard (benötigt root, iproute2 und wg).
+
+Statt "nordvpn connect" & Co. (mehrere Sekunden plus feste Wartezeit) wird einmalig
+ein WireGuard-Interface mit dem vom Anbieter ausgegebenen privaten Schlüssel
+angelegt. Ein Serverwechsel tauscht danach nur noch den Peer (Public Key und
+Endpunkt) in einem einzigen "wg set"-Aufruf aus; gewartet wird nicht pauschal,
+sondern nur bis zum ersten Handshake mit dem neuen Server.
+
+Die Server stammen aus einem Katalog (Tab-getrennt):
+  name<TAB>endpoint<TAB>public_key[<TAB>country]
+z. B. von "fetch-nordvpn" aus der NordVPN-API (Technologie wireguard_udp).
+
+Geroutet wird wie bei wg-quick über eine eigene Routing-Tabelle mit fwmark, damit
+die verschlüsselten Pakete zum Endpunkt selbst nicht in den Tunnel geraten.
+Die Anbieter vergeben im Tunnel nur IPv4-Adressen. Damit IPv6 nicht am Tunnel
+vorbei über das physische Interface geht, bekommt dieselbe Tabelle für IPv6 eine
+"unreachable"-Default-Route mit denselben Regeln: Solange der Tunnel steht, ist
+IPv6 nach außen gesperrt (lokale Netze bleiben erreichbar, wie bei IPv4).
+Schlägt der Aufbau mittendrin fehl, wird alles wieder abgebaut.
+
+Beispiele:
+  sudo ./wireguard_backend.py fetch-nordvpn --country uk --catalogue nordlynx_uk.txt
+  sudo ./wireguard_backend.py up uk2242 --catalogue nordlynx_uk.txt --private-key-file nordlynx.key
+  sudo ./wireguard_backend.py switch uk2243 --catalogue nordlynx_uk.txt
+  sudo ./wireguard_backend.py down
+"""
+import argparse
+import os
+import socket
+import subprocess
+import time
+
+DEFAULT_INTERFACE = "wgvpn"
+# Adresse im Tunnel, wie sie NordLynx vergibt
+DEFAULT_ADDRESS = "10.5.0.2/32"
+DEFAULT_PORT = 51820
+FWMARK = 51820
+ROUTE_TABLE = 51820
+KEEPALIVE = 25
+HANDSHAKE_TIMEOUT = 5.0
+
+
+def run(command, namespace=None, input_text=None, check=True):
+    """Führt einen Befehl aus (optional in einem Network Namespace)."""
+    if namespace:
+        command = ["ip", "netns", "exec", namespace] + command
+    result = subprocess.run(command, input=input_text, capture_output=True, text=True)
+    if check and result.returncode != 0:
+        raise RuntimeError(f"{' '.join(command)}: {result.stderr.strip()}")
+    return result.stdout.strip()
+
+
+def generate_keypair(namespace=None):
+    """Erzeugt ein WireGuard-Schlüsselpaar (privat, öffentlich)."""
+    private_key = run(["wg", "genkey"], namespace)
+    public_key = run(["wg", "pubkey"], namespace, input_text=private_key + "\n")
+    return private_key, public_key
+
+
+def fetch_nordvpn_catalogue(country):
+    """
+    Ruft die NordVPN-Serverliste ab und liefert für alle Server des Landes
+    (Hostname beginnt mit dem Ländercode) Endpunkt und WireGuard-Public-Key.
+    """
+    command = (
+        r'''curl -s "https://api.nordvpn.com/v1/servers?limit=0" | jq -r '.[] '''
+        rf'''| select(.hostname | startswith("{country}")) '''
+        r'''| {name: (.hostname | sub("\\.nordvpn\\.com$"; "")), station, country: .locations[0].country.name, '''
+        r'''key: ([.technologies[] | select(.identifier == "wireguard_udp") | .metadata[] '''
+        r'''| select(.name == "public_key") | .value] | first)} | select(.key != null) '''
+        rf'''| "\(.name)\t\(.station):{DEFAULT_PORT}\t\(.key)\t\(.country)"' '''
+    )
+    result = subprocess.run(command, shell=True, capture_output=True, text=True)
+    return result.stdout
+
+
+def load_catalogue(filename):
+    """Liest den Katalog ein und liefert ein Dict name -> Server."""
+    servers = {}
+    with open(filename, "r") as f:
+        for line in f:
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) < 3 or line.startswith("#"):
+                continue
+            servers[parts[0]] = {
+                "name": parts[0],
+                "endpoint": parts[1],
+                "public_key": parts[2],
+                "country": parts[3] if len(parts) > 3 else "",
+            }
+    return servers
+
+
+def new_tunnel(interface=DEFAULT_INTERFACE, private_key_file=None, address=DEFAULT_ADDRESS, namespace=None):
+    """Beschreibt ein (noch nicht aufgebautes) Tunnel-Interface."""
+    return {
+        "interface": interface,
+        "private_key_file": private_key_file,
+        "address": address,
+        "namespace": namespace,
+    }
+
+
+def current_peers(tunnel):
+    """Liefert die Public Keys der aktuell eingetragenen Peers."""
+    output = run(["wg", "show", tunnel["interface"], "peers"], tunnel["namespace"], check=False)
+    return [line.strip() for line in output.splitlines() if line.strip()]
+
+
+def resolve_endpoint(endpoint):
+    """Löst den Host eines Endpunkts "host:port" vorab auf; liefert "IP:port"."""
+    host, _, port = endpoint.rpartition(":")
+    address = socket.getaddrinfo(host.strip("[]"), int(port), socket.AF_INET, socket.SOCK_DGRAM)[0][4][0]
+    return f"{address}:{port}"
+
+
+def peer_arguments(server):
+    """Argumente für "wg set", um server als einzigen Peer einzutragen."""
+    return [
+        "peer", server["public_key"],
+        "endpoint", server["endpoint"],
+        "allowed-ips", "0.0.0.0/0,::/0",
+        "persistent-keepalive", str(KEEPALIVE),
+    ]
+
+
+def key_arguments(server, key_file=None):
+    """
+    Argumente und Eingabe für "wg set ... private-key": Ein eigener Schlüssel des
+    Servers (z. B. je ProtonVPN-Konfiguration) wird über stdin übergeben und nie auf
+    die Platte geschrieben; sonst die Schlüsseldatei key_file, falls angegeben.
+    """
+    if server.get("private_key"):
+        return ["private-key", "/dev/stdin"], server["private_key"] + "\n"
+    if key_file:
+        return ["private-key", key_file], None
+    return [], None
+
+
+def latest_handshake(tunnel, public_key):
+    """Zeitpunkt (Unix-Zeit) des letzten Handshakes mit public_key, 0 wenn keiner."""
+    output = run(["wg", "show", tunnel["interface"], "latest-handshakes"], tunnel["namespace"], check=False)
+    for line in output.splitlines():
+        parts = line.split()
+        if len(parts) == 2 and parts[0] == public_key:
+            return int(parts[1])
+    return 0
+
+
+def wait_for_handshake(tunnel, public_key, timeout=HANDSHAKE_TIMEOUT, interval=0.02):
+    """
+    Wartet, bis ein Handshake mit dem Server stattgefunden hat.
+    Liefert die Wartezeit in Sekunden oder None bei Zeitüberschreitung.
+    """
+    started = time.monotonic()
+    while time.monotonic() - started < timeout:
+        if latest_handshake(tunnel, public_key):
+            return time.monotonic() - started
+        time.sleep(interval)
+    return None
+
+
+def ipv6_available():
+    """Ob der Kernel IPv6 unterstützt; ohne IPv6 gibt es nichts zu sperren."""
+    return os.path.exists("/proc/net/if_inet6")
+
+
+def tunnel_up(tunnel, server, timeout=HANDSHAKE_TIMEOUT):
+    """Legt Interface und Policy-Routing an und verbindet mit server."""
+    interface = tunnel["interface"]
+    namespace = tunnel["namespace"]
+    run(["ip", "link", "add", "dev", interface, "type", "wireguard"], namespace)
+    try:
+        arguments, key_input = key_arguments(server, tunnel["private_key_file"])
+        run(["wg", "set", interface] + arguments + ["fwmark", str(FWMARK)], namespace, input_text=key_input)
+        run(["ip", "address", "add", tunnel["address"], "dev", interface], namespace)
+        run(["ip", "link", "set", interface, "up"], namespace)
+        run(["ip", "route", "add", "default", "dev", interface, "table", str(ROUTE_TABLE)], namespace)
+        families = [["ip"]] + ([["ip", "-6"]] if ipv6_available() else [])
+        if len(families) > 1:
+            run(["ip", "-6", "route", "add", "unreachable", "default", "table", str(ROUTE_TABLE)], namespace)
+        for ip in families:
+            run(ip + ["rule", "add", "not", "fwmark", str(FWMARK), "table", str(ROUTE_TABLE)], namespace)
+            run(ip + ["rule", "add", "table", "main", "suppress_prefixlength", "0"], namespace)
+        run(["wg", "set", interface] + peer_arguments(server), namespace)
+    except Exception:
+        # Kein halb aufgebautes Interface zurücklassen (connect() hielte es sonst für bereit)
+        tunnel_down(tunnel)
+        raise
+    return wait_for_handshake(tunnel, server["public_key"], timeout)
+
+
+def switch_server(tunnel, server, timeout=HANDSHAKE_TIMEOUT):
+    """
+    Wechselt auf server: alte Peers entfernen und neuen Peer eintragen in einem
+    einzigen "wg set"-Aufruf. Interface, Adresse und Routing bleiben bestehen.
+    Bringt der Server einen eigenen Schlüssel mit (z. B. je ProtonVPN-Konfiguration),
+    wird dieser im selben Aufruf gesetzt.
+    """
+    arguments, key_input = key_arguments(server)
+    for public_key in current_peers(tunnel):
+        if public_key != server["public_key"]:
+            arguments += ["peer", public_key, "remove"]
+    run(["wg", "set", tunnel["interface"]] + arguments + peer_arguments(server), tunnel["namespace"],
+        input_text=key_input)
+    return wait_for_handshake(tunnel, server["public_key"], timeout)
+
+
+def tunnel_down(tunnel):
+    """Entfernt Interface und Policy-Routing wieder."""
+    namespace = tunnel["namespace"]
+    for ip in (["ip"], ["ip", "-6"]):
+        run(ip + ["rule", "del", "not", "fwmark", str(FWMARK), "table", str(ROUTE_TABLE)], namespace, check=False)
+        run(ip + ["rule", "del", "table", "main", "suppress_prefixlength", "0"], namespace, check=False)
+    run(["ip", "-6", "route", "del", "unreachable", "default", "table", str(ROUTE_TABLE)], namespace, check=False)
+    run(["ip", "link", "del", "dev", tunnel["interface"]], namespace, check=False)
+
+
+def is_up(tunnel):
+    """Prüft, ob das Tunnel-Interface existiert."""
+    output = run(["ip", "link", "show", "dev", tunnel["interface"]], tunnel["namespace"], check=False)
+    return bool(output)
+
+
+def connect(tunnel, server, timeout=HANDSHAKE_TIMEOUT):
+    """
+    Verbindet mit server: beim ersten Mal per tunnel_up(), danach per switch_server().
+    Liefert ("connected" | "failed", Dauer in Sekunden).
+    """
+    started = time.monotonic()
+    if is_up(tunnel):
+        waited = switch_server(tunnel, server, timeout)
+    else:
+        waited = tunnel_up(tunnel, server, timeout)
+    status = "connected" if waited is not None else "failed"
+    return status, time.monotonic() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Schneller Serverwechsel über WireGuard.")
+    parser.add_argument("command", choices=["fetch-nordvpn", "up", "switch", "down", "bench"])
+    parser.add_argument("servers", nargs="*", help="Servernamen aus dem Katalog")
+    parser.add_argument("--catalogue", default="wireguard_servers.txt", help="Katalogdatei")
+    parser.add_argument("--country", default="uk", help="Ländercode für fetch-nordvpn")
+    parser.add_argument("--private-key-file", help="Privater Schlüssel des Anbieters")
+    parser.add_argument("--address", default=DEFAULT_ADDRESS, help="Tunnel-Adresse")
+    parser.add_argument("--interface", default=DEFAULT_INTERFACE)
+    parser.add_argument("--namespace", help="Network Namespace (z. B. für das Labor)")
+    parser.add_argument("--timeout", type=float, default=HANDSHAKE_TIMEOUT,
+                        help="Maximale Wartezeit auf den Handshake (s)")
+    args = parser.parse_args()
+
+    if args.command == "fetch-nordvpn":
+        print(f"Hole die WireGuard-Serverliste von NordVPN ({args.country}) ...")
+        data = fetch_nordvpn_catalogue(args.country)
+        if not data:
+            print("Fehler: Es konnten keine Daten abgerufen werden.")
+            return
+        with open(args.catalogue, "w") as f:
+            f.write(data)
+        print(f"{len(data.splitlines())} Server wurden in '{args.catalogue}' gespeichert.")
+        return
+
+    tunnel = new_tunnel(args.interface, args.private_key_file, args.address, args.namespace)
+    if args.command == "down":
+        tunnel_down(tunnel)
+        print(f"Interface {args.interface} entfernt.")
+        return
+
+    catalogue = load_catalogue(args.catalogue)
+    missing = [name for name in args.servers if name not in catalogue]
+    if missing or not args.servers:
+        print(f"Fehler: Server nicht im Katalog: {', '.join(missing) or '-'}")
+        return
+    if not is_up(tunnel) and not args.private_key_file:
+        parser.error("Für den ersten Verbindungsaufbau wird --private-key-file benötigt")
+
+    # "bench" wechselt der Reihe nach durch alle angegebenen Server
+    names = args.servers if args.command == "bench" else args.servers[:1]
+    for name in names:
+        status, elapsed = connect(tunnel, catalogue[name], args.timeout)
+        print(f"{name}\t{catalogue[name]['endpoint']}\t{status}\t{elapsed * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()